@@ -1,25 +1,31 @@
 import bpy
 import math
 from mathutils import Vector
+from models.garden_path import set_reveal_frames
 from utils.keyframe_utils import set_keyframe
 
-def animate_border_phase(robot, garden_path, frame_range):
+def animate_border_phase(robot, garden_path, frame_range, border=None):
     """Animate the border construction phase"""
     start_frame, end_frame = frame_range
     
-    # Show garden path
+    # Show the printed border: the prebuilt mesh if there is one, else the curve
     bpy.context.scene.frame_set(start_frame)
-    garden_path.hide_viewport = False
-    garden_path.hide_render = False
-    set_keyframe(garden_path, "hide_viewport", start_frame)
-    set_keyframe(garden_path, "hide_render", start_frame)
+    printed = border if border else garden_path
+    printed.hide_viewport = False
+    printed.hide_render = False
+    set_keyframe(printed, "hide_viewport", start_frame)
+    set_keyframe(printed, "hide_render", start_frame)
     
-    # Animate the bevel factor to make it appear to be printed
-    garden_path.data.bevel_factor_end = 0.0
-    garden_path.data.keyframe_insert("bevel_factor_end", frame=start_frame)
-    
-    garden_path.data.bevel_factor_end = 1.0
-    garden_path.data.keyframe_insert("bevel_factor_end", frame=end_frame)
+    if border:
+        # Faces are revealed by the shader once their deposit frame is reached
+        set_reveal_frames(border, frame_range, "print_progress", "deposit_frame")
+    else:
+        # Animate the bevel factor to make it appear to be printed
+        garden_path.data.bevel_factor_end = 0.0
+        garden_path.data.keyframe_insert("bevel_factor_end", frame=start_frame)
+        
+        garden_path.data.bevel_factor_end = 1.0
+        garden_path.data.keyframe_insert("bevel_factor_end", frame=end_frame)
     
     # Robot follows the path
     # Get curve points for robot movement
@@ -55,7 +61,12 @@ def animate_border_phase(robot, garden_path, frame_range):
                 p0.y + (p1.y - p0.y) * segment_t,
                 0
             ))
-        
+
+        # Turn the short way from the previous key, never a whole revolution back
+        if i > 0:
+            angle = previous_angle + (angle - previous_angle + math.pi) % (2 * math.pi) - math.pi
+        previous_angle = angle
+
         # Offset robot to place print head on the path
         offset_distance = 0.3  # Distance from robot center to print head
         offset_x = math.cos(angle + math.radians(90)) * offset_distance
@@ -1,6 +1,6 @@
 import bpy
 import math
-from utils.keyframe_utils import set_keyframe
+from animation.robot_motion import animate_robot_move
 
 def animate_completion_phase(robot, frame_range):
     """Animate the completion and moving phase"""
@@ -8,12 +8,8 @@ def animate_completion_phase(robot, frame_range):
     
     # Robot is already in position from filling phase
     
-    # Move robot away from completed garden to indicate completion
-    bpy.context.scene.frame_set(end_frame)
-    robot.location = (4, -2, 0)
-    robot.rotation_euler = (0, 0, math.radians(135))
-    set_keyframe(robot, "location", end_frame)
-    set_keyframe(robot, "rotation_euler", end_frame)
+    # Drive away from the completed garden to indicate completion
+    animate_robot_move(robot, (4, -2, 0), frame_range, math.radians(135))
     
     # Return to start frame
     bpy.context.scene.frame_set(start_frame)
\ No newline at end of file
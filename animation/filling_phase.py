@@ -1,32 +1,97 @@
 import bpy
 import math
+from config import SOIL_FILL_SETTINGS, ROBOT_MOTION_SETTINGS
+from models.garden_path import set_reveal_frames, get_bed_outline
 from utils.keyframe_utils import set_keyframe
+from utils.coverage_planning import plan_coverage_path, spread_passes
+from animation.robot_motion import animate_robot_move, get_toolpath_poses, get_toolpath_times, animate_robot_toolpath
 
-def animate_filling_phase(robot, soil_fill, frame_range):
+def get_timed_toolpath(toolpath, count):
+    """Robot poses and robot seconds of a number of passes spread over a toolpath"""
+    settings = SOIL_FILL_SETTINGS
+    if count < len(toolpath) // 2:
+        toolpath = spread_passes(toolpath, count)
+    centers, headings = get_toolpath_poses(toolpath, settings["nozzle_offset"])
+    return centers, headings, get_toolpath_times(centers, headings, settings["nozzle_speed"], settings["turn_time"])
+
+def fit_toolpath(toolpath, seconds):
+    """Timed poses of the most passes of a toolpath the robot can sweep in the given seconds, and their count"""
+    passes = len(toolpath) // 2
+    timed = get_timed_toolpath(toolpath, passes)
+    if timed[2][-1] <= seconds:
+        return timed, passes
+    
+    # Bisect the pass count: fewer passes take less time
+    low, high = 1, passes - 1
+    while low < high:
+        count = (low + high + 1) // 2
+        if get_timed_toolpath(toolpath, count)[2][-1] <= seconds:
+            low = count
+        else:
+            high = count - 1
+    return get_timed_toolpath(toolpath, low), low
+
+def animate_filling_phase(robot, soil_fill, frame_range, garden_path=None):
     """Animate the soil filling phase"""
     start_frame, end_frame = frame_range
     mid_frame = start_frame + (end_frame - start_frame) // 2
     
-    # Show soil fill
+    # Show soil fill (not built when no frame after the filling starts is rendered)
     bpy.context.scene.frame_set(start_frame)
-    soil_fill.hide_viewport = False
-    soil_fill.hide_render = False
-    set_keyframe(soil_fill, "hide_viewport", start_frame)
-    set_keyframe(soil_fill, "hide_render", start_frame)
-    
-    # Animate the bevel factor to make soil appear to fill in
-    soil_fill.data.bevel_factor_end = 0.0
-    soil_fill.data.keyframe_insert("bevel_factor_end", frame=start_frame)
+    if soil_fill is not None:
+        soil_fill.hide_viewport = False
+        soil_fill.hide_render = False
+        set_keyframe(soil_fill, "hide_viewport", start_frame)
+        set_keyframe(soil_fill, "hide_render", start_frame)
+        
+        if soil_fill.type == 'MESH':
+            # Layers are revealed by the shader once their fill frame is reached
+            set_reveal_frames(soil_fill, frame_range, "fill_progress", "fill_frame")
+        else:
+            # Animate the bevel factor to make soil appear to fill in
+            soil_fill.data.bevel_factor_end = 0.0
+            soil_fill.data.keyframe_insert("bevel_factor_end", frame=start_frame)
+            
+            soil_fill.data.bevel_factor_end = 1.0
+            soil_fill.data.keyframe_insert("bevel_factor_end", frame=end_frame)
     
-    soil_fill.data.bevel_factor_end = 1.0
-    soil_fill.data.keyframe_insert("bevel_factor_end", frame=end_frame)
+    settings = SOIL_FILL_SETTINGS
+    toolpath = None
+    if garden_path is not None and settings["toolpath"]:
+        sweep_angle = settings["sweep_angle"]
+        toolpath = plan_coverage_path(
+            get_bed_outline(garden_path),
+            settings["nozzle_width"],
+            settings["pass_overlap"],
+            None if sweep_angle is None else math.radians(sweep_angle)
+        )
     
-    # Robot moves to center of garden
-    bpy.context.scene.frame_set(mid_frame)
-    robot.location = (0, 0, 0)
-    robot.rotation_euler = (0, 0, math.radians(45))
-    set_keyframe(robot, "location", mid_frame)
-    set_keyframe(robot, "rotation_euler", mid_frame)
+    if toolpath is not None and len(toolpath):
+        # Sweep at nozzle speed in robot time; when the whole toolpath does not
+        # fit in the phase, fewer passes are spread over the bed instead
+        scene = bpy.context.scene
+        seconds_per_frame = ROBOT_MOTION_SETTINGS["time_lapse"] * scene.render.fps_base / scene.render.fps
+        seconds = (end_frame - start_frame) * (1.0 - settings["approach_fraction"]) * seconds_per_frame
+        (centers, headings, times), count = fit_toolpath(toolpath, seconds)
+        passes = len(toolpath) // 2
+        if count < passes:
+            print(f"Filling toolpath: animating {count} of {passes} passes spread over the bed, "
+                  f"the full sweep takes longer than the phase")
+        else:
+            print(f"Filling toolpath: {passes} passes")
+        
+        # Drive to the first pass in the time the sweep leaves, then sweep the nozzle over the bed
+        sweep_frames = min(times[-1] / seconds_per_frame, seconds / seconds_per_frame)
+        approach_end = end_frame - math.ceil(sweep_frames)
+        animate_robot_move(robot, (centers[0][0], centers[0][1], 0), (start_frame, approach_end), headings[0])
+        animate_robot_toolpath(robot, centers, headings, approach_end + times / times[-1] * sweep_frames)
+    else:
+        # Robot moves to center of garden
+        bpy.context.scene.frame_set(mid_frame)
+        robot.location = (0, 0, 0)
+        robot.rotation_euler = (0, 0, math.radians(45))
+        set_keyframe(robot, "location", mid_frame)
+        set_keyframe(robot, "rotation_euler", mid_frame)
     
     # Return to start frame
     bpy.context.scene.frame_set(start_frame)
\ No newline at end of file
@@ -1,6 +1,6 @@
 import bpy
 import math
-from utils.keyframe_utils import set_keyframe
+from animation.robot_motion import animate_robot_move
 
 def animate_planning_phase(robot, frame_range):
     """Animate the planning phase"""
@@ -10,12 +10,8 @@ def animate_planning_phase(robot, frame_range):
     bpy.context.scene.frame_set(start_frame)
     # Robot position already set by scan phase
     
-    # Move robot to start position of garden
-    bpy.context.scene.frame_set(end_frame)
-    robot.location = (-2, 2, 0)
-    robot.rotation_euler = (0, 0, math.radians(-45))
-    set_keyframe(robot, "location", end_frame)
-    set_keyframe(robot, "rotation_euler", end_frame)
+    # Drive around obstacles to the start position of the garden
+    animate_robot_move(robot, (-2, 2, 0), frame_range, math.radians(-45))
     
     # Return to start frame
     bpy.context.scene.frame_set(start_frame)
\ No newline at end of file
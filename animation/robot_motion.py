@@ -0,0 +1,138 @@
+import bpy
+import math
+import numpy as np
+from config import PLANNER_SETTINGS, TERRAIN_FOLLOW_SETTINGS, ROBOT_DIMENSIONS, ROBOT_MOTION_SETTINGS
+from utils.keyframe_utils import set_keyframe, set_keyframes, evaluate_fcurve, evaluate_channels
+from utils.path_planning import plan_path
+from utils.terrain_sampling import get_terrain_height_grid, sample_heights
+
+def get_heading(direction):
+    """Z rotation that points the robot's tracks (local +Y) along an XY direction"""
+    return math.atan2(direction[1], direction[0]) - math.pi / 2
+
+def _unwrap_angle(angle, reference):
+    """Equivalent angle closest to a reference, so the robot never spins the long way round"""
+    return reference + (angle - reference + math.pi) % (2 * math.pi) - math.pi
+
+def animate_robot_move(robot, goal, frame_range, goal_heading=None):
+    """Key the robot driving around obstacles from where it is at the first frame to a goal"""
+    start_frame, end_frame = frame_range
+    # Pose read from the F-curves, no scene evaluation needed
+    start = evaluate_channels(robot, "location", start_frame)
+    goal = np.asarray(goal, dtype=np.float64)
+    rotation = evaluate_channels(robot, "rotation_euler", start_frame)
+    heading = rotation[2]
+    robot.location = start
+    robot.rotation_euler = rotation
+
+    # Hold the current pose until the move begins
+    set_keyframe(robot, "location", start_frame, 'LINEAR')
+    set_keyframe(robot, "rotation_euler", start_frame, 'LINEAR')
+
+    if PLANNER_SETTINGS["enabled"]:
+        waypoints = plan_path(start, goal)
+    else:
+        waypoints = np.array([start[:2], goal[:2]])
+
+    # Constant speed along the path: time proportional to distance
+    segments = np.diff(waypoints, axis=0)
+    distance = np.concatenate(([0.0], np.cumsum(np.linalg.norm(segments, axis=1))))
+    progress = distance / distance[-1] if distance[-1] > 0 else np.linspace(0.0, 1.0, len(waypoints))
+    # Eighths of a frame are exact in the float32 keyframe times set_keyframe compares against
+    frames = np.round((start_frame + progress * (end_frame - start_frame)) * 8) / 8
+    heights = start[2] + progress * (goal[2] - start[2])
+
+    for i in range(1, len(waypoints)):
+        last = i == len(waypoints) - 1
+        if last and goal_heading is not None:
+            heading = _unwrap_angle(goal_heading, heading)
+        elif np.linalg.norm(segments[i - 1]) > 1e-6:
+            # Arrive facing along the leg just driven
+            heading = _unwrap_angle(get_heading(segments[i - 1]), heading)
+
+        robot.location = (waypoints[i][0], waypoints[i][1], heights[i])
+        robot.rotation_euler = (0, 0, heading)
+        interpolation = 'BEZIER' if last else 'LINEAR'
+        set_keyframe(robot, "location", frames[i], interpolation)
+        set_keyframe(robot, "rotation_euler", frames[i], interpolation)
+
+    return waypoints
+
+def get_toolpath_poses(toolpath, tool_offset=0.0):
+    """Robot centers (N, 2) and headings (N,) that put a tool offset to its left on every toolpath point"""
+    passes = toolpath.reshape(-1, 2, 2)
+    direction = passes[:, 1] - passes[:, 0]
+    length = np.maximum(np.linalg.norm(direction, axis=1, keepdims=True), 1e-9)
+    left = np.column_stack((-direction[:, 1], direction[:, 0])) / length
+    
+    centers = (passes - left[:, None, :] * tool_offset).reshape(-1, 2)
+    headings = np.repeat(np.arctan2(direction[:, 1], direction[:, 0]) - np.pi / 2, 2)
+    return centers, np.unwrap(headings)
+
+def get_toolpath_times(centers, headings, nozzle_speed, turn_time):
+    """Robot seconds at every toolpath pose: driven at nozzle speed, with a U-turn onto every next pass"""
+    durations = np.linalg.norm(np.diff(centers, axis=0), axis=1) / nozzle_speed
+    
+    # Every second step leaves one pass for the next: a U-turn of at least
+    # turn_time, no faster than the robot may turn
+    turning = np.degrees(np.abs(np.diff(headings)))[1::2]
+    turn_times = np.maximum(turn_time, turning / ROBOT_MOTION_SETTINGS["max_turn_rate"])
+    durations[1::2] = np.maximum(durations[1::2], turn_times)
+    return np.concatenate(([0.0], np.cumsum(durations)))
+
+def animate_robot_toolpath(robot, centers, headings, frames):
+    """Key the robot through many poses at the given frames, written to the F-curves in bulk"""
+    # Drop poses reached in no time so keyframe times strictly increase
+    frames = np.asarray(frames, dtype=np.float64)
+    keep = np.concatenate(([True], np.diff(frames) > 1e-6))
+    centers, headings, frames = centers[keep], headings[keep], frames[keep]
+    
+    # Turn whole revolutions so the first pose matches the current heading
+    current = evaluate_fcurve(robot, "rotation_euler", 2, [frames[0]], robot.rotation_euler.z)[0]
+    headings = headings + 2 * math.pi * round((current - headings[0]) / (2 * math.pi))
+    
+    zeros = np.zeros(len(centers))
+    set_keyframes(robot, "location", frames, np.column_stack((centers, zeros)))
+    set_keyframes(robot, "rotation_euler", frames, np.column_stack((zeros, zeros, headings)))
+
+def solve_terrain_poses(height_grid, positions, headings):
+    """Height, pitch and roll per pose that rest the robot's four track corners on the terrain"""
+    tracks = ROBOT_DIMENSIONS["tracks"]
+    half_width = tracks["offset"]
+    half_length = tracks["length"] / 2
+    
+    # Track corners in robot space (forward is +Y): front left, front right, rear left, rear right
+    corners = np.array([(-half_width, half_length), (half_width, half_length),
+                        (-half_width, -half_length), (half_width, -half_length)])
+    cos_h = np.cos(headings)[:, None]
+    sin_h = np.sin(headings)[:, None]
+    world = np.stack((corners[:, 0] * cos_h - corners[:, 1] * sin_h,
+                      corners[:, 0] * sin_h + corners[:, 1] * cos_h), axis=-1) + positions[:, None, :]
+    
+    # One call for all corners of all frames
+    h = sample_heights(height_grid, world)
+    front = (h[:, 0] + h[:, 1]) / 2
+    rear = (h[:, 2] + h[:, 3]) / 2
+    left = (h[:, 0] + h[:, 2]) / 2
+    right = (h[:, 1] + h[:, 3]) / 2
+    
+    # Positive X rotation lifts the front, positive Y rotation lowers the right side
+    pitch = np.arctan2(front - rear, 2 * half_length)
+    roll = np.arctan2(left - right, 2 * half_width)
+    return h.mean(axis=1), pitch, roll
+
+def apply_terrain_following(robot, terrain, frame_range):
+    """Rewrite the robot's height, pitch and roll on every frame so it drives on the terrain"""
+    start_frame, end_frame = frame_range
+    frames = np.arange(start_frame, end_frame + 1)
+    
+    # Whole 2D trajectory as keyed by the phases
+    x = evaluate_fcurve(robot, "location", 0, frames, robot.location.x)
+    y = evaluate_fcurve(robot, "location", 1, frames, robot.location.y)
+    headings = evaluate_fcurve(robot, "rotation_euler", 2, frames, robot.rotation_euler.z)
+    
+    height_grid = get_terrain_height_grid(terrain, TERRAIN_FOLLOW_SETTINGS["cell_size"])
+    z, pitch, roll = solve_terrain_poses(height_grid, np.column_stack((x, y)), headings)
+    
+    set_keyframes(robot, "location", frames, z + TERRAIN_FOLLOW_SETTINGS["ground_offset"], first_index=2)
+    set_keyframes(robot, "rotation_euler", frames, np.column_stack((pitch, roll)), first_index=0)
@@ -1,18 +1,60 @@
 import bpy
 import math
-from utils.keyframe_utils import set_keyframe
+import numpy as np
+from config import SCAN_CLOUD_SETTINGS
+from models.effects import NEVER_CAPTURED
+from utils.keyframe_utils import set_keyframe, set_keyframes, evaluate_fcurve
+from utils.scene_registry import get_part
 
-def animate_scan_phase(robot, scan_effect, frame_range):
+def assign_capture_frames(scan_cloud, robot, scanner_head, frame_range):
+    """Store per point the frame at which the rotating scanner first sweeps over it within range"""
+    start_frame, end_frame = frame_range
+    frames = np.arange(start_frame, end_frame + 2)
+    
+    count = len(scan_cloud.data.vertices)
+    points = np.empty(count * 3, dtype=np.float32)
+    scan_cloud.data.vertices.foreach_get("co", points)
+    points = points.reshape(-1, 3)[:, :2]
+    
+    # Robot path and absolute scanner heading, read from the keyframes just set
+    robot_x = evaluate_fcurve(robot, "location", 0, frames)
+    robot_y = evaluate_fcurve(robot, "location", 1, frames)
+    heading = evaluate_fcurve(robot, "rotation_euler", 2, frames)
+    if scanner_head:
+        heading = heading + evaluate_fcurve(scanner_head, "rotation_euler", 2, frames)
+    
+    radius = SCAN_CLOUD_SETTINGS["scan_radius"]
+    capture = np.full(count, NEVER_CAPTURED, dtype=np.float32)
+    for i, frame in enumerate(frames[:-1]):
+        waiting = capture == NEVER_CAPTURED
+        offset = points[waiting] - (robot_x[i], robot_y[i])
+        in_range = np.einsum('ij,ij->i', offset, offset) <= radius * radius
+        
+        # Without a scanner head the whole range is captured at once
+        if scanner_head:
+            sweep = heading[i + 1] - heading[i]
+            bearing = np.arctan2(offset[:, 1], offset[:, 0])
+            if abs(sweep) < 2.0 * math.pi:
+                swept = np.mod((bearing - heading[i]) * np.sign(sweep), 2.0 * math.pi) <= abs(sweep)
+                in_range &= swept
+        
+        indices = np.flatnonzero(waiting)[in_range]
+        capture[indices] = frame
+    
+    scan_cloud.data.attributes["capture_frame"].data.foreach_set("value", capture)
+    scan_cloud.data.update()
+    
+    captured = int((capture != NEVER_CAPTURED).sum())
+    print(f"Scan point cloud: {captured} of {count} points captured")
+    return capture
+
+def animate_scan_phase(robot, scan_effect, frame_range, scan_cloud=None):
     """Animate the scanning phase"""
     start_frame, end_frame = frame_range
     mid_frame = start_frame + (end_frame - start_frame) // 2
     
     # Get scanner head object
-    scanner_head = None
-    for obj in bpy.data.objects:
-        if obj.name == "ScannerHead":
-            scanner_head = obj
-            break
+    scanner_head = get_part(robot, "scanner_head")
     
     # Set initial robot position
     bpy.context.scene.frame_set(start_frame)
@@ -20,18 +62,19 @@ def animate_scan_phase(robot, scan_effect, frame_range):
     robot.location = (-3, 0, 0)
     set_keyframe(robot, "location", start_frame)
     
-    # Show scan effect
-    scan_effect.hide_viewport = False
-    scan_effect.hide_render = False
-    set_keyframe(scan_effect, "hide_viewport", start_frame)
-    set_keyframe(scan_effect, "hide_render", start_frame)
+    # Show the scan effect, or the point cloud building up if there is one
+    # (neither is built when no scan frame is rendered)
+    scan_visual = scan_cloud if scan_cloud else scan_effect
+    if scan_visual:
+        scan_visual.hide_viewport = False
+        scan_visual.hide_render = False
+        set_keyframe(scan_visual, "hide_viewport", start_frame)
+        set_keyframe(scan_visual, "hide_render", start_frame)
     
-    # Scanner head rotation
+    # Scanner head turns once around at constant speed
     if scanner_head:
-        for i in range(start_frame, end_frame + 1, 5):
-            frame_progress = (i - start_frame) / (end_frame - start_frame)
-            scanner_head.rotation_euler = (0, 0, math.radians(frame_progress * 360))
-            set_keyframe(scanner_head, "rotation_euler", i)
+        set_keyframes(scanner_head, "rotation_euler", [start_frame, end_frame],
+                      [(0, 0, 0), (0, 0, 2 * math.pi)])
     
     # Robot moves during scanning
     bpy.context.scene.frame_set(mid_frame)
@@ -42,11 +85,16 @@ def animate_scan_phase(robot, scan_effect, frame_range):
     robot.location = (1, 0, 0)
     set_keyframe(robot, "location", end_frame)
     
+    # Points are revealed by their capture frame, no per-frame geometry
+    if scan_cloud:
+        assign_capture_frames(scan_cloud, robot, scanner_head, frame_range)
+    
     # Hide scan effect at end of scanning
-    scan_effect.hide_viewport = True
-    scan_effect.hide_render = True
-    set_keyframe(scan_effect, "hide_viewport", end_frame)
-    set_keyframe(scan_effect, "hide_render", end_frame)
+    if scan_visual:
+        scan_visual.hide_viewport = True
+        scan_visual.hide_render = True
+        set_keyframe(scan_visual, "hide_viewport", end_frame)
+        set_keyframe(scan_visual, "hide_render", end_frame)
     
     # Return to start frame
     bpy.context.scene.frame_set(start_frame)
\ No newline at end of file
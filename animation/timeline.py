@@ -0,0 +1,113 @@
+import bpy
+import json
+import numpy as np
+from config import ANIMATION_FRAMES
+
+# Mesh attributes holding frame numbers (per point or face reveal frames),
+# which move with the keyframes when a scene is retimed
+FRAME_ATTRIBUTES = ("capture_frame", "deposit_frame", "fill_frame")
+
+def compile_timeline(duration_scale=1.0, phases=None):
+    """Back-to-back frame ranges of all phases with their lengths scaled"""
+    phases = phases or ANIMATION_FRAMES
+    frame_ranges = {}
+    next_start = 1
+    for phase, (start, end) in phases.items():
+        length = max(1, int((end - start + 1) * duration_scale))
+        frame_ranges[phase] = (next_start, next_start + length - 1)
+        next_start += length
+    return frame_ranges
+
+def get_phase_scale(frame_ranges, phase):
+    """How much longer a phase runs than in the base timing of ANIMATION_FRAMES"""
+    start, end = frame_ranges[phase]
+    base_start, base_end = ANIMATION_FRAMES[phase]
+    return (end - start + 1) / (base_end - base_start + 1)
+
+def get_phase_frame(frame_ranges, phase, offset, anchor="start"):
+    """Frame a base-timing offset away from a phase's start (or back from its end), scaled with the phase"""
+    start, end = frame_ranges[phase]
+    scaled = int(round(offset * get_phase_scale(frame_ranges, phase)))
+    return start + scaled if anchor == "start" else end - scaled
+
+def scale_duration(frame_ranges, phase, frames):
+    """Length in frames of a base-timing duration inside a phase"""
+    return max(1, int(round(frames * get_phase_scale(frame_ranges, phase))))
+
+def get_timeline_knots(frame_ranges):
+    """Phase boundaries in timeline order, used to map frames phase by phase"""
+    ranges = sorted(frame_ranges.values())
+    knots = np.array([start for start, _ in ranges] + [ranges[-1][1] + 1], dtype=np.float64)
+    if np.any(np.diff(knots) <= 0):
+        raise ValueError(f"Phases overlap, cannot retime: {frame_ranges}")
+    return knots
+
+def map_frames(frames, old_ranges, new_ranges):
+    """Move frames from one timeline to another, stretching each phase linearly"""
+    old = get_timeline_knots(old_ranges)
+    new = get_timeline_knots(new_ranges)
+    frames = np.asarray(frames, dtype=np.float64)
+    # Before the first and after the last phase frames only shift
+    mapped = np.interp(frames, old, new)
+    mapped = np.where(frames < old[0], frames + new[0] - old[0], mapped)
+    return np.where(frames > old[-1], frames + new[-1] - old[-1], mapped)
+
+def retime_actions(old_ranges, new_ranges, actions=None):
+    """Rescale the keyframe times and handles of every action in bulk; returns the keys moved"""
+    actions = bpy.data.actions if actions is None else actions
+    moved = 0
+    for action in actions:
+        for fcurve in action.fcurves:
+            points = fcurve.keyframe_points
+            count = len(points)
+            for name in ("co", "handle_left", "handle_right"):
+                values = np.empty(count * 2, dtype=np.float32)
+                points.foreach_get(name, values)
+                values[0::2] = map_frames(values[0::2], old_ranges, new_ranges)
+                points.foreach_set(name, values)
+            for modifier in fcurve.modifiers:
+                if modifier.use_restricted_range:
+                    modifier.frame_start, modifier.frame_end = map_frames(
+                        [modifier.frame_start, modifier.frame_end], old_ranges, new_ranges)
+            fcurve.update()
+            moved += count
+    return moved
+
+def retime_frame_attributes(old_ranges, new_ranges):
+    """Remap the reveal frames stored on meshes, so printed and scanned geometry keeps pace"""
+    for mesh in bpy.data.meshes:
+        for name in FRAME_ATTRIBUTES:
+            attribute = mesh.attributes.get(name)
+            if attribute is None:
+                continue
+            values = np.empty(len(attribute.data), dtype=np.float32)
+            attribute.data.foreach_get("value", values)
+            attribute.data.foreach_set("value", map_frames(values, old_ranges, new_ranges).astype(np.float32))
+            mesh.update()
+
+def store_timeline(frame_ranges, scene=None):
+    """Remember the frame ranges a scene was built with, so it can be retimed later"""
+    scene = scene or bpy.context.scene
+    scene["timeline"] = json.dumps(frame_ranges)
+
+def get_stored_timeline(scene=None):
+    """Frame ranges a scene was built with; the base timing for scenes built before they were stored"""
+    scene = scene or bpy.context.scene
+    if "timeline" not in scene:
+        return dict(ANIMATION_FRAMES)
+    return {phase: tuple(frame_range) for phase, frame_range in json.loads(scene["timeline"]).items()}
+
+def retime_scene(frame_ranges, scene=None):
+    """Give an already built scene new phase timings without rebuilding it"""
+    scene = scene or bpy.context.scene
+    old_ranges = get_stored_timeline(scene)
+    moved = retime_actions(old_ranges, frame_ranges)
+    retime_frame_attributes(old_ranges, frame_ranges)
+
+    first = min(start for start, _ in frame_ranges.values())
+    last = max(end for _, end in frame_ranges.values())
+    scene.frame_start = first
+    scene.frame_end = last
+    store_timeline(frame_ranges, scene)
+    print(f"Retimed {moved} keyframes to {last - first + 1} frames")
+    return frame_ranges
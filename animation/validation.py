@@ -0,0 +1,178 @@
+import bpy
+import time
+import numpy as np
+from config import ANIMATION_FRAMES, VALIDATION_SETTINGS, PLANNER_SETTINGS, ROBOT_MOTION_SETTINGS
+from animation.tube_interaction import CARRY_CONSTRAINT
+from utils.keyframe_utils import evaluate_matrix_world
+from utils.path_planning import get_occupancy_grid, get_robot_footprint_radius
+
+def sample_action(action, frames):
+    """Values of every F-curve of an action at the given frames, keyed by (data path, index)"""
+    return {(fc.data_path, fc.array_index): np.fromiter((fc.evaluate(f) for f in frames), np.float64, len(frames))
+            for fc in action.fcurves}
+
+def _get_channels(obj, curves, data_path, count):
+    """Sampled vector property (samples, count), its current value where a channel is not animated"""
+    current = getattr(obj, data_path)
+    length = len(next(iter(curves.values())))
+    return np.column_stack([curves.get((data_path, i), np.full(length, current[i])) for i in range(count)])
+
+def _get_spans(frames, mask):
+    """First and last frame of every run of samples where a mask is set"""
+    if not mask.any():
+        return []
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1) - 1
+    return [(float(frames[a]), float(frames[b])) for a, b in zip(starts, ends)]
+
+def _add_issues(issues, severity, kind, name, frames, values, limit):
+    """Record one issue per run of samples whose values exceed a limit"""
+    mask = values > limit
+    for first, last in _get_spans(frames, mask):
+        span = (frames >= first) & (frames <= last) & mask
+        issues.append({"severity": severity, "kind": kind, "object": name, "frames": (first, last),
+                       "value": float(values[span].max()), "limit": float(limit)})
+
+def check_phase_overlaps(frame_ranges):
+    """Phases that start before the previous one has ended, or end before they start"""
+    issues = []
+    phases = sorted(frame_ranges.items(), key=lambda item: item[1][0])
+    for name, (start, end) in phases:
+        if end < start:
+            issues.append({"severity": "error", "kind": "empty_phase", "object": name, "frames": (start, end),
+                           "value": end - start, "limit": 0})
+    for (previous, (_, previous_end)), (name, (start, end)) in zip(phases, phases[1:]):
+        if start <= previous_end:
+            issues.append({"severity": "error", "kind": "phase_overlap", "object": f"{previous}/{name}",
+                           "frames": (start, min(previous_end, end)), "value": previous_end - start + 1, "limit": 0})
+    return issues
+
+def check_robot_motion(robot, frames, location, rotation, fps, scene):
+    """Speed, acceleration, turn rate and obstacle contact of the robot along its sampled trajectory"""
+    issues = []
+    limits = ROBOT_MOTION_SETTINGS
+    # The limits hold in robot time, of which every second of animation shows time_lapse seconds
+    fps = fps / limits["time_lapse"]
+    dt = (frames[1] - frames[0]) / fps
+
+    # Speeds between samples, attributed to the later sample
+    speed = np.linalg.norm(np.diff(location[:, :2], axis=0), axis=1) / dt
+    _add_issues(issues, "error", "speed", robot.name, frames[1:], speed, limits["max_speed"])
+    turn_rate = np.degrees(np.abs(np.diff(rotation[:, 2]))) / dt
+    _add_issues(issues, "error", "turn_rate", robot.name, frames[1:], turn_rate, limits["max_turn_rate"])
+
+    # Acceleration over whole frames, so the corners of linear paths don't count as infinite
+    samples = VALIDATION_SETTINGS["samples_per_frame"]
+    whole = location[::samples, :2]
+    if len(whole) > 2:
+        frame_speed = np.linalg.norm(np.diff(whole, axis=0), axis=1) * fps
+        acceleration = np.abs(np.diff(frame_speed)) * fps
+        _add_issues(issues, "warning", "acceleration", robot.name, frames[::samples][1:-1], acceleration,
+                    limits["max_acceleration"])
+
+    # Contact with the rasterized obstacle footprints (the planner's margin is not a collision)
+    grid = get_occupancy_grid(scene)
+    rows, cols = grid["occupied"].shape
+    cells = np.floor((location[:, :2] - grid["origin"]) / grid["cell_size"]).astype(np.int64)
+    inside = (cells[:, 0] >= 0) & (cells[:, 0] < cols) & (cells[:, 1] >= 0) & (cells[:, 1] < rows)
+    clearance = np.full(len(frames), np.inf)
+    clearance[inside] = grid["distance"][cells[inside, 1], cells[inside, 0]]
+    contact = get_robot_footprint_radius() - PLANNER_SETTINGS["safety_margin"]
+    _add_issues(issues, "error", "collision", robot.name, frames, contact - clearance, 0.0)
+    return issues
+
+def check_plug_carry(plug, robot, frames, influence, dt):
+    """Carried plug jumping onto or sliding over the robot, from its world position while the carry is on"""
+    issues = []
+    carried = np.flatnonzero(influence > 0.0)
+    if not len(carried):
+        return issues
+    # The sample before each carried span shows the pick-up
+    samples = np.union1d(carried, np.maximum(carried - 1, 0))
+
+    constraint = plug.constraints[CARRY_CONSTRAINT]
+    parent = plug.parent.matrix_world @ plug.matrix_parent_inverse if plug.parent else None
+    world = []
+    relative = []
+    for i in samples:
+        robot_matrix = evaluate_matrix_world(robot, frames[i])
+        own = evaluate_matrix_world(plug, frames[i])
+        if parent is not None:
+            own = parent @ own
+        # Child Of: the robot's motion since the attach frame, blended in by the influence
+        carried_position = (robot_matrix @ constraint.inverse_matrix @ own).translation
+        position = own.translation.lerp(carried_position, influence[i])
+        world.append(np.array(position))
+        relative.append(np.array(robot_matrix.inverted() @ position))
+
+    # The pick-up must not jump in the world; once on, the plug moves with the robot
+    # apart from its own slow slide in and out of the tube
+    world, relative = np.array(world), np.array(relative)
+    picked_up = influence[samples[:-1]] <= 0.0
+    moved = np.where(picked_up[:, None], np.diff(world, axis=0), np.diff(relative, axis=0))
+    neighbours = np.diff(samples) == 1
+    speed = np.linalg.norm(moved, axis=1)[neighbours] / dt
+    _add_issues(issues, "error", "plug_drift", plug.name, frames[samples[1:][neighbours]], speed,
+                VALIDATION_SETTINGS["plug_drift_speed"])
+    return issues
+
+def validate_animation(frame_ranges=None, robot=None, scene=None):
+    """Check every F-curve of the scene for jumps, invalid values, robot limits, carried plugs, collisions and phase overlaps"""
+    started = time.perf_counter()
+    scene = scene or bpy.context.scene
+    issues = check_phase_overlaps(frame_ranges or ANIMATION_FRAMES)
+
+    fps = scene.render.fps / scene.render.fps_base
+    step = 1.0 / VALIDATION_SETTINGS["samples_per_frame"]
+    frames = np.arange(scene.frame_start, scene.frame_end + step / 2, step)
+    dt = step / fps
+
+    curve_count = 0
+    for obj in scene.objects:
+        action = obj.animation_data.action if obj.animation_data else None
+        if action is None or not len(action.fcurves):
+            continue
+        curves = sample_action(action, frames)
+        curve_count += len(curves)
+
+        for (data_path, index), values in curves.items():
+            invalid = ~np.isfinite(values)
+            if invalid.any():
+                first, last = _get_spans(frames, invalid)[0]
+                issues.append({"severity": "error", "kind": "invalid_value", "object": f"{obj.name}.{data_path}[{index}]",
+                               "frames": (first, last), "value": float("nan"), "limit": 0})
+
+        # The robot is held to its own limits; anything else moving faster
+        # than a plausible motion has jumped
+        location = _get_channels(obj, curves, "location", 3)
+        if obj == robot:
+            rotation = _get_channels(obj, curves, "rotation_euler", 3)
+            issues.extend(check_robot_motion(robot, frames, location, rotation, fps, scene))
+            continue
+        speed = np.linalg.norm(np.diff(location, axis=0), axis=1) / dt
+        _add_issues(issues, "error", "teleport", obj.name, frames[1:], speed, VALIDATION_SETTINGS["teleport_speed"])
+
+        # A plug carried by its Child Of constraint moves with the robot, not its own F-curves
+        influence = curves.get((f'constraints["{CARRY_CONSTRAINT}"].influence', 0))
+        if robot is not None and influence is not None and CARRY_CONSTRAINT in obj.constraints:
+            issues.extend(check_plug_carry(obj, robot, frames, influence, dt))
+
+    print(f"Validated {curve_count} F-curves over {len(frames)} samples in {time.perf_counter() - started:.2f}s")
+    return issues
+
+def has_errors(issues):
+    """Whether any issue should stop a render"""
+    return any(issue["severity"] == "error" for issue in issues)
+
+def print_validation_report(issues):
+    """Print issues grouped by severity, one line each"""
+    if not issues:
+        print("Animation check passed")
+        return
+    for issue in sorted(issues, key=lambda i: (i["severity"] != "error", i["frames"][0])):
+        first, last = issue["frames"]
+        print(f"{issue['severity'].upper()} {issue['kind']} {issue['object']} frames {first:g}-{last:g}: "
+              f"{issue['value']:.2f} (limit {issue['limit']:.2f})")
+    errors = sum(issue["severity"] == "error" for issue in issues)
+    print(f"Animation check found {errors} errors and {len(issues) - errors} warnings")
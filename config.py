@@ -30,7 +30,8 @@ ROBOT_DIMENSIONS = {
     "tracks": {
         "width": 0.2,
         "length": 1.2,
-        "height": 0.15
+        "height": 0.15,
+        "offset": 0.8      # Distance of each track's center line from the robot center
     },
     "body": {
         "width": 1.2,
@@ -63,6 +64,56 @@ TERRAIN_SETTINGS = {
     "grass_length": 0.2
 }
 
+# Terrain from scanned point clouds (PLY/XYZ/NPY)
+POINT_CLOUD_SETTINGS = {
+    "chunk_size": 5000000,   # Points processed at a time, bounds memory for huge scans
+    "voxel_size": 0.02,      # Points are averaged per voxel of this size (meters)
+    "cell_size": 0.1,        # Heightfield grid spacing (meters)
+    "height_mode": "min",    # Height per cell: min (ground under vegetation), mean or max
+    "fill_iterations": 50,   # Neighbor passes used to fill cells without points
+    "recenter": True         # Move the scan center to the scene origin
+}
+
+# Progressive point cloud shown while the robot scans
+SCAN_CLOUD_SETTINGS = {
+    "enabled": True,
+    "point_count": 500000,   # Scales to millions; only an attribute and a GN filter per point
+    "point_radius": 0.008,
+    "noise": 0.005,          # Simulated range noise (meters)
+    "scan_radius": 4.0,      # Scanner range around the robot
+    "fade_frames": 8.0,      # Fresh points glow for this many frames
+    "seed": 0
+}
+
+# Geometry Nodes grass (camera-culled instancing)
+GRASS_SETTINGS = {
+    "use_geometry_nodes": True,
+    "max_density": 250.0,           # Blades per square meter at full GrassArea weight
+    "frustum_margin": 0.1,          # Widen the view by this fraction before culling
+    "frustum_margin_distance": 0.5, # Extra margin in meters around the frustum
+    "near_distance": 4.0,           # Full density up to this camera distance
+    "far_distance": 25.0,           # Density reaches min_density_factor here
+    "min_density_factor": 0.05,
+    "lod_distance": 8.0,            # Low-detail blades beyond this camera distance
+    "blade_length": 0.3,
+    "seed": 0
+}
+
+# Level-of-detail selection (thresholds are projected size as a fraction of frame height)
+LOD_SETTINGS = {
+    "enabled": True,
+    "robot_thresholds": [0.15, 0.05],   # Below these sizes switch to LOD1, then LOD2
+    "plant_thresholds": [0.03],
+    "terrain_thresholds": [0.5],
+    "hysteresis": 0.15,                 # Switch only when 15% past a threshold
+    "min_hold_frames": 6,               # Keep a level at least this many frames
+    "max_fade_frames": 12,              # Longest cross-fade between two levels
+    "proxy_min_size": 0.15,             # Parts smaller than this are left out of the robot levels
+    "robot_decimate_ratios": [0.3, 0.08],
+    "plant_decimate_ratio": 0.2,
+    "terrain_decimate_ratio": 0.25
+}
+
 # Garden path settings
 GARDEN_PATH_SETTINGS = {
     "bevel_depth": 0.05,
@@ -75,6 +126,72 @@ GARDEN_PATH_SETTINGS = {
     ]
 }
 
+# Printed border built once as a mesh and revealed per face by the shader
+BORDER_MESH_SETTINGS = {
+    "enabled": True,
+    "sample_spacing": 0.02,   # Arc-length spacing of the sweep (meters)
+    "width": 0.15,            # Bead width
+    "layer_height": 0.06,     # Height of one printed layer
+    "layer_count": 3,
+    "profile_segments": 8     # Faces around the half-round bead profile
+}
+
+# Soil fill built from the triangulated bed outline, one mesh layer per fill pass
+SOIL_FILL_SETTINGS = {
+    "enabled": True,
+    "sample_spacing": 0.02,     # Outline point spacing (meters)
+    "inset": 0.075,             # Pull the outline in to the inner face of the border
+    "layer_height": 0.035,
+    "layer_count": 4,
+    "toolpath": True,           # Sweep the nozzle over the whole bed instead of parking in it
+    "nozzle_width": 0.08,       # Width of soil laid down by one pass
+    "pass_overlap": 0.1,        # Fraction of the nozzle width neighboring passes share
+    "sweep_angle": None,        # Pass direction in degrees; None picks the one with fewest passes
+    "nozzle_offset": 0.3,       # Nozzle distance to the left of the robot center
+    "nozzle_speed": 1.0,        # Robot speed along a pass while the nozzle lays soil (m/s)
+    "turn_time": 1.5,           # Shortest robot time for the U-turn onto the next pass (seconds)
+    "approach_fraction": 0.15   # Least share of the filling phase spent driving to the first pass
+}
+
+# Robot trajectory planning around obstacles (occupancy grid + A*)
+PLANNER_SETTINGS = {
+    "enabled": True,
+    "cell_size": 0.1,             # Occupancy grid spacing (meters)
+    "clearance_height": 1.0,      # Geometry higher than this passes over the robot
+    "safety_margin": 0.1,         # Extra distance kept from obstacles beyond the footprint
+    "bounds_padding": 2.0         # Grid reaches this far past the terrain and obstacles
+}
+
+# Robot resting on the terrain (height, pitch and roll from the ground under its tracks)
+TERRAIN_FOLLOW_SETTINGS = {
+    "enabled": True,
+    "cell_size": 0.05,      # Spacing of the height grid sampled from the terrain mesh
+    "ground_offset": 0.0    # Raise the robot origin above the ground plane under its tracks
+}
+
+# The robot in robot time: the animation is a time-lapse of the job
+ROBOT_MOTION_SETTINGS = {
+    "time_lapse": 20.0,         # Robot seconds shown per second of animation
+    "max_speed": 2.0,           # Driving speed limit (m/s)
+    "max_acceleration": 6.0,    # Speed change limit (m/s^2), reported as a warning
+    "max_turn_rate": 180.0      # Turning speed limit (degrees per second)
+}
+
+# Animation checks run from the keyframes before rendering; errors stop the render
+VALIDATION_SETTINGS = {
+    "enabled": True,
+    "samples_per_frame": 4,     # F-curve samples per frame, so jumps between frames are caught
+    "teleport_speed": 20.0,     # Any other object moving faster than this (m/s of animation) has jumped
+    "plug_drift_speed": 5.0     # A carried plug moving faster than this (m/s of animation) over the robot has slipped
+}
+
+# Post-pass that shrinks actions once every phase is keyed
+KEYFRAME_REDUCTION_SETTINGS = {
+    "enabled": True,
+    "tolerance": 0.0001,   # Largest change in value a removed keyframe may cause
+    "min_cycles": 2        # Repeats needed before a pattern becomes a Cycles modifier
+}
+
 # Material color settings
 MATERIAL_COLORS = {
     "metal_dark": (0.1, 0.1, 0.1, 1.0),
@@ -89,6 +206,112 @@ MATERIAL_COLORS = {
     "scan_effect": (1.0, 0.1, 0.1, 1.0)
 }
 
+# Border material variants selectable with --border-material
+BORDER_MATERIALS = {
+    "concrete": {"color": (0.7, 0.7, 0.7, 1.0), "roughness": 0.9, "metallic": 0.0},
+    "clay": {"color": (0.65, 0.45, 0.31, 1.0), "roughness": 0.8, "metallic": 0.0},
+    "stone": {"color": (0.5, 0.5, 0.5, 1.0), "roughness": 0.7, "metallic": 0.1},
+    "wood": {"color": (0.55, 0.35, 0.15, 1.0), "roughness": 0.6, "metallic": 0.0},
+    # Pigmented concrete: same surface as concrete, so --variants recolors these from the concrete passes
+    "concrete_charcoal": {"color": (0.22, 0.22, 0.23, 1.0), "roughness": 0.9, "metallic": 0.0},
+    "concrete_sand": {"color": (0.76, 0.68, 0.52, 1.0), "roughness": 0.9, "metallic": 0.0},
+    "concrete_terracotta": {"color": (0.62, 0.36, 0.26, 1.0), "roughness": 0.9, "metallic": 0.0}
+}
+
+# Render-once border variants (recolored from render passes)
+VARIANT_SETTINGS = {
+    "border_pass_index": 7,       # Object index written for the border in the IndexOB pass
+    "region_padding": 8,          # Pixels added around the border when re-rendering a region
+    "roughness_tolerance": 0.0,   # Variants within these tolerances count as color-only
+    "metallic_tolerance": 0.0,
+    "exr_codec": 'ZIP'            # Must be NONE, ZIPS or ZIP to be read back by rendering.exr_io
+}
+
+# Differential rendering against a cached base render
+DIFF_RENDER_SETTINGS = {
+    "region_padding": 16,                    # Pixels added around dirty regions for shadows and AA
+    "snapshot_file": "scene_snapshot.json"   # Object signatures and screen rectangles of a render
+}
+
+# Shared cache of rendered frames, keyed by the config fields each frame depends on
+FRAME_CACHE_SETTINGS = {
+    "cache_dir": "//frame_cache/",
+    "version": 1   # Bump when scene building changes, to invalidate old frames
+}
+
+# Per-frame render telemetry (JSON Lines per worker, merged per job)
+TELEMETRY_SETTINGS = {
+    "file_prefix": "render_telemetry",   # Worker files are <prefix>_<host>-<pid>.jsonl in the output directory
+    "eta_window": 10,                    # Recent frames averaged for the ETA
+    "prometheus_file": None              # node-exporter textfile (.prom) to update after every frame
+}
+
+# Render time regression used to hand out frames longest-first
+COST_MODEL_SETTINGS = {
+    "model_file": "//render_cost_model.json",   # Recorded frame times and fitted weights
+    "feature_step": 1,                # Evaluate frame features every n frames and interpolate between
+    "min_records": 8,                 # Timed frames needed before the regression replaces the heuristic
+    "max_records": 2000,              # Only the most recent frames are fit
+    "ridge": 1e-3,                    # Regularization of the least squares fit
+    "min_frame_seconds": 0.1,         # Floor of a predicted frame time
+    "learn_from_telemetry": True      # Record frame times of full-frame renders that ran with telemetry
+}
+
+# Work-stealing frame queue shared by render workers (--queue)
+WORK_QUEUE_SETTINGS = {
+    "min_batch": 1,               # Frames per claim at the end of the job
+    "max_batch": 8,               # Frames per claim at the start of the job
+    "batch_divisor": 2,           # A claim takes 1/(divisor * live workers) of the frames left
+    "heartbeat_timeout": 900.0,   # Seconds without a heartbeat before a worker's frames are reclaimed (above the slowest frame)
+    "poll_interval": 10.0         # Seconds to wait while all remaining frames are claimed
+}
+
+# Pinned render workers on one machine (--local-workers)
+WORKER_PLACEMENT_SETTINGS = {
+    "min_cores_per_worker": 2,                    # Fewest physical cores a worker is given
+    "calibration_samples": 16,                    # Samples of the calibration render
+    "calibration_resolution_percentage": 50,
+    "calibration_frame": None,                    # Frame to measure; None for the middle of the animation
+    "calibration_timeout": 1800.0,                # Seconds to wait for calibration workers to build and render
+    "calibration_file": "//worker_calibration.json"   # Best worker count per machine and scene
+}
+
+# Static backyard environment (built as one batched mesh per material)
+ENVIRONMENT_SETTINGS = {
+    "house": {
+        "width": 5.0,
+        "depth": 4.0,
+        "height": 3.5
+    },
+    "fence": {
+        "polyline": [(0, 0), (12, 0), (12, 8)],  # Fence runs along these XY points
+        "height": 1.8,
+        "post_spacing": 2.0,
+        "post_width": 0.1,
+        "plank_heights": [0.5, 1.1, 1.7],
+        "plank_thickness": 0.02,
+        "plank_width": 0.1
+    },
+    "garden_outline": {
+        "center": (8, 4),
+        "radius": 3.0,
+        "dot_count": 12,
+        "dot_size": 0.1
+    }
+}
+
+# Procedural texture baking settings
+BAKE_SETTINGS = {
+    "enabled": False,
+    "texel_density": 102.4,   # Pixels per meter of surface
+    "min_resolution": 64,
+    "max_resolution": 4096,
+    "margin": 4,
+    "samples": 4,             # Procedural textures are noise-free, few samples are enough
+    "cache_dir": "//bake_cache/",
+    "targets": ["Terrain", "GardenPath", "GardenBorder", "SoilFill", "RobotChassis", "RobotBody", "TrackLeft", "TrackRight"]
+}
+
 def setup_render_settings():
     """Apply render settings from configuration"""
     bpy.context.scene.render.engine = RENDER_SETTINGS["engine"]
@@ -1,6 +1,7 @@
 import bpy
 import sys
 import os
+import argparse
 from datetime import datetime
 
 # Add project directory to path
@@ -9,25 +10,42 @@ if project_dir not in sys.path:
     sys.path.append(project_dir)
 
 # Import project modules
-from config import setup_render_settings, ANIMATION_FRAMES
+from config import setup_render_settings, ANIMATION_FRAMES, BORDER_MESH_SETTINGS, SOIL_FILL_SETTINGS, BAKE_SETTINGS, SCAN_CLOUD_SETTINGS, GRASS_SETTINGS, LOD_SETTINGS, TERRAIN_FOLLOW_SETTINGS, VALIDATION_SETTINGS, KEYFRAME_REDUCTION_SETTINGS
 from utils.blender_utils import clear_scene, setup_environment
-from models.terrain import create_terrain, create_grass
-from models.robot import create_robot, enhance_robot_model
-from models.garden_path import create_garden_path, create_soil_fill
-from models.effects import create_scan_effect, create_printing_particles, create_heat_distortion
+from utils.keyframe_reduction import reduce_keyframes
+from models.terrain import create_terrain, create_grass, create_terrain_lods
+from models.grass_instancing import create_grass_instancing
+from models.robot import create_robot, enhance_robot_model, create_robot_lods
+from models.garden_path import create_garden_path, create_border_mesh, create_soil_fill, create_soil_fill_mesh
+from models.effects import create_scan_effect, create_scan_point_cloud, create_printing_particles, create_heat_distortion
 from models.environment import create_backyard_environment, create_sky_and_lighting, animate_day_to_night_cycle
 from models.tubes_system import create_tube_system
-from models.plants import create_garden_plants, animate_plant_growth
+from models.plants import create_garden_plants, animate_plant_growth, create_plant_lods
+from models.lod import select_lod_levels
 from models.text_overlays import create_process_labels
+from models.build_plan import plan_builds, key_builder_phases
+from materials.texture_baking import bake_static_materials
 
 from animation.scan_phase import animate_scan_phase
 from animation.planning_phase import animate_planning_phase
 from animation.border_phase import animate_border_phase
 from animation.filling_phase import animate_filling_phase
 from animation.completion_phase import animate_completion_phase
-from animation.tube_interaction import animate_robot_tube_interaction
+from animation.robot_motion import apply_terrain_following
+from animation.tube_interaction import animate_robot_tube_interaction, update_plug_carry
+from animation.timeline import store_timeline
+from animation.validation import validate_animation, print_validation_report
 
-def main():
+def parse_frame_range():
+    """Frame range passed as --frames START END after '--', or None for the whole animation"""
+    parser = argparse.ArgumentParser(description='Set up the landscaping robot animation')
+    parser.add_argument('--frames', type=int, nargs=2, default=None, metavar=('START', 'END'),
+                        help='Only build what can be seen in these frames and render just them')
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    args = parser.parse_args(argv)
+    return tuple(args.frames) if args.frames else None
+
+def main(frame_range=None):
     """Main function to set up and run the enhanced landscaping robot animation"""
     print(f"Starting Enhanced Landscaping 3D Printer Robot animation setup at {datetime.now().strftime('%H:%M:%S')}")
     
@@ -37,6 +55,8 @@ def main():
     
     # Set up enhanced rendering
     setup_render_settings()
+    if frame_range:
+        bpy.context.scene.frame_start, bpy.context.scene.frame_end = frame_range
     
     # Create dynamic sky and lighting
     world, sun = create_sky_and_lighting()
@@ -44,10 +64,17 @@ def main():
     # Create backyard environment
     create_backyard_environment()
     
+    # Leave out what cannot be seen in the requested frames; the robot's own
+    # animation is always built whole, so every chunk shows the same poses
+    builds = plan_builds(ANIMATION_FRAMES, frame_range, bpy.context.scene.camera)
+    
     # Create models
     print("Creating terrain...")
     terrain = create_terrain()
-    create_grass(terrain)
+    if GRASS_SETTINGS["use_geometry_nodes"]:
+        create_grass_instancing(terrain)
+    else:
+        create_grass(terrain)
     
     print("Creating robot...")
     robot = create_robot()
@@ -55,27 +82,33 @@ def main():
     
     print("Creating garden path...")
     garden_path = create_garden_path()
-    soil_fill = create_soil_fill(garden_path)
+    border = create_border_mesh(garden_path) if BORDER_MESH_SETTINGS["enabled"] and "border" in builds else None
+    soil_fill = None
+    if "soil_fill" in builds:
+        soil_fill = create_soil_fill_mesh(garden_path) if SOIL_FILL_SETTINGS["enabled"] else create_soil_fill(garden_path)
     
     print("Creating tube system...")
     tubes = create_tube_system()
     
     print("Creating visual effects...")
-    scan_effect = create_scan_effect()
-    heat_effect = create_heat_distortion(garden_path)
-    particles = create_printing_particles(garden_path)
+    scan_effect = create_scan_effect() if "scan_effect" in builds else None
+    scan_cloud = create_scan_point_cloud(terrain) if SCAN_CLOUD_SETTINGS["enabled"] and "scan_cloud" in builds else None
+    if "heat_distortion" in builds:
+        key_builder_phases(create_heat_distortion(garden_path), "heat_distortion", ANIMATION_FRAMES)
+    if "printing_particles" in builds:
+        key_builder_phases(create_printing_particles(garden_path), "printing_particles", ANIMATION_FRAMES)
     
     print("Creating plants...")
-    plants = create_garden_plants()
+    plants = create_garden_plants() if "plants" in builds else []
     
     print("Creating process labels...")
-    labels = create_process_labels()
+    labels = create_process_labels(ANIMATION_FRAMES, frame_range) if "labels" in builds else []
     
     # Set up animation phases
     print("Setting up animation phases...")
     
     # Phase 1: Scanning
-    animate_scan_phase(robot, scan_effect, ANIMATION_FRAMES["scan"])
+    animate_scan_phase(robot, scan_effect, ANIMATION_FRAMES["scan"], scan_cloud)
     
     # Phase 2: Planning
     animate_planning_phase(robot, ANIMATION_FRAMES["planning"])
@@ -84,14 +117,20 @@ def main():
     animate_robot_tube_interaction(robot, tubes, ANIMATION_FRAMES)
     
     # Phase 3: Border construction
-    animate_border_phase(robot, garden_path, ANIMATION_FRAMES["border"])
+    animate_border_phase(robot, garden_path, ANIMATION_FRAMES["border"], border)
     
     # Phase 4: Soil filling
-    animate_filling_phase(robot, soil_fill, ANIMATION_FRAMES["filling"])
+    animate_filling_phase(robot, soil_fill, ANIMATION_FRAMES["filling"], garden_path)
     
     # Phase 5: Completion and moving
     animate_completion_phase(robot, ANIMATION_FRAMES["completion"])
     
+    # Rest the robot on the terrain along its whole trajectory
+    if TERRAIN_FOLLOW_SETTINGS["enabled"]:
+        apply_terrain_following(robot, terrain, (ANIMATION_FRAMES["scan"][0], ANIMATION_FRAMES["completion"][1]))
+        # Plugs picked up on the terrain must be offset by the robot's new pose
+        update_plug_carry(robot, tubes)
+    
     # Animate dynamic day-night cycle
     complete_frame_range = (ANIMATION_FRAMES["scan"][0], ANIMATION_FRAMES["completion"][1])
     animate_day_to_night_cycle(world, sun, complete_frame_range)
@@ -99,15 +138,39 @@ def main():
     # Animate plants growing at the end
     animate_plant_growth(plants, ANIMATION_FRAMES["completion"][0], ANIMATION_FRAMES["completion"][1])
     
+    # Switch robot, plants and terrain to cheaper detail levels in wide shots
+    if LOD_SETTINGS["enabled"]:
+        print("Selecting detail levels...")
+        create_terrain_lods(terrain)
+        create_robot_lods(robot)
+        create_plant_lods(plants)
+        select_lod_levels(complete_frame_range)
+    
+    # Bake procedural materials of static objects into cached image textures
+    if BAKE_SETTINGS["enabled"]:
+        print("Baking static materials...")
+        bake_static_materials()
+    
+    # Remember the timing, so the saved file can be retimed instead of rebuilt
+    store_timeline(ANIMATION_FRAMES)
+    
+    # Shrink the actions now that every phase is keyed
+    if KEYFRAME_REDUCTION_SETTINGS["enabled"]:
+        reduce_keyframes()
+    
+    # Report choreography problems before anything is rendered
+    if VALIDATION_SETTINGS["enabled"]:
+        print_validation_report(validate_animation(ANIMATION_FRAMES, robot))
+    
     # Return to first frame
-    bpy.context.scene.frame_set(1)
+    bpy.context.scene.frame_set(bpy.context.scene.frame_start)
     
     print(f"Enhanced landscaping robot animation setup complete at {datetime.now().strftime('%H:%M:%S')}")
     print(f"Total animation length: {ANIMATION_FRAMES['completion'][1]} frames")
     print("Preview the animation with Alt+A or render with Ctrl+F12")
 
 if __name__ == "__main__":
-    main()
+    main(parse_frame_range())
     
     # Save the file
     output_path = os.path.abspath('/Users/brocket12/Desktop/3D_landscaping/enhanced_landscaping_robot.blend')
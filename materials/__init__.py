@@ -1,18 +1,22 @@
 # Materials module
 # This module contains all material creation functions
 
-from materials.terrain_materials import create_terrain_material, create_grass_material
+from materials.terrain_materials import create_rocks, create_grass_area_group
 from materials.robot_materials import create_metal_material, create_glass_material, create_robot_materials
 from materials.printing_materials import create_clay_material, create_concrete_material, create_soil_material, create_printing_materials
+from materials.texture_baking import bake_static_materials, restore_procedural_materials, get_material_spec_hash
 
 __all__ = [
-    'create_terrain_material',
-    'create_grass_material',
+    'create_rocks',
+    'create_grass_area_group',
     'create_metal_material',
     'create_glass_material',
     'create_robot_materials',
     'create_clay_material',
     'create_concrete_material',
     'create_soil_material',
-    'create_printing_materials'
+    'create_printing_materials',
+    'bake_static_materials',
+    'restore_procedural_materials',
+    'get_material_spec_hash'
 ]
\ No newline at end of file
@@ -4,6 +4,7 @@ import math
 import random
 from mathutils import Vector
 from config import TERRAIN_SETTINGS, MATERIAL_COLORS
+from utils.scene_registry import add_part
 
 def create_terrain():
     """Create a more realistic terrain with varied elevation and features"""
@@ -199,6 +200,7 @@ def create_rocks(terrain):
         mesh = random.choice(rock_meshes)
         rock = bpy.data.objects.new(f"Rock_{i}", mesh)
         rock_collection.objects.link(rock)
+        add_part(None, "obstacles", rock)
         
         # Position and scale rock
         rock.location = (x, y, highest_z)
@@ -354,7 +356,25 @@ def create_grass(terrain):
     settings.clump_factor = 0.2
     
     # Vertex group for grass distribution
-    # Create a vertex group to control where grass appears
+    create_grass_area_group(terrain)
+    
+    # Use vertex group for distribution
+    settings.vertex_group_density = "GrassArea"
+    
+    # Hide original grass blades from render
+    grass_blade.hide_render = True
+    grass_blade.hide_viewport = True
+    grass_blade2.hide_render = True
+    grass_blade2.hide_viewport = True
+    
+    return particle_system
+
+def create_grass_area_group(terrain):
+    """Create the GrassArea vertex group that controls where grass appears"""
+    group = terrain.vertex_groups.get("GrassArea")
+    if group:
+        return group
+    
     group = terrain.vertex_groups.new(name="GrassArea")
     
     # Add random vertices to the group with varying weights
@@ -373,16 +393,7 @@ def create_grass(terrain):
                 weight = (1.0 - slope) * edge_factor * (noise_val - 0.3) * 1.4
                 group.add([v.index], min(1.0, max(0.0, weight)), 'REPLACE')
     
-    # Use vertex group for distribution
-    settings.vertex_group_density = "GrassArea"
-    
-    # Hide original grass blades from render
-    grass_blade.hide_render = True
-    grass_blade.hide_viewport = True
-    grass_blade2.hide_render = True
-    grass_blade2.hide_viewport = True
-    
-    return particle_system
+    return group
 
 def noise_2d(x, y):
     """Simple 2D noise function for grass distribution"""
@@ -0,0 +1,448 @@
+import bpy
+import os
+import re
+import json
+import hashlib
+import numpy as np
+from config import BAKE_SETTINGS
+from utils.node_utils import add_frame_reveal, add_object_fade
+
+# Passes baked for every static material, with the Cycles bake type used for each
+BAKE_PASSES = {
+    "color": {"type": 'DIFFUSE', "pass_filter": {'COLOR'}, "colorspace": 'sRGB'},
+    "roughness": {"type": 'ROUGHNESS', "pass_filter": set(), "colorspace": 'Non-Color'},
+    "normal": {"type": 'NORMAL', "pass_filter": set(), "colorspace": 'Non-Color'}
+}
+
+# Node properties that only affect the node editor, not the shading result
+IGNORED_NODE_PROPERTIES = {
+    "name", "label", "location", "width", "width_hidden", "height", "dimensions",
+    "select", "hide", "mute", "show_options", "show_preview", "show_texture",
+    "use_custom_color", "color", "parent", "type", "bl_idname", "bl_label",
+    "bl_description", "bl_icon", "bl_static_type", "bl_width_default",
+    "bl_width_min", "bl_width_max", "bl_height_default", "bl_height_min", "bl_height_max"
+}
+
+BAKE_UV_NAME = "BakeUV"
+
+# Transparency mixes (print/fill reveal, detail level fade) that are kept on the baked material, in build order
+TRANSPARENCY_MIXES = {"FrameReveal": add_frame_reveal, "ObjectFade": add_object_fade}
+
+def get_bake_cache_dir():
+    """Resolve the bake cache directory and make sure it exists"""
+    cache_dir = BAKE_SETTINGS["cache_dir"]
+    if cache_dir.startswith('//'):
+        if bpy.data.filepath:
+            cache_dir = bpy.path.abspath(cache_dir)
+        else:
+            # Unsaved file - keep the cache next to the project scripts
+            project_dir = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+            cache_dir = os.path.join(project_dir, cache_dir[2:])
+
+    os.makedirs(cache_dir, exist_ok=True)
+    return cache_dir
+
+def _spec_value(value):
+    """Convert an RNA value into something JSON can serialize deterministically"""
+    if isinstance(value, float):
+        return round(value, 6)
+    if isinstance(value, (bool, int, str)) or value is None:
+        return value
+    if isinstance(value, bpy.types.ID):
+        return value.name
+    try:
+        return [_spec_value(v) for v in value]
+    except TypeError:
+        return str(value)
+
+def get_material_spec(material):
+    """Describe everything in a material's node tree that affects its shading"""
+    spec = {"nodes": [], "links": []}
+    if not material.use_nodes:
+        spec["diffuse_color"] = _spec_value(material.diffuse_color)
+        return spec
+
+    tree = material.node_tree
+    for node in sorted(tree.nodes, key=lambda n: n.name):
+        entry = {"name": node.name, "type": node.bl_idname, "props": {}, "inputs": {}}
+
+        for prop in node.bl_rna.properties:
+            if prop.identifier in IGNORED_NODE_PROPERTIES or prop.is_readonly:
+                continue
+            if prop.type in {'BOOLEAN', 'INT', 'FLOAT', 'STRING', 'ENUM'}:
+                entry["props"][prop.identifier] = _spec_value(getattr(node, prop.identifier))
+
+        # Color ramps keep their stops outside of the regular properties
+        if node.type == 'VALTORGB':
+            entry["ramp"] = [
+                (_spec_value(e.position), _spec_value(e.color))
+                for e in node.color_ramp.elements
+            ]
+
+        for socket in node.inputs:
+            if hasattr(socket, "default_value"):
+                entry["inputs"][socket.identifier] = _spec_value(socket.default_value)
+
+        spec["nodes"].append(entry)
+
+    for link in tree.links:
+        spec["links"].append([
+            link.from_node.name, link.from_socket.identifier,
+            link.to_node.name, link.to_socket.identifier
+        ])
+    spec["links"].sort()
+
+    return spec
+
+def get_material_spec_hash(material):
+    """Hash a material's node setup so bakes are only redone when it changes"""
+    spec_json = json.dumps(get_material_spec(material), sort_keys=True)
+    return hashlib.sha1(spec_json.encode("utf-8")).hexdigest()
+
+def get_bake_resolution(obj):
+    """Pick a square power-of-two resolution from the object's surface area"""
+    mesh = obj.data
+    areas = np.zeros(len(mesh.polygons), dtype=np.float32)
+    mesh.polygons.foreach_get("area", areas)
+
+    # Approximate the effect of object scale on surface area
+    scale = obj.matrix_world.to_scale()
+    area_scale = abs(scale.x * scale.y * scale.z) ** (2.0 / 3.0)
+    surface_area = float(areas.sum()) * area_scale
+
+    size = np.sqrt(max(surface_area, 1e-6)) * BAKE_SETTINGS["texel_density"]
+    resolution = 2 ** int(np.ceil(np.log2(max(size, 1.0))))
+    return int(min(BAKE_SETTINGS["max_resolution"], max(BAKE_SETTINGS["min_resolution"], resolution)))
+
+def _prepare_bake_target(obj):
+    """Return a mesh object to bake on, and whether it is a temporary proxy"""
+    if obj.type == 'MESH':
+        if not obj.data.uv_layers:
+            bpy.context.view_layer.objects.active = obj
+            bpy.ops.object.select_all(action='DESELECT')
+            obj.select_set(True)
+            bpy.ops.object.mode_set(mode='EDIT')
+            bpy.ops.mesh.select_all(action='SELECT')
+            bpy.ops.uv.smart_project()
+            bpy.ops.object.mode_set(mode='OBJECT')
+        return obj, False
+
+    # Curves (border, soil) are baked on a mesh proxy evaluated at full extent
+    curve = obj.data
+    orig_factor_end = curve.bevel_factor_end
+    orig_hidden = obj.hide_viewport
+    orig_uv_as_generated = curve.use_uv_as_generated
+    curve.bevel_factor_end = 1.0
+    obj.hide_viewport = False
+    # Generated coordinates of the curve become its own UVs (along the spline and
+    # around the bevel profile), which the converted mesh carries as a UV map
+    curve.use_uv_as_generated = True
+    bpy.context.view_layer.update()
+
+    depsgraph = bpy.context.evaluated_depsgraph_get()
+    mesh = bpy.data.meshes.new_from_object(obj.evaluated_get(depsgraph))
+    mesh.name = f"{obj.name}_BakeProxy"
+
+    curve.bevel_factor_end = orig_factor_end
+    obj.hide_viewport = orig_hidden
+
+    if not mesh.uv_layers:
+        # Without the curve's UVs the bake could not be mapped back onto the curve
+        curve.use_uv_as_generated = orig_uv_as_generated
+        bpy.data.meshes.remove(mesh)
+        return None, False
+    mesh.uv_layers[0].name = BAKE_UV_NAME
+    mesh.uv_layers.active = mesh.uv_layers[0]
+
+    proxy = bpy.data.objects.new(f"{obj.name}_BakeProxy", mesh)
+    proxy.matrix_world = obj.matrix_world
+    proxy["bake_curve_uv"] = True
+    bpy.context.scene.collection.objects.link(proxy)
+    return proxy, True
+
+def _get_geometry_hash(mesh):
+    """Hash of a mesh's vertex positions, faces and active UV map"""
+    h = hashlib.sha1()
+    coords = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", coords)
+    h.update(coords.tobytes())
+    loops = np.empty(len(mesh.loops), dtype=np.int32)
+    mesh.loops.foreach_get("vertex_index", loops)
+    h.update(loops.tobytes())
+    if mesh.uv_layers.active:
+        uvs = np.empty(len(mesh.loops) * 2, dtype=np.float32)
+        mesh.uv_layers.active.data.foreach_get("uv", uvs)
+        h.update(uvs.tobytes())
+    return h.hexdigest()
+
+def _get_bake_key(material, bake_obj, resolution, geometry):
+    """Cache key from the material spec, the target geometry (hashed once per object) and the resolution"""
+    mesh = bake_obj.data
+    fingerprint = {
+        "material": get_material_spec_hash(material),
+        "vertices": len(mesh.vertices),
+        "polygons": len(mesh.polygons),
+        "geometry": geometry,
+        "dimensions": _spec_value(bake_obj.dimensions),
+        "resolution": resolution,
+        "margin": BAKE_SETTINGS["margin"],
+        "uv": "curve" if bake_obj.get("bake_curve_uv") else "mesh"
+    }
+    return hashlib.sha1(json.dumps(fingerprint, sort_keys=True).encode("utf-8")).hexdigest()
+
+def _bake_pass(bake_obj, pass_name, slot_images):
+    """Bake one pass for every material slot of an object into its image"""
+    bake_pass = BAKE_PASSES[pass_name]
+    added_nodes = []
+
+    # Cycles writes into the active Image Texture node of each material
+    for slot_index, image in slot_images.items():
+        material = bake_obj.material_slots[slot_index].material
+        node = material.node_tree.nodes.new(type='ShaderNodeTexImage')
+        node.image = image
+        material.node_tree.nodes.active = node
+        added_nodes.append((material, node))
+
+    bpy.ops.object.select_all(action='DESELECT')
+    bake_obj.select_set(True)
+    bpy.context.view_layer.objects.active = bake_obj
+
+    try:
+        bpy.ops.object.bake(
+            type=bake_pass["type"],
+            pass_filter=bake_pass["pass_filter"],
+            margin=BAKE_SETTINGS["margin"],
+            normal_space='OBJECT',
+            use_clear=True
+        )
+    finally:
+        for material, node in added_nodes:
+            material.node_tree.nodes.remove(node)
+
+    for image in slot_images.values():
+        image.save()
+
+def _new_bake_image(name, path, resolution, pass_name):
+    """Create an image datablock that saves to the cache path"""
+    image = bpy.data.images.new(name, width=resolution, height=resolution, alpha=False)
+    image.colorspace_settings.name = BAKE_PASSES[pass_name]["colorspace"]
+    image.filepath_raw = path
+    image.file_format = 'PNG'
+    return image
+
+def get_transparency_mixes(material):
+    """Transparency mixes of a material with the attribute each one reads"""
+    mixes = []
+    nodes = material.node_tree.nodes if material.use_nodes else {}
+    for name in TRANSPARENCY_MIXES:
+        mix = nodes.get(name)
+        if mix is None or not mix.inputs["Fac"].is_linked:
+            continue
+        # The attribute feeds the factor directly or through the frame comparison
+        source = mix.inputs["Fac"].links[0].from_node
+        while source.type != 'ATTRIBUTE' and source.inputs and source.inputs[0].is_linked:
+            source = source.inputs[0].links[0].from_node
+        if source.type == 'ATTRIBUTE':
+            mixes.append((name, mix, source.attribute_name))
+    return mixes
+
+def create_baked_material(source_material, images, use_generated_coords):
+    """Create a cheap image-based material that replaces a procedural one"""
+    baked_mat = bpy.data.materials.new(name=f"{source_material.name}_Baked")
+    baked_mat.use_nodes = True
+    baked_mat["bake_source"] = source_material.name
+
+    nodes = baked_mat.node_tree.nodes
+    links = baked_mat.node_tree.links
+
+    # Clear existing nodes
+    for node in nodes:
+        nodes.remove(node)
+
+    output = nodes.new(type='ShaderNodeOutputMaterial')
+    principled = nodes.new(type='ShaderNodeBsdfPrincipled')
+    normal_map = nodes.new(type='ShaderNodeNormalMap')
+    normal_map.space = 'OBJECT'
+
+    output.location = (600, 0)
+    principled.location = (300, 0)
+    normal_map.location = (100, -300)
+
+    # Texture coordinates matching the space the images were baked in; on curves
+    # the Generated X and Y are the curve UVs the proxy was baked with
+    if use_generated_coords:
+        tex_coord = nodes.new(type='ShaderNodeTexCoord')
+        separate = nodes.new(type='ShaderNodeSeparateXYZ')
+        combine = nodes.new(type='ShaderNodeCombineXYZ')
+        tex_coord.location = (-700, 0)
+        separate.location = (-500, 0)
+        combine.location = (-350, 0)
+        links.new(tex_coord.outputs["Generated"], separate.inputs["Vector"])
+        links.new(separate.outputs["X"], combine.inputs["X"])
+        links.new(separate.outputs["Y"], combine.inputs["Y"])
+        vector_output = combine.outputs["Vector"]
+    else:
+        uv_map = nodes.new(type='ShaderNodeUVMap')
+        uv_map.location = (-400, 0)
+        vector_output = uv_map.outputs["UV"]
+
+    tex_nodes = {}
+    for i, (pass_name, image) in enumerate(images.items()):
+        tex = nodes.new(type='ShaderNodeTexImage')
+        tex.image = image
+        tex.location = (-200, 200 - i * 250)
+        links.new(vector_output, tex.inputs["Vector"])
+        tex_nodes[pass_name] = tex
+
+    links.new(tex_nodes["color"].outputs["Color"], principled.inputs["Base Color"])
+    links.new(tex_nodes["roughness"].outputs["Color"], principled.inputs["Roughness"])
+    links.new(tex_nodes["normal"].outputs["Color"], normal_map.inputs["Color"])
+    links.new(normal_map.outputs["Normal"], principled.inputs["Normal"])
+    links.new(principled.outputs["BSDF"], output.inputs["Surface"])
+
+    # Keep the constant (non-procedural) inputs of the original shader
+    source_bsdf = None
+    if source_material.use_nodes:
+        for node in source_material.node_tree.nodes:
+            if node.type == 'BSDF_PRINCIPLED':
+                source_bsdf = node
+                break
+
+    if source_bsdf:
+        for input_name in ("Metallic", "Specular", "Transmission", "IOR"):
+            socket = source_bsdf.inputs.get(input_name)
+            if socket and not socket.is_linked:
+                principled.inputs[input_name].default_value = socket.default_value
+
+    # Keep the frame reveal and fade of the original on top of the baked shading
+    for name, _mix, attribute_name in get_transparency_mixes(source_material):
+        TRANSPARENCY_MIXES[name](baked_mat, attribute_name)
+    baked_mat.blend_method = source_material.blend_method
+    baked_mat.shadow_method = source_material.shadow_method
+
+    return baked_mat
+
+def bake_object_materials(obj, cache_dir):
+    """Bake all procedural materials of one object, reusing cached images"""
+    # Printed parts are hidden until their phase; the bake needs them visible
+    orig_hidden = (obj.hide_viewport, obj.hide_render)
+    obj.hide_viewport = False
+    obj.hide_render = False
+    try:
+        return _bake_visible_object(obj, cache_dir)
+    finally:
+        obj.hide_viewport, obj.hide_render = orig_hidden
+
+def _bake_visible_object(obj, cache_dir):
+    """Bake the materials of an object that is currently visible"""
+    # Objects shared between scenes, or sharing meshes, may already be baked
+    if not any(slot.material and slot.material.use_nodes and not slot.material.get("bake_source")
+               for slot in obj.material_slots):
+        return []
+    bake_obj, is_proxy = _prepare_bake_target(obj)
+    if bake_obj is None:
+        print(f"Keeping procedural materials on {obj.name}: its curve has no UVs to bake into")
+        return []
+    resolution = get_bake_resolution(bake_obj)
+    geometry = _get_geometry_hash(bake_obj.data)
+
+    slots = {}
+    for slot_index, slot in enumerate(bake_obj.material_slots):
+        material = slot.material
+        if material and material.use_nodes and not material.get("bake_source"):
+            slots[slot_index] = material
+
+    results = []
+    slot_pass_images = {slot_index: {} for slot_index in slots}
+
+    # Bake the fully revealed, opaque surface: a muted mix passes its first shader through
+    muted = [mix for material in slots.values() for _name, mix, _attribute in get_transparency_mixes(material)]
+    for mix in muted:
+        mix.mute = True
+
+    try:
+        for pass_name in BAKE_PASSES:
+            cache_paths = {}
+            for slot_index, material in slots.items():
+                key = _get_bake_key(material, bake_obj, resolution, geometry)
+                file_name = f"{bpy.path.clean_name(obj.name)}_{slot_index}_{pass_name}_{key[:16]}.png"
+                cache_paths[slot_index] = os.path.join(cache_dir, file_name)
+
+            # All slots of an object are baked together, so one miss re-bakes the pass
+            cache_hit = all(os.path.exists(path) for path in cache_paths.values())
+            pass_images = {}
+            for slot_index, path in cache_paths.items():
+                if cache_hit:
+                    image = bpy.data.images.load(path, check_existing=True)
+                    image.colorspace_settings.name = BAKE_PASSES[pass_name]["colorspace"]
+                else:
+                    image = _new_bake_image(os.path.basename(path), path, resolution, pass_name)
+                pass_images[slot_index] = image
+
+            if pass_images and not cache_hit:
+                _bake_pass(bake_obj, pass_name, pass_images)
+
+            for slot_index, image in pass_images.items():
+                slot_pass_images[slot_index][pass_name] = image
+            results.append({"object": obj.name, "pass": pass_name, "resolution": resolution, "cached": cache_hit})
+    finally:
+        for mix in muted:
+            mix.mute = False
+        if is_proxy:
+            proxy_mesh = bake_obj.data
+            bpy.data.objects.remove(bake_obj)
+            bpy.data.meshes.remove(proxy_mesh)
+
+    # Swap the procedural materials for their baked versions
+    for slot_index, material in slots.items():
+        baked_mat = create_baked_material(material, slot_pass_images[slot_index], use_generated_coords=is_proxy)
+        obj.material_slots[slot_index].material = baked_mat
+
+    return results
+
+def get_bake_targets(target_names, scene):
+    """Objects of a scene to bake, copies such as GardenBorder.001 included"""
+    targets = []
+    for name in target_names:
+        pattern = re.compile(re.escape(name) + r"(\.\d{3,})?")
+        targets.extend(obj for obj in scene.objects
+                       if pattern.fullmatch(obj.name) and obj.type in {'MESH', 'CURVE'})
+    return targets
+
+def bake_static_materials(target_names=None):
+    """Bake procedural materials of static objects in the context scene and switch renders to the baked images"""
+    if target_names is None:
+        target_names = BAKE_SETTINGS["targets"]
+
+    scene = bpy.context.scene
+    cache_dir = get_bake_cache_dir()
+
+    # Baking always runs through Cycles, restore the render setup afterwards
+    orig_engine = scene.render.engine
+    orig_samples = scene.cycles.samples
+    orig_frame = scene.frame_current
+    scene.render.engine = 'CYCLES'
+    scene.cycles.samples = BAKE_SETTINGS["samples"]
+
+    results = []
+    try:
+        for obj in get_bake_targets(target_names, scene):
+            results.extend(bake_object_materials(obj, cache_dir))
+    finally:
+        scene.render.engine = orig_engine
+        scene.cycles.samples = orig_samples
+        scene.frame_set(orig_frame)
+
+    baked = sum(1 for r in results if not r["cached"])
+    print(f"Baked {baked} texture passes, reused {len(results) - baked} from {cache_dir}")
+    return results
+
+def restore_procedural_materials():
+    """Switch objects back from baked images to their procedural materials"""
+    for obj in bpy.data.objects:
+        for slot in obj.material_slots:
+            material = slot.material
+            if material and material.get("bake_source"):
+                source = bpy.data.materials.get(material["bake_source"])
+                if source:
+                    slot.material = source
@@ -1,16 +1,25 @@
 # Models module
 # This module contains all 3D model creation functions
 
-from models.terrain import create_terrain, create_grass
+from models.terrain import create_terrain, create_terrain_from_point_cloud, create_grass
 from models.robot import create_robot
-from models.garden_path import create_garden_path, create_soil_fill
-from models.effects import create_scan_effect
+from models.garden_path import create_garden_path, create_border_mesh, create_soil_fill, create_soil_fill_mesh
+from models.effects import create_scan_effect, create_scan_point_cloud
+from models.grass_instancing import create_grass_instancing
+from models.build_plan import register_builder, plan_builds
 
 __all__ = [
     'create_terrain',
+    'create_terrain_from_point_cloud',
     'create_grass',
     'create_robot',
     'create_garden_path',
+    'create_border_mesh',
     'create_soil_fill',
-    'create_scan_effect'
+    'create_soil_fill_mesh',
+    'create_scan_effect',
+    'create_scan_point_cloud',
+    'create_grass_instancing',
+    'register_builder',
+    'plan_builds'
 ]
\ No newline at end of file
@@ -0,0 +1,64 @@
+import bpy
+from mathutils import Vector
+from utils.camera_utils import is_sphere_in_view
+from utils.keyframe_utils import evaluate_matrix_world, set_keyframes
+
+# Optional scene builders by name: the phases their objects can show up in (None
+# for all), a world-space bounding sphere for the camera test, and whether they
+# light or shadow the frame from outside the view. Builders that are not
+# registered (terrain, robot, garden path, tubes) drive the robot animation and
+# are always built
+BUILDERS = {}
+
+def register_builder(name, phases=None, bounds=None, affects_lighting=False):
+    """Declare the phases a builder takes part in and where its objects are"""
+    BUILDERS[name] = {
+        "phases": tuple(phases) if phases else None,
+        "bounds": bounds,
+        "affects_lighting": affects_lighting
+    }
+
+def get_range_phases(frame_ranges, frame_range):
+    """Phases with at least one frame inside a frame range"""
+    first, last = frame_range
+    return {phase for phase, (start, end) in frame_ranges.items() if start <= last and end >= first}
+
+def is_in_camera_view(bounds, camera, scene, frame_range):
+    """Whether a bounding sphere is inside the animated camera's view at any frame of a range"""
+    center, radius = bounds
+    center = Vector(center)
+    first, last = frame_range
+    return any(is_sphere_in_view(camera, scene, center, radius, evaluate_matrix_world(camera, frame))
+               for frame in range(first, last + 1))
+
+def plan_builds(frame_ranges, frame_range=None, camera=None, scene=None):
+    """Names of the registered builders whose objects can be seen in, or light, a frame range"""
+    if frame_range is None:
+        return set(BUILDERS)
+    scene = scene or bpy.context.scene
+    phases = get_range_phases(frame_ranges, frame_range)
+
+    planned = set()
+    skipped = []
+    for name, builder in BUILDERS.items():
+        if builder["phases"] and not phases.intersection(builder["phases"]):
+            skipped.append(name)
+        elif (camera and builder["bounds"] and not builder["affects_lighting"] and
+                not is_in_camera_view(builder["bounds"], camera, scene, frame_range)):
+            skipped.append(f"{name} (off camera)")
+        else:
+            planned.add(name)
+
+    print(f"Frames {frame_range[0]}-{frame_range[1]}: building {len(planned)} of {len(BUILDERS)} optional builders"
+          + (f", skipping {', '.join(skipped)}" if skipped else ""))
+    return planned
+
+def key_builder_phases(obj, name, frame_ranges):
+    """Show an object only during its builder's phases, so frames look the same whether or not it was planned"""
+    phases = BUILDERS[name]["phases"]
+    if not phases:
+        return
+    start = min(frame_ranges[phase][0] for phase in phases)
+    end = max(frame_ranges[phase][1] for phase in phases)
+    for data_path in ("hide_viewport", "hide_render"):
+        set_keyframes(obj, data_path, [start - 1, start, end + 1], [1, 0, 1], 'CONSTANT')
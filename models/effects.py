@@ -1,7 +1,20 @@
 import bpy
 import math
+import numpy as np
 from mathutils import Vector
-from config import MATERIAL_COLORS
+from config import MATERIAL_COLORS, SCAN_CLOUD_SETTINGS
+from utils.mesh_utils import create_mesh_object
+from utils.node_utils import add_math_node, get_enabled_socket
+from models.build_plan import register_builder
+
+# capture_frame of points the scanner never reaches
+NEVER_CAPTURED = 1.0e9
+
+# The glowing scan visuals light the terrain around them; the heat plane sits at the origin
+register_builder("scan_effect", ["scan"], affects_lighting=True)
+register_builder("scan_cloud", ["scan"], affects_lighting=True)
+register_builder("heat_distortion", ["border", "filling"], bounds=((0, 0, 0.05), 0.2))
+register_builder("printing_particles", ["border", "filling"])
 
 def create_scan_effect():
     """Create a visual effect for the scanning process"""
@@ -75,6 +88,141 @@ def create_scan_effect():
     return scan_plane
 
 
+def sample_surface_points(obj, count, seed=0):
+    """Sample points uniformly over an object's evaluated surface, in world space"""
+    depsgraph = bpy.context.evaluated_depsgraph_get()
+    evaluated = obj.evaluated_get(depsgraph)
+    mesh = evaluated.to_mesh()
+    mesh.calc_loop_triangles()
+    
+    vertices = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", vertices)
+    triangles = np.empty(len(mesh.loop_triangles) * 3, dtype=np.int32)
+    mesh.loop_triangles.foreach_get("vertices", triangles)
+    evaluated.to_mesh_clear()
+    
+    matrix = np.array(obj.matrix_world)
+    vertices = vertices.reshape(-1, 3) @ matrix[:3, :3].T + matrix[:3, 3]
+    corners = vertices[triangles.reshape(-1, 3)]
+    edge1 = corners[:, 1] - corners[:, 0]
+    edge2 = corners[:, 2] - corners[:, 0]
+    areas = 0.5 * np.linalg.norm(np.cross(edge1, edge2), axis=1)
+    
+    # Area-weighted triangle choice, then a uniform point inside the triangle
+    rng = np.random.default_rng(seed)
+    face = rng.choice(len(areas), size=count, p=areas / areas.sum())
+    u, v = rng.random((2, count))
+    flip = u + v > 1.0
+    u[flip] = 1.0 - u[flip]
+    v[flip] = 1.0 - v[flip]
+    return corners[face, 0] + u[:, None] * edge1[face] + v[:, None] * edge2[face]
+
+def create_scan_point_material():
+    """Emissive material that glows for freshly captured points and fades with scan_age"""
+    mat = bpy.data.materials.new(name="ScanPointMaterial")
+    mat.use_nodes = True
+    nodes = mat.node_tree.nodes
+    links = mat.node_tree.links
+    
+    for node in nodes:
+        nodes.remove(node)
+    
+    output = nodes.new(type='ShaderNodeOutputMaterial')
+    emission = nodes.new(type='ShaderNodeEmission')
+    age = nodes.new(type='ShaderNodeAttribute')
+    fade = nodes.new(type='ShaderNodeMapRange')
+    mix = nodes.new(type='ShaderNodeMixRGB')
+    
+    # scan_age is written per point by the ScanReveal geometry nodes
+    age.attribute_type = 'GEOMETRY'
+    age.attribute_name = "scan_age"
+    fade.clamp = True
+    fade.inputs["From Min"].default_value = 0.0
+    fade.inputs["From Max"].default_value = SCAN_CLOUD_SETTINGS["fade_frames"]
+    fade.inputs["To Min"].default_value = 1.0
+    fade.inputs["To Max"].default_value = 0.0
+    mix.inputs["Color1"].default_value = MATERIAL_COLORS["metal_light"]
+    mix.inputs["Color2"].default_value = MATERIAL_COLORS["scan_effect"]
+    
+    links.new(age.outputs["Fac"], fade.inputs["Value"])
+    links.new(fade.outputs["Result"], mix.inputs["Fac"])
+    links.new(mix.outputs["Color"], emission.inputs["Color"])
+    strength = add_math_node(nodes, links, 'MULTIPLY_ADD', fade.outputs["Result"], 3.0)
+    strength.node.inputs[2].default_value = 1.0
+    links.new(strength, emission.inputs["Strength"])
+    links.new(emission.outputs["Emission"], output.inputs["Surface"])
+    
+    return mat
+
+def create_scan_reveal_node_group(material):
+    """Geometry Nodes that show only points whose capture_frame has been reached"""
+    tree = bpy.data.node_groups.new("ScanReveal", 'GeometryNodeTree')
+    tree.inputs.new('NodeSocketGeometry', "Geometry")
+    tree.outputs.new('NodeSocketGeometry', "Geometry")
+    nodes = tree.nodes
+    links = tree.links
+    
+    group_input = nodes.new(type='NodeGroupInput')
+    group_output = nodes.new(type='NodeGroupOutput')
+    
+    to_points = nodes.new(type='GeometryNodeMeshToPoints')
+    to_points.mode = 'VERTICES'
+    to_points.inputs["Radius"].default_value = SCAN_CLOUD_SETTINGS["point_radius"]
+    links.new(group_input.outputs["Geometry"], to_points.inputs["Mesh"])
+    
+    # Age of each point in frames; negative until the scanner reaches it
+    scene_time = nodes.new(type='GeometryNodeInputSceneTime')
+    capture_frame = nodes.new(type='GeometryNodeInputNamedAttribute')
+    capture_frame.data_type = 'FLOAT'
+    capture_frame.inputs["Name"].default_value = "capture_frame"
+    age = add_math_node(nodes, links, 'SUBTRACT', scene_time.outputs["Frame"],
+                        get_enabled_socket(capture_frame.outputs))
+    
+    delete = nodes.new(type='GeometryNodeDeleteGeometry')
+    delete.domain = 'POINT'
+    links.new(to_points.outputs["Points"], delete.inputs["Geometry"])
+    links.new(add_math_node(nodes, links, 'LESS_THAN', age, 0.0), delete.inputs["Selection"])
+    
+    store_age = nodes.new(type='GeometryNodeStoreNamedAttribute')
+    store_age.data_type = 'FLOAT'
+    store_age.domain = 'POINT'
+    store_age.inputs["Name"].default_value = "scan_age"
+    links.new(delete.outputs["Geometry"], store_age.inputs["Geometry"])
+    links.new(age, get_enabled_socket(store_age.inputs, "Value"))
+    
+    set_material = nodes.new(type='GeometryNodeSetMaterial')
+    set_material.inputs["Material"].default_value = material
+    links.new(store_age.outputs["Geometry"], set_material.inputs["Geometry"])
+    links.new(set_material.outputs["Geometry"], group_output.inputs["Geometry"])
+    
+    return tree
+
+def create_scan_point_cloud(terrain, point_count=None):
+    """Create the captured scan as one point cloud revealed per point by its capture frame"""
+    if point_count is None:
+        point_count = SCAN_CLOUD_SETTINGS["point_count"]
+    
+    # Scanner returns from the terrain surface, with a little range noise
+    points = sample_surface_points(terrain, point_count, SCAN_CLOUD_SETTINGS["seed"])
+    rng = np.random.default_rng(SCAN_CLOUD_SETTINGS["seed"] + 1)
+    points += rng.normal(0.0, SCAN_CLOUD_SETTINGS["noise"], points.shape)
+    
+    # Vertices only: geometry nodes turn them into render points
+    scan_cloud = create_mesh_object("ScanPointCloud", points, np.empty((0, 3), dtype=np.int32))
+    attribute = scan_cloud.data.attributes.new("capture_frame", 'FLOAT', 'POINT')
+    attribute.data.foreach_set("value", np.full(point_count, NEVER_CAPTURED, dtype=np.float32))
+    
+    material = create_scan_point_material()
+    scan_cloud.data.materials.append(material)
+    modifier = scan_cloud.modifiers.new(name="ScanReveal", type='NODES')
+    modifier.node_group = create_scan_reveal_node_group(material)
+    
+    # Hidden until the scan phase starts
+    scan_cloud.hide_viewport = True
+    scan_cloud.hide_render = True
+    
+    return scan_cloud
+
 def create_printing_particles(garden_path):
     """Create particle effects for the 3D printing process"""
     # Create a particle system that follows the printed path
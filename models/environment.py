@@ -1,7 +1,11 @@
 import bpy
 import math
 import random
+import numpy as np
 from mathutils import Vector
+from config import ENVIRONMENT_SETTINGS
+from utils.mesh_utils import box_geometry, create_mesh_object
+from utils.scene_registry import add_part
 
 def create_backyard_environment():
     """Create a backyard environment with house corner, fence, and grass area"""
@@ -10,15 +14,10 @@ def create_backyard_environment():
     bpy.context.scene.collection.children.link(env_collection)
     
     # Create corner of house
-    house_width = 5.0
-    house_depth = 4.0
-    house_height = 3.5
-    
-    bpy.ops.mesh.primitive_cube_add(size=1.0, location=(house_width/2, house_depth/2, house_height/2))
-    house = bpy.context.object
-    house.name = "HouseCorner"
-    house.scale = (house_width, house_depth, house_height)
-    env_collection.objects.link(house)
+    house_settings = ENVIRONMENT_SETTINGS["house"]
+    house_width = house_settings["width"]
+    house_depth = house_settings["depth"]
+    house_height = house_settings["height"]
     
     # Create house material
     house_mat = bpy.data.materials.new(name="HouseMaterial")
@@ -27,22 +26,71 @@ def create_backyard_environment():
     principled = nodes["Principled BSDF"]
     principled.inputs["Base Color"].default_value = (0.9, 0.85, 0.8, 1.0)  # Light beige
     principled.inputs["Roughness"].default_value = 0.7
-    house.data.materials.append(house_mat)
+    
+    vertices, faces = box_geometry(
+        [(house_width/2, house_depth/2, house_height/2)],
+        [(house_width, house_depth, house_height)]
+    )
+    house = create_mesh_object("HouseCorner", vertices, faces, house_mat, env_collection)
+    add_part(None, "obstacles", house)
     
     # Create backyard fence
     create_backyard_fence(env_collection)
     
     # Create empty grass area (defined by dotted outline)
-    create_garden_outline()
+    create_garden_outline(env_collection)
     
     return env_collection
 
-def create_backyard_fence(collection):
-    """Create a wooden fence around the backyard"""
-    fence_height = 1.8
-    fence_length_1 = 12.0
-    fence_length_2 = 8.0
-    post_spacing = 2.0
+def get_fence_layout(polyline, post_spacing, height, post_width, plank_heights, plank_thickness, plank_width):
+    """Compute post and plank boxes for a fence running along a polyline"""
+    points = np.asarray(polyline, dtype=np.float32)[:, :2]
+    
+    post_centers, post_yaw = [], []
+    plank_centers, plank_sizes, plank_yaw = [], [], []
+    plank_heights = np.asarray(plank_heights, dtype=np.float32)
+    
+    for i, (start, end) in enumerate(zip(points[:-1], points[1:])):
+        segment = end - start
+        length = float(np.hypot(segment[0], segment[1]))
+        if length == 0:
+            continue
+        yaw = math.atan2(segment[1], segment[0])
+        bays = max(1, int(length / post_spacing))
+        
+        # Posts at bay boundaries; the corner post is shared with the previous segment
+        t = np.arange(bays + 1, dtype=np.float32) / bays
+        if i > 0:
+            t = t[1:]
+        posts_xy = start + t[:, None] * segment
+        post_centers.append(np.column_stack((posts_xy, np.full(len(t), height / 2))))
+        post_yaw.append(np.full(len(t), yaw))
+        
+        # Horizontal planks centered on each bay, one per plank height
+        bay_t = (np.arange(bays, dtype=np.float32) + 0.5) / bays
+        bay_xy = np.repeat(start + bay_t[:, None] * segment, len(plank_heights), axis=0)
+        bay_z = np.tile(plank_heights, bays)
+        plank_centers.append(np.column_stack((bay_xy, bay_z)))
+        plank_sizes.append(np.tile((length / bays, plank_thickness, plank_width), (len(bay_z), 1)))
+        plank_yaw.append(np.full(len(bay_z), yaw))
+    
+    posts = {
+        "centers": np.concatenate(post_centers),
+        "sizes": (post_width, post_width, height),
+        "yaw": np.concatenate(post_yaw)
+    }
+    planks = {
+        "centers": np.concatenate(plank_centers),
+        "sizes": np.concatenate(plank_sizes),
+        "yaw": np.concatenate(plank_yaw)
+    }
+    return posts, planks
+
+def create_backyard_fence(collection, polyline=None):
+    """Create a wooden fence along a polyline as a single batched mesh"""
+    fence_settings = ENVIRONMENT_SETTINGS["fence"]
+    if polyline is None:
+        polyline = fence_settings["polyline"]
     
     # Create fence material
     fence_mat = bpy.data.materials.new(name="FenceMaterial")
@@ -52,56 +100,35 @@ def create_backyard_fence(collection):
     principled.inputs["Base Color"].default_value = (0.6, 0.5, 0.4, 1.0)  # Wood brown
     principled.inputs["Roughness"].default_value = 0.9
     
-    # Create first fence segment (along x-axis)
-    for i in range(0, int(fence_length_1/post_spacing) + 1):
-        x_pos = i * post_spacing
-        # Create fence post
-        bpy.ops.mesh.primitive_cube_add(size=0.1, location=(x_pos, 0, fence_height/2))
-        post = bpy.context.object
-        post.name = f"FencePost_x_{i}"
-        post.scale = (0.1, 0.1, fence_height)
-        post.data.materials.append(fence_mat)
-        collection.objects.link(post)
-        
-        # Create horizontal planks between posts (except for last post)
-        if i < int(fence_length_1/post_spacing):
-            for j in range(3):  # Three horizontal planks
-                plank_height = 0.5 + j * 0.6
-                bpy.ops.mesh.primitive_cube_add(size=0.1, 
-                                               location=(x_pos + post_spacing/2, 0, plank_height))
-                plank = bpy.context.object
-                plank.name = f"FencePlank_x_{i}_{j}"
-                plank.scale = (post_spacing, 0.02, 0.1)
-                plank.data.materials.append(fence_mat)
-                collection.objects.link(plank)
-    
-    # Create second fence segment (along y-axis)
-    for i in range(0, int(fence_length_2/post_spacing) + 1):
-        y_pos = i * post_spacing
-        # Create fence post
-        bpy.ops.mesh.primitive_cube_add(size=0.1, location=(fence_length_1, y_pos, fence_height/2))
-        post = bpy.context.object
-        post.name = f"FencePost_y_{i}"
-        post.scale = (0.1, 0.1, fence_height)
-        post.data.materials.append(fence_mat)
-        collection.objects.link(post)
-        
-        # Create horizontal planks between posts (except for last post)
-        if i < int(fence_length_2/post_spacing):
-            for j in range(3):  # Three horizontal planks
-                plank_height = 0.5 + j * 0.6
-                bpy.ops.mesh.primitive_cube_add(size=0.1, 
-                                               location=(fence_length_1, y_pos + post_spacing/2, plank_height))
-                plank = bpy.context.object
-                plank.name = f"FencePlank_y_{i}_{j}"
-                plank.scale = (0.02, post_spacing, 0.1)
-                plank.data.materials.append(fence_mat)
-                collection.objects.link(plank)
+    posts, planks = get_fence_layout(
+        polyline,
+        fence_settings["post_spacing"],
+        fence_settings["height"],
+        fence_settings["post_width"],
+        fence_settings["plank_heights"],
+        fence_settings["plank_thickness"],
+        fence_settings["plank_width"]
+    )
+    
+    # Posts and planks share a material, so they go into one mesh
+    post_verts, post_faces = box_geometry(posts["centers"], posts["sizes"], posts["yaw"])
+    plank_verts, plank_faces = box_geometry(planks["centers"], planks["sizes"], planks["yaw"])
+    vertices = np.concatenate((post_verts, plank_verts))
+    faces = np.concatenate((post_faces, plank_faces + len(post_verts)))
+    
+    fence = create_mesh_object("Fence", vertices, faces, fence_mat, collection)
+    add_part(None, "obstacles", fence)
+    fence["post_count"] = len(posts["centers"])
+    fence["plank_count"] = len(planks["centers"])
+    
+    return fence
 
-def create_garden_outline():
+def create_garden_outline(collection=None):
     """Create a dotted outline for the garden bed"""
     # Create a rounded square/oval shape
-    bpy.ops.curve.primitive_bezier_circle_add(radius=3.0, location=(8, 4, 0.01))
+    outline_settings = ENVIRONMENT_SETTINGS["garden_outline"]
+    center_x, center_y = outline_settings["center"]
+    bpy.ops.curve.primitive_bezier_circle_add(radius=outline_settings["radius"], location=(center_x, center_y, 0.01))
     outline = bpy.context.object
     outline.name = "GardenOutline"
     
@@ -150,26 +177,19 @@ def create_garden_outline():
     
     outline.data.materials.append(outline_mat)
     
-    # Create fake dotted appearance by using small cubes along the path
-    # This simulates dotted line in a compatible way
-    points_count = 24
-    for i in range(points_count):
-        angle = i * (2 * math.pi / points_count)
-        radius = 3.0 + (0.2 if i % 2 == 0 else 0)  # Alternate slight radius variation
-        
-        # Calculate position
-        x = 8 + radius * math.cos(angle)
-        y = 4 + radius * math.sin(angle)
-        
-        # Create small cube for dot
-        if i % 2 == 0:  # Place marker every other position for dotted effect
-            bpy.ops.mesh.primitive_cube_add(
-                size=0.1,
-                location=(x, y, 0.01)
-            )
-            dot = bpy.context.object
-            dot.name = f"OutlineDot_{i}"
-            dot.data.materials.append(outline_mat)
+    # Create fake dotted appearance with small cubes along the path,
+    # batched into one mesh that shares the outline material
+    dot_count = outline_settings["dot_count"]
+    
+    angles = np.arange(dot_count) * (2 * math.pi / dot_count)
+    radius = outline_settings["radius"] + 0.2  # Dots sit slightly outside the outline
+    dot_centers = np.column_stack((
+        center_x + radius * np.cos(angles),
+        center_y + radius * np.sin(angles),
+        np.full(dot_count, 0.01)
+    ))
+    vertices, faces = box_geometry(dot_centers, outline_settings["dot_size"])
+    create_mesh_object("OutlineDots", vertices, faces, outline_mat, collection)
     
     return outline
 
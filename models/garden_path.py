@@ -1,7 +1,16 @@
 import bpy
 import math
+import numpy as np
 from mathutils import Vector
-from config import GARDEN_PATH_SETTINGS, MATERIAL_COLORS
+from config import GARDEN_PATH_SETTINGS, MATERIAL_COLORS, BORDER_MESH_SETTINGS, SOIL_FILL_SETTINGS
+from utils.curve_utils import sample_curve_by_arc_length
+from utils.mesh_utils import create_mesh_object, triangulate_polygon
+from utils.node_utils import add_frame_reveal
+from models.build_plan import register_builder
+
+# Printed parts stay hidden until their phase and remain in the finished garden
+register_builder("border", ["border", "filling", "completion"])
+register_builder("soil_fill", ["filling", "completion"])
 
 def create_garden_path(control_points=None):
     """Create the garden path that will be 3D printed with enhanced materials"""
@@ -82,6 +91,121 @@ def create_garden_path(control_points=None):
     
     return garden_path
 
+def get_border_sweep(samples, cyclic, half_width, layer_height, layer_count, profile_segments):
+    """Sweep stacked half-round beads along sampled path points; returns vertices, faces and face layer/sample"""
+    sample_count = len(samples)
+    
+    # Horizontal tangent and its left-hand normal at every sample
+    if cyclic:
+        tangent = np.roll(samples, -1, axis=0) - np.roll(samples, 1, axis=0)
+    else:
+        tangent = np.gradient(samples, axis=0)
+    tangent[:, 2] = 0.0
+    tangent /= np.maximum(np.linalg.norm(tangent, axis=1, keepdims=True), 1e-9)
+    side = np.column_stack((-tangent[:, 1], tangent[:, 0], np.zeros(sample_count)))
+    
+    # Bead profile from the left edge over the top to the right edge
+    angle = np.linspace(0.0, math.pi, profile_segments + 1)
+    lateral = np.cos(angle) * half_width
+    height = np.sin(angle) * layer_height
+    
+    layer_base = np.arange(layer_count) * layer_height
+    vertices = (samples[None, :, None, :]
+                + side[None, :, None, :] * lateral[None, None, :, None]
+                + np.array([0.0, 0.0, 1.0]) * (layer_base[:, None, None, None] + height[None, None, :, None]))
+    vertices = vertices.reshape(-1, 3)
+    
+    # Quads between consecutive rings, facing outwards
+    ring = profile_segments + 1
+    segments = sample_count if cyclic else sample_count - 1
+    layer, sample, j = np.meshgrid(np.arange(layer_count), np.arange(segments), np.arange(profile_segments),
+                                   indexing='ij')
+    a = (layer * sample_count + sample) * ring + j
+    b = (layer * sample_count + (sample + 1) % sample_count) * ring + j
+    faces = np.stack((a, a + 1, b + 1, b), axis=-1).reshape(-1, 4)
+    
+    return vertices, faces, layer.ravel(), sample.ravel()
+
+def create_border_mesh(garden_path):
+    """Build the printed border once as a mesh, with a per-face print progress for the reveal"""
+    settings = BORDER_MESH_SETTINGS
+    samples, arc, total, cyclic = sample_curve_by_arc_length(garden_path, settings["sample_spacing"])
+    layer_count = settings["layer_count"]
+    
+    vertices, faces, layer, sample = get_border_sweep(
+        samples, cyclic, settings["width"] / 2.0, settings["layer_height"],
+        layer_count, settings["profile_segments"])
+    
+    # The nozzle prints layer after layer, each one once around the path
+    progress = (layer + arc[sample] / total) / layer_count
+    
+    border_mat = garden_path.data.materials[0] if garden_path.data.materials else None
+    border = create_mesh_object("GardenBorder", vertices, faces, border_mat)
+    mesh = border.data
+    mesh.polygons.foreach_set("use_smooth", np.ones(len(mesh.polygons), dtype=bool))
+    mesh.attributes.new("print_progress", 'FLOAT', 'FACE').data.foreach_set("value", progress.astype(np.float32))
+    mesh.attributes.new("print_layer", 'INT', 'FACE').data.foreach_set("value", layer.astype(np.int32))
+    mesh.attributes.new("deposit_frame", 'FLOAT', 'FACE')
+    
+    if border_mat:
+        add_frame_reveal(border_mat, "deposit_frame")
+    
+    # The curve only defines the path from now on
+    garden_path.hide_viewport = True
+    garden_path.hide_render = True
+    border.hide_viewport = True
+    border.hide_render = True
+    
+    return border
+
+def set_reveal_frames(obj, frame_range, progress_name, frame_name):
+    """Map a per-face progress (0-1) attribute onto the frames of an animation phase"""
+    start_frame, end_frame = frame_range
+    mesh = obj.data
+    progress = np.empty(len(mesh.polygons), dtype=np.float32)
+    mesh.attributes[progress_name].data.foreach_get("value", progress)
+    frames = start_frame + progress * (end_frame - start_frame)
+    mesh.attributes[frame_name].data.foreach_set("value", frames.astype(np.float32))
+    mesh.update()
+    return frames
+
+def apply_border_material_properties(garden_path, props):
+    """Apply a border material variant (color, roughness, metallic) to the printed border"""
+    for slot in garden_path.material_slots:
+        mat = slot.material
+        if not mat or not mat.use_nodes:
+            continue
+        
+        nodes = mat.node_tree.nodes
+        links = mat.node_tree.links
+        bsdf = nodes.get("Principled BSDF")
+        if not bsdf:
+            continue
+        
+        base_color = bsdf.inputs["Base Color"]
+        if base_color.is_linked:
+            # Procedural color: tint it relative to the concrete it was designed for
+            tint = nodes.get("BorderTint")
+            if not tint:
+                tint = nodes.new(type='ShaderNodeMixRGB')
+                tint.name = "BorderTint"
+                tint.blend_type = 'MULTIPLY'
+                tint.inputs[0].default_value = 1.0
+                links.new(base_color.links[0].from_socket, tint.inputs[1])
+                links.new(tint.outputs["Color"], base_color)
+            reference = MATERIAL_COLORS["concrete"]
+            tint.inputs[2].default_value = (
+                props["color"][0] / reference[0],
+                props["color"][1] / reference[1],
+                props["color"][2] / reference[2],
+                1.0
+            )
+        else:
+            base_color.default_value = props["color"]
+        
+        bsdf.inputs["Roughness"].default_value = props["roughness"]
+        bsdf.inputs["Metallic"].default_value = props["metallic"]
+
 def create_soil_fill(garden_path):
     """Create the soil that will fill the garden bed with enhanced appearance"""
     # Create a copy of the garden path for the soil fill
@@ -135,6 +259,73 @@ def create_soil_fill(garden_path):
     
     return soil_fill
 
+def get_soil_layers(outline, triangles, layer_height, layer_count):
+    """Stack extruded copies of a triangulated CCW outline; returns vertices, faces, face sizes, face layers"""
+    count = len(outline)
+    ring = np.arange(count)
+    
+    vertices = []
+    faces = []
+    sizes = []
+    layers = []
+    for layer in range(layer_count):
+        offset = 2 * count * layer
+        bottom = outline + (0.0, 0.0, layer * layer_height)
+        top = outline + (0.0, 0.0, (layer + 1) * layer_height)
+        vertices.extend((bottom, top))
+        
+        # Top cap from the triangulation, side walls facing outwards
+        cap = triangles + offset + count
+        walls = np.column_stack((ring, (ring + 1) % count, (ring + 1) % count + count, ring + count)) + offset
+        faces.extend((cap.ravel(), walls.ravel()))
+        sizes.extend((np.full(len(cap), 3), np.full(count, 4)))
+        layers.append(np.full(len(cap) + count, layer))
+    
+    return (np.vstack(vertices), np.concatenate(faces), np.concatenate(sizes), np.concatenate(layers))
+
+def get_bed_outline(garden_path, spacing=None, inset=None):
+    """Counter-clockwise (N, 3) outline of the bed interior, pulled inwards to the inner face of the border"""
+    settings = SOIL_FILL_SETTINGS
+    if spacing is None:
+        spacing = settings["sample_spacing"]
+    if inset is None:
+        inset = settings["inset"]
+    samples, _arc, _total, _cyclic = sample_curve_by_arc_length(garden_path, spacing)
+    
+    signed_area = np.sum(samples[:, 0] * np.roll(samples[:, 1], -1) - np.roll(samples[:, 0], -1) * samples[:, 1])
+    if signed_area < 0.0:
+        samples = samples[::-1].copy()
+    tangent = np.roll(samples, -1, axis=0) - np.roll(samples, 1, axis=0)
+    tangent[:, 2] = 0.0
+    tangent /= np.maximum(np.linalg.norm(tangent, axis=1, keepdims=True), 1e-9)
+    inward = np.column_stack((-tangent[:, 1], tangent[:, 0], np.zeros(len(samples))))
+    return samples + inward * inset
+
+def create_soil_fill_mesh(garden_path):
+    """Create the soil filling the bed interior as stacked layers of the triangulated outline"""
+    settings = SOIL_FILL_SETTINGS
+    outline = get_bed_outline(garden_path)
+    
+    triangles = triangulate_polygon(outline[:, :2])
+    vertices, faces, sizes, layer = get_soil_layers(
+        outline, triangles, settings["layer_height"], settings["layer_count"])
+    
+    soil_mat = create_enhanced_soil_material()
+    soil_fill = create_mesh_object("SoilFill", vertices, faces, soil_mat, face_sizes=sizes)
+    
+    mesh = soil_fill.data
+    progress = (layer / settings["layer_count"]).astype(np.float32)
+    mesh.attributes.new("fill_progress", 'FLOAT', 'FACE').data.foreach_set("value", progress)
+    mesh.attributes.new("fill_layer", 'INT', 'FACE').data.foreach_set("value", layer.astype(np.int32))
+    mesh.attributes.new("fill_frame", 'FLOAT', 'FACE')
+    add_frame_reveal(soil_mat, "fill_frame")
+    
+    # Hide soil initially
+    soil_fill.hide_viewport = True
+    soil_fill.hide_render = True
+    
+    return soil_fill
+
 def create_seed_placement(garden_path):
     """Create visual markers for seed placement"""
     # Create a collection for seeds
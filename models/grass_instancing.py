@@ -0,0 +1,249 @@
+import bpy
+import math
+import numpy as np
+from config import GRASS_SETTINGS, MATERIAL_COLORS
+from materials.terrain_materials import create_grass_area_group
+from utils.mesh_utils import create_mesh_object
+from utils.camera_utils import get_camera_frustum_tangents
+from utils.node_utils import add_math_node, add_value_node, get_enabled_socket
+
+# Point attribute on the instancer's mesh output holding the instance count of the frame
+GRASS_COUNT_ATTRIBUTE = "grass_instance_count"
+
+def create_grass_blade_meshes(grass_mat):
+    """Create a detailed and a low-detail grass blade used as instances"""
+    # Detailed blade: tapered strip with a forward bend
+    segments = 4
+    t = np.linspace(0.0, 1.0, segments + 1)
+    half_width = 0.012 * (1.0 - t) + 0.001
+    bend = 0.15 * t ** 2
+    left = np.column_stack((-half_width, bend, t))
+    right = np.column_stack((half_width, bend, t))
+    vertices = np.empty((2 * (segments + 1), 3), dtype=np.float32)
+    vertices[0::2] = left
+    vertices[1::2] = right
+    rows = np.arange(segments) * 2
+    faces = np.column_stack((rows, rows + 1, rows + 3, rows + 2))
+    blade_high = create_mesh_object("GrassBladeHigh", vertices, faces, grass_mat)
+
+    # Low-detail blade: a single triangle for distant grass
+    vertices = np.array([(-0.012, 0, 0), (0.012, 0, 0), (0, 0.15, 1.0)], dtype=np.float32)
+    blade_low = create_mesh_object("GrassBladeLow", vertices, np.array([(0, 1, 2)]), grass_mat)
+
+    # Only used as instance sources
+    for blade in (blade_high, blade_low):
+        blade.hide_render = True
+        blade.hide_viewport = True
+
+    return blade_high, blade_low
+
+def create_grass_node_group(terrain, camera, blade_high, blade_low):
+    """Build the Geometry Nodes tree that distributes and culls grass blades"""
+    tree = bpy.data.node_groups.new("GrassInstancing", 'GeometryNodeTree')
+    tree.inputs.new('NodeSocketGeometry', "Geometry")
+    tree.outputs.new('NodeSocketGeometry', "Geometry")
+    nodes = tree.nodes
+    links = tree.links
+
+    group_output = nodes.new(type='NodeGroupOutput')
+    nodes.new(type='NodeGroupInput')
+
+    # Source surface and the animated camera
+    terrain_info = nodes.new(type='GeometryNodeObjectInfo')
+    terrain_info.transform_space = 'RELATIVE'
+    terrain_info.inputs["Object"].default_value = terrain
+
+    camera_info = nodes.new(type='GeometryNodeObjectInfo')
+    camera_info.transform_space = 'RELATIVE'
+    camera_info.inputs["Object"].default_value = camera
+
+    # Frustum and distance settings live in named Value nodes
+    tan_x, tan_y = get_camera_frustum_tangents(camera, bpy.context.scene)
+    margin = GRASS_SETTINGS["frustum_margin"]
+    tan_x_out = add_value_node(nodes, "FrustumTanX", tan_x * (1.0 + margin))
+    tan_y_out = add_value_node(nodes, "FrustumTanY", tan_y * (1.0 + margin))
+
+    # Point position in camera space (camera looks down -Z)
+    position = nodes.new(type='GeometryNodeInputPosition')
+    offset = nodes.new(type='ShaderNodeVectorMath')
+    offset.operation = 'SUBTRACT'
+    links.new(position.outputs["Position"], offset.inputs[0])
+    links.new(camera_info.outputs["Location"], offset.inputs[1])
+
+    to_camera = nodes.new(type='ShaderNodeVectorRotate')
+    to_camera.rotation_type = 'EULER_XYZ'
+    to_camera.invert = True
+    links.new(offset.outputs["Vector"], to_camera.inputs["Vector"])
+    links.new(camera_info.outputs["Rotation"], to_camera.inputs["Rotation"])
+
+    separate = nodes.new(type='ShaderNodeSeparateXYZ')
+    links.new(to_camera.outputs["Vector"], separate.inputs["Vector"])
+
+    depth = add_math_node(nodes, links, 'MULTIPLY', separate.outputs["Z"], -1.0)
+    margin_abs = GRASS_SETTINGS["frustum_margin_distance"]
+
+    # Inside the widened frustum: |x| < depth * tan_x + margin, same for y, in front of camera
+    limit_x = add_math_node(nodes, links, 'MULTIPLY_ADD', depth, tan_x_out)
+    limit_x.node.inputs[2].default_value = margin_abs
+    limit_y = add_math_node(nodes, links, 'MULTIPLY_ADD', depth, tan_y_out)
+    limit_y.node.inputs[2].default_value = margin_abs
+    inside_x = add_math_node(nodes, links, 'LESS_THAN', add_math_node(nodes, links, 'ABSOLUTE', separate.outputs["X"]), limit_x)
+    inside_y = add_math_node(nodes, links, 'LESS_THAN', add_math_node(nodes, links, 'ABSOLUTE', separate.outputs["Y"]), limit_y)
+    in_front = add_math_node(nodes, links, 'GREATER_THAN', depth, -margin_abs)
+    visible = add_math_node(nodes, links, 'MULTIPLY', add_math_node(nodes, links, 'MULTIPLY', inside_x, inside_y), in_front)
+
+    # Density falls off with distance to the camera
+    distance = nodes.new(type='ShaderNodeVectorMath')
+    distance.operation = 'LENGTH'
+    links.new(offset.outputs["Vector"], distance.inputs[0])
+
+    falloff = nodes.new(type='ShaderNodeMapRange')
+    falloff.clamp = True
+    links.new(distance.outputs["Value"], falloff.inputs["Value"])
+    falloff.inputs["From Min"].default_value = GRASS_SETTINGS["near_distance"]
+    falloff.inputs["From Max"].default_value = GRASS_SETTINGS["far_distance"]
+    falloff.inputs["To Min"].default_value = 1.0
+    falloff.inputs["To Max"].default_value = GRASS_SETTINGS["min_density_factor"]
+
+    # Existing GrassArea weights drive the base density
+    grass_area = nodes.new(type='GeometryNodeInputNamedAttribute')
+    grass_area.data_type = 'FLOAT'
+    grass_area.inputs["Name"].default_value = "GrassArea"
+
+    density = add_math_node(nodes, links, 'MULTIPLY', get_enabled_socket(grass_area.outputs), GRASS_SETTINGS["max_density"])
+    density = add_math_node(nodes, links, 'MULTIPLY', density, falloff.outputs["Result"])
+    density = add_math_node(nodes, links, 'MULTIPLY', density, visible)
+
+    distribute = nodes.new(type='GeometryNodeDistributePointsOnFaces')
+    distribute.distribute_method = 'RANDOM'
+    distribute.inputs["Seed"].default_value = GRASS_SETTINGS["seed"]
+    links.new(terrain_info.outputs["Geometry"], distribute.inputs["Mesh"])
+    links.new(density, distribute.inputs["Density"])
+
+    # Random blade orientation and size
+    random_angle = nodes.new(type='FunctionNodeRandomValue')
+    random_angle.data_type = 'FLOAT'
+    get_enabled_socket(random_angle.inputs, "Max").default_value = 2 * math.pi
+    rotation = nodes.new(type='ShaderNodeCombineXYZ')
+    links.new(get_enabled_socket(random_angle.outputs), rotation.inputs["Z"])
+
+    random_scale = nodes.new(type='FunctionNodeRandomValue')
+    random_scale.data_type = 'FLOAT'
+    random_scale.inputs["Seed"].default_value = 1
+    get_enabled_socket(random_scale.inputs, "Min").default_value = 0.7 * GRASS_SETTINGS["blade_length"]
+    get_enabled_socket(random_scale.inputs, "Max").default_value = 1.3 * GRASS_SETTINGS["blade_length"]
+
+    # Blade detail switches to the cheap blade beyond the LOD distance.
+    # Culling is re-evaluated per point so blades on partially visible faces are dropped too.
+    is_far = add_math_node(nodes, links, 'GREATER_THAN', distance.outputs["Value"], GRASS_SETTINGS["lod_distance"])
+    near_selection = add_math_node(nodes, links, 'MULTIPLY', visible, add_math_node(nodes, links, 'SUBTRACT', 1.0, is_far))
+    far_selection = add_math_node(nodes, links, 'MULTIPLY', visible, is_far)
+
+    join = nodes.new(type='GeometryNodeJoinGeometry')
+    for blade, selection in ((blade_high, near_selection), (blade_low, far_selection)):
+        blade_info = nodes.new(type='GeometryNodeObjectInfo')
+        blade_info.inputs["Object"].default_value = blade
+
+        instance = nodes.new(type='GeometryNodeInstanceOnPoints')
+        links.new(distribute.outputs["Points"], instance.inputs["Points"])
+        links.new(selection, instance.inputs["Selection"])
+        links.new(blade_info.outputs["Geometry"], instance.inputs["Instance"])
+        links.new(rotation.outputs["Vector"], instance.inputs["Rotation"])
+        links.new(get_enabled_socket(random_scale.outputs), instance.inputs["Scale"])
+        links.new(instance.outputs["Instances"], join.inputs["Geometry"])
+
+    # One loose vertex carries the instance count, so it can be read without walking the instances
+    instance_count = nodes.new(type='GeometryNodeAttributeDomainSize')
+    instance_count.component = 'INSTANCES'
+    links.new(join.outputs["Geometry"], instance_count.inputs["Geometry"])
+    count_point = nodes.new(type='GeometryNodeMeshLine')
+    count_point.inputs["Count"].default_value = 1
+    store_count = nodes.new(type='GeometryNodeStoreNamedAttribute')
+    store_count.data_type = 'INT'
+    store_count.domain = 'POINT'
+    store_count.inputs["Name"].default_value = GRASS_COUNT_ATTRIBUTE
+    links.new(count_point.outputs["Mesh"], store_count.inputs["Geometry"])
+    links.new(instance_count.outputs["Instance Count"], get_enabled_socket(store_count.inputs, "Value"))
+    join_count = nodes.new(type='GeometryNodeJoinGeometry')
+    links.new(join.outputs["Geometry"], join_count.inputs["Geometry"])
+    links.new(store_count.outputs["Geometry"], join_count.inputs["Geometry"])
+
+    links.new(join_count.outputs["Geometry"], group_output.inputs["Geometry"])
+
+    # Lay the nodes out left to right in creation order
+    for i, node in enumerate(nodes):
+        node.location = (i * 180 - 2000, 0)
+    group_output.location = (len(nodes) * 180 - 2000, 0)
+
+    return tree
+
+def create_grass_instancing(terrain, camera=None):
+    """Create camera-culled Geometry Nodes grass on the terrain"""
+    if camera is None:
+        camera = bpy.context.scene.camera
+
+    # Grass is placed by the same weights as the particle grass
+    create_grass_area_group(terrain)
+
+    # Create grass material
+    grass_mat = bpy.data.materials.new(name="GrassMaterial")
+    grass_mat.use_nodes = True
+    bsdf = grass_mat.node_tree.nodes["Principled BSDF"]
+    bsdf.inputs["Base Color"].default_value = MATERIAL_COLORS["grass"]
+    bsdf.inputs["Roughness"].default_value = 0.9
+
+    blade_high, blade_low = create_grass_blade_meshes(grass_mat)
+
+    # Empty mesh object that only carries the grass modifier
+    instancer = create_mesh_object("GrassInstancer", np.zeros((0, 3)), np.zeros((0, 3)))
+    modifier = instancer.modifiers.new(name="GrassInstancing", type='NODES')
+    modifier.node_group = create_grass_node_group(terrain, camera, blade_high, blade_low)
+
+    return instancer
+
+def update_grass_frustum(instancer, camera=None):
+    """Refresh the frustum after changing the camera lens or the render resolution"""
+    scene = bpy.context.scene
+    if camera is None:
+        camera = scene.camera
+
+    tree = instancer.modifiers["GrassInstancing"].node_group
+    tan_x, tan_y = get_camera_frustum_tangents(camera, scene)
+    margin = GRASS_SETTINGS["frustum_margin"]
+    tree.nodes["FrustumTanX"].outputs[0].default_value = tan_x * (1.0 + margin)
+    tree.nodes["FrustumTanY"].outputs[0].default_value = tan_y * (1.0 + margin)
+
+def count_grass_instances(instancer, depsgraph=None):
+    """Grass instances generated for the current frame, as counted by the node tree"""
+    if depsgraph is None:
+        depsgraph = bpy.context.evaluated_depsgraph_get()
+
+    attribute = instancer.evaluated_get(depsgraph).data.attributes.get(GRASS_COUNT_ATTRIBUTE)
+    if attribute is None or not len(attribute.data):
+        return 0
+    return attribute.data[0].value
+
+def report_grass_instance_counts(instancer, frame_range):
+    """Evaluate every frame in the range and return its grass instance count"""
+    scene = bpy.context.scene
+    orig_frame = scene.frame_current
+    start_frame, end_frame = frame_range
+
+    counts = {}
+    for frame in range(start_frame, end_frame + 1):
+        scene.frame_set(frame)
+        counts[frame] = count_grass_instances(instancer)
+        print(f"Frame {frame}: {counts[frame]} grass instances")
+
+    scene.frame_set(orig_frame)
+    return counts
+
+def get_grass_instance_reporter(instancer):
+    """Telemetry field reporting the grass instance count of each rendered frame"""
+    instancer_name = instancer.name
+
+    def grass_instance_reporter(scene, depsgraph=None):
+        obj = bpy.data.objects.get(instancer_name)
+        return count_grass_instances(obj, depsgraph) if obj else None
+
+    return grass_instance_reporter
@@ -0,0 +1,226 @@
+import bpy
+import numpy as np
+from mathutils import Matrix, Vector
+from config import LOD_SETTINGS
+from utils.camera_utils import get_screen_fraction
+from utils.keyframe_utils import evaluate_matrix_world
+from utils.mesh_utils import create_mesh_object
+from utils.node_utils import add_object_fade
+
+# Registered LOD groups by name, each with its anchor object and detail levels
+LOD_GROUPS = {}
+
+# Per-object custom property the level materials read to fade an object out (0 opaque, 1 gone)
+LOD_FADE_PROPERTY = "lod_hide"
+
+def get_matrix_to_root(obj, root):
+    """Transform from an object's local space into the space of a hierarchy root"""
+    matrix = Matrix.Identity(4)
+    while obj is not None and obj != root:
+        matrix = obj.matrix_parent_inverse @ obj.matrix_basis @ matrix
+        obj = obj.parent
+    return matrix
+
+def get_bounds_in_root_space(root, objects):
+    """Axis-aligned bounds of each object, expressed in the root's local space"""
+    bounds = []
+    for obj in objects:
+        matrix = get_matrix_to_root(obj, root)
+        corners = np.array([tuple(matrix @ Vector(corner)) for corner in obj.bound_box])
+        bounds.append((corners.min(axis=0), corners.max(axis=0)))
+    return bounds
+
+def get_part_arrays(obj, matrix, depsgraph):
+    """Vertices (in the given space), loop vertices, face sizes, smooth flags and slot indices of an evaluated part"""
+    mesh = bpy.data.meshes.new_from_object(obj.evaluated_get(depsgraph))
+    mesh.transform(matrix)
+    vertices = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", vertices)
+    loops = np.empty(len(mesh.loops), dtype=np.int32)
+    mesh.loops.foreach_get("vertex_index", loops)
+    sizes = np.empty(len(mesh.polygons), dtype=np.int32)
+    mesh.polygons.foreach_get("loop_total", sizes)
+    smooth = np.empty(len(mesh.polygons), dtype=bool)
+    mesh.polygons.foreach_get("use_smooth", smooth)
+    slots = np.empty(len(mesh.polygons), dtype=np.int32)
+    mesh.polygons.foreach_get("material_index", slots)
+    bpy.data.meshes.remove(mesh)
+    return vertices.reshape(-1, 3), loops, sizes, smooth, slots
+
+def create_decimated_proxy(name, root, objects, ratio, min_size=0.0):
+    """Create a low-detail stand-in: the parts joined into one mesh with their own materials, then decimated"""
+    depsgraph = bpy.context.evaluated_depsgraph_get()
+    bounds = get_bounds_in_root_space(root, objects)
+    materials = []
+    vertices, loops, sizes, smooth, material_indices = [], [], [], [], []
+    offset = 0
+    for obj, (low, high) in zip(objects, bounds):
+        # Small parts (LEDs, connectors, nozzles) are dropped from the proxy
+        if (high - low).max() < min_size:
+            continue
+        part_vertices, part_loops, part_sizes, part_smooth, part_slots = get_part_arrays(
+            obj, get_matrix_to_root(obj, root), depsgraph)
+
+        # Slots of the part map onto the proxy's shared material list
+        slot_materials = [slot.material for slot in obj.material_slots] or [None]
+        for material in slot_materials:
+            if material not in materials:
+                materials.append(material)
+        slot_map = np.array([materials.index(material) for material in slot_materials], dtype=np.int32)
+
+        vertices.append(part_vertices)
+        loops.append(part_loops + offset)
+        sizes.append(part_sizes)
+        smooth.append(part_smooth)
+        material_indices.append(slot_map[np.minimum(part_slots, len(slot_map) - 1)])
+        offset += len(part_vertices)
+
+    proxy = create_mesh_object(name, np.vstack(vertices), np.concatenate(loops), face_sizes=np.concatenate(sizes))
+    mesh = proxy.data
+    for material in materials:
+        mesh.materials.append(material)
+    mesh.polygons.foreach_set("material_index", np.concatenate(material_indices))
+    mesh.polygons.foreach_set("use_smooth", np.concatenate(smooth))
+    mesh.update()
+
+    decimate = proxy.modifiers.new(name="Decimate", type='DECIMATE')
+    decimate.ratio = ratio
+    proxy.parent = root
+    return proxy
+
+def register_lod_group(name, anchor, levels, thresholds):
+    """Register detail levels (finest first) that follow an anchor object"""
+    # Bounding sphere of the finest level, in anchor space
+    bounds = get_bounds_in_root_space(anchor, levels[0])
+    low = np.min([b[0] for b in bounds], axis=0)
+    high = np.max([b[1] for b in bounds], axis=0)
+
+    # Every material of every level can fade its object in and out across a switch
+    for objects in levels:
+        for obj in objects:
+            obj[LOD_FADE_PROPERTY] = 0.0
+            for slot in obj.material_slots:
+                if slot.material and slot.material.use_nodes:
+                    add_object_fade(slot.material, LOD_FADE_PROPERTY)
+
+    LOD_GROUPS[name] = {
+        "anchor": anchor,
+        "levels": levels,
+        "thresholds": list(thresholds)[:len(levels) - 1],
+        "center": Vector(((low + high) / 2.0).tolist()),
+        "radius": float(np.linalg.norm(high - low) / 2.0)
+    }
+    return LOD_GROUPS[name]
+
+def choose_lod_level(fraction, current, thresholds, hysteresis):
+    """Pick a detail level for a screen fraction, with a hysteresis band against flicker"""
+    if current is None:
+        return sum(1 for threshold in thresholds if fraction < threshold)
+
+    level = current
+    while level < len(thresholds) and fraction < thresholds[level] * (1.0 - hysteresis):
+        level += 1
+    while level > 0 and fraction > thresholds[level - 1] * (1.0 + hysteresis):
+        level -= 1
+    return level
+
+def key_lod_level(objects, shown, frame, hide=None):
+    """Key the render visibility and fade of a level's objects at a frame"""
+    for obj in objects:
+        obj.hide_viewport = not shown
+        obj.hide_render = not shown
+        obj.keyframe_insert(data_path="hide_viewport", frame=frame)
+        obj.keyframe_insert(data_path="hide_render", frame=frame)
+        if hide is not None:
+            obj[LOD_FADE_PROPERTY] = hide
+            obj.keyframe_insert(data_path=f'["{LOD_FADE_PROPERTY}"]', frame=frame)
+
+def set_lod_visibility(group, level, frame):
+    """Key visibility so only the chosen level renders from this frame on"""
+    for i, objects in enumerate(group["levels"]):
+        key_lod_level(objects, i == level, frame, 0.0 if i == level else 1.0)
+
+def key_lod_cross_fade(group, old_level, new_level, fade_start, switch_frame):
+    """Fade the new level in over the first half of the span, then the old level out, so neither pops"""
+    incoming = group["levels"][new_level]
+    outgoing = group["levels"][old_level]
+    if fade_start >= switch_frame:
+        key_lod_level(incoming, True, switch_frame, 0.0)
+        key_lod_level(outgoing, False, switch_frame, 1.0)
+        return
+
+    # One level stays opaque at all times, so the background never shows through
+    middle = (fade_start + switch_frame) / 2.0
+    key_lod_level(incoming, True, fade_start, 1.0)
+    key_lod_level(outgoing, True, fade_start, 0.0)
+    for obj in incoming:
+        obj[LOD_FADE_PROPERTY] = 0.0
+        obj.keyframe_insert(data_path=f'["{LOD_FADE_PROPERTY}"]', frame=middle)
+    for obj in outgoing:
+        obj[LOD_FADE_PROPERTY] = 0.0
+        obj.keyframe_insert(data_path=f'["{LOD_FADE_PROPERTY}"]', frame=middle)
+    key_lod_level(outgoing, False, switch_frame, 1.0)
+
+def get_fade_start(fractions, frames, index, old_level, new_level, thresholds, hysteresis, earliest):
+    """First frame of a switch's cross-fade: where the screen size entered the hysteresis band it has now left"""
+    threshold = thresholds[old_level] if new_level > old_level else thresholds[old_level - 1]
+    # Going coarser the band is entered from above, going finer from below
+    entry = threshold * (1.0 + hysteresis) if new_level > old_level else threshold * (1.0 - hysteresis)
+    start = index
+    while start > 0 and frames[start - 1] >= earliest:
+        fraction = fractions[start - 1]
+        if (fraction >= entry) if new_level > old_level else (fraction <= entry):
+            break
+        start -= 1
+    return max(frames[start], frames[index] - LOD_SETTINGS["max_fade_frames"])
+
+def select_lod_levels(frame_range=None, camera=None):
+    """Choose a detail level per frame from projected screen size and key cross-fades between levels"""
+    scene = bpy.context.scene
+    if camera is None:
+        camera = scene.camera
+    if frame_range is None:
+        frame_range = (scene.frame_start, scene.frame_end)
+
+    start_frame, end_frame = frame_range
+    hysteresis = LOD_SETTINGS["hysteresis"]
+    min_hold = LOD_SETTINGS["min_hold_frames"]
+    frames = list(range(start_frame, end_frame + 1))
+
+    # Camera and anchors are read from their F-curves, so no frame is evaluated
+    camera_matrices = [evaluate_matrix_world(camera, frame) for frame in frames]
+
+    switches = {}
+    for name, group in LOD_GROUPS.items():
+        fractions = []
+        for frame, camera_matrix in zip(frames, camera_matrices):
+            anchor_matrix = evaluate_matrix_world(group["anchor"], frame)
+            center = anchor_matrix @ group["center"]
+            radius = group["radius"] * max(anchor_matrix.to_scale())
+            fractions.append(get_screen_fraction(camera, scene, center, radius, camera_matrix))
+
+        current = None
+        last_switch = None
+        switches[name] = []
+        for index, frame in enumerate(frames):
+            level = choose_lod_level(fractions[index], current, group["thresholds"], hysteresis)
+            if level == current:
+                continue
+
+            if current is None:
+                set_lod_visibility(group, level, frame)
+            else:
+                # Hold a level for a few frames so quick camera moves don't flicker
+                if frame - last_switch < min_hold:
+                    continue
+                fade_start = get_fade_start(fractions, frames, index, current, level, group["thresholds"],
+                                            hysteresis, last_switch + 1)
+                key_lod_cross_fade(group, current, level, fade_start, frame)
+                switches[name].append((frame, level))
+
+            current = level
+            last_switch = frame
+
+    total = sum(len(s) for s in switches.values())
+    print(f"LOD selection: {len(LOD_GROUPS)} groups, {total} level switches")
+    return switches
@@ -2,6 +2,12 @@ import bpy
 import math
 import random
 from mathutils import Vector
+from config import LOD_SETTINGS
+from models.lod import create_decimated_proxy, register_lod_group
+from models.build_plan import register_builder
+
+# Plants only grow in at the end; their shadows can reach into the view
+register_builder("plants", ["completion"], bounds=((8, 4, 0.3), 3.0), affects_lighting=True)
 
 def create_garden_plants():
     """Create plants that will grow in the garden bed"""
@@ -185,4 +191,18 @@ def animate_plant_growth(plants, start_frame, end_frame):
         for fcurve in fcurves:
             for kfp in fcurve.keyframe_points:
                 kfp.interpolation = 'ELASTIC'
-                kfp.easing = 'EASE_OUT'
\ No newline at end of file
+                kfp.easing = 'EASE_OUT'
+
+def create_plant_lods(plants):
+    """Register each plant with a decimated copy as its low detail level"""
+    groups = []
+    for plant in plants:
+        detailed = [obj for obj in plant.children_recursive if obj.type == 'MESH']
+        if not detailed:
+            continue
+        
+        proxy = create_decimated_proxy(f"{plant.name}_LOD1", plant, detailed, LOD_SETTINGS["plant_decimate_ratio"])
+        groups.append(register_lod_group(plant.name, plant, [detailed, [proxy]],
+                                         LOD_SETTINGS["plant_thresholds"]))
+    
+    return groups
@@ -1,7 +1,12 @@
 import bpy
 import math
+import random
 from mathutils import Vector
-from config import ROBOT_DIMENSIONS, MATERIAL_COLORS
+from config import ROBOT_DIMENSIONS, MATERIAL_COLORS, LOD_SETTINGS, ANIMATION_FRAMES
+from models.lod import create_decimated_proxy, register_lod_group
+from utils.scene_registry import register_part, add_part, get_part, get_parts, copy_parts
+from utils.keyframe_reduction import add_cycles_modifier
+from animation.timeline import get_phase_frame
 
 def create_robot():
     """Create the mobile 3D printing robot"""
@@ -73,6 +78,7 @@ def create_robot():
     chassis.name = "RobotChassis"
     chassis.scale = (chassis_dims["width"], chassis_dims["length"], chassis_dims["height"])
     chassis.parent = robot_empty
+    register_part(robot_empty, "chassis", chassis)
     
     # Assign material to chassis
     if chassis.data.materials:
@@ -82,11 +88,12 @@ def create_robot():
     
     # Create tracks (left)
     track_dims = ROBOT_DIMENSIONS["tracks"]
-    bpy.ops.mesh.primitive_cube_add(size=1, location=(-0.8, 0, 0.15))
+    bpy.ops.mesh.primitive_cube_add(size=1, location=(-track_dims["offset"], 0, 0.15))
     track_left = bpy.context.object
     track_left.name = "TrackLeft"
     track_left.scale = (track_dims["width"], track_dims["length"], track_dims["height"])
     track_left.parent = robot_empty
+    register_part(robot_empty, "track_left", track_left)
     
     # Assign material to left track
     if track_left.data.materials:
@@ -95,11 +102,12 @@ def create_robot():
         track_left.data.materials.append(metal_dark)
     
     # Create tracks (right)
-    bpy.ops.mesh.primitive_cube_add(size=1, location=(0.8, 0, 0.15))
+    bpy.ops.mesh.primitive_cube_add(size=1, location=(track_dims["offset"], 0, 0.15))
     track_right = bpy.context.object
     track_right.name = "TrackRight"
     track_right.scale = (track_dims["width"], track_dims["length"], track_dims["height"])
     track_right.parent = robot_empty
+    register_part(robot_empty, "track_right", track_right)
     
     # Assign material to right track
     if track_right.data.materials:
@@ -114,6 +122,7 @@ def create_robot():
     body.name = "RobotBody"
     body.scale = (body_dims["width"], body_dims["length"], body_dims["height"])
     body.parent = robot_empty
+    register_part(robot_empty, "body", body)
     
     # Assign material to body
     if body.data.materials:
@@ -132,6 +141,7 @@ def create_robot():
     clay_container = bpy.context.object
     clay_container.name = "ClayContainer"
     clay_container.parent = robot_empty
+    add_part(robot_empty, "containers", clay_container)
     
     # Assign material to clay container
     if clay_container.data.materials:
@@ -149,6 +159,7 @@ def create_robot():
     soil_container = bpy.context.object
     soil_container.name = "SoilContainer"
     soil_container.parent = robot_empty
+    add_part(robot_empty, "containers", soil_container)
     
     # Assign material to soil container
     if soil_container.data.materials:
@@ -166,6 +177,7 @@ def create_robot():
     concrete_container = bpy.context.object
     concrete_container.name = "ConcreteContainer"
     concrete_container.parent = robot_empty
+    add_part(robot_empty, "containers", concrete_container)
     
     # Assign material to concrete container
     if concrete_container.data.materials:
@@ -178,6 +190,7 @@ def create_robot():
     scanner_mast = bpy.context.object
     scanner_mast.name = "ScannerMast"
     scanner_mast.parent = robot_empty
+    register_part(robot_empty, "scanner_mast", scanner_mast)
     
     # Assign material to scanner mast
     if scanner_mast.data.materials:
@@ -190,6 +203,7 @@ def create_robot():
     scanner_head = bpy.context.object
     scanner_head.name = "ScannerHead"
     scanner_head.parent = robot_empty
+    register_part(robot_empty, "scanner_head", scanner_head)
     
     # Assign material to scanner head
     if scanner_head.data.materials:
@@ -204,6 +218,7 @@ def create_robot():
     arm_base.name = "ArmBase"
     arm_base.scale = (arm_dims["width"] * 3, arm_dims["width"], 0.1)
     arm_base.parent = robot_empty
+    register_part(robot_empty, "arm_base", arm_base)
     
     # Assign material to arm base
     if arm_base.data.materials:
@@ -217,6 +232,7 @@ def create_robot():
     arm_extension.name = "ArmExtension"
     arm_extension.scale = (0.1, 0.3, 0.1)
     arm_extension.parent = robot_empty
+    register_part(robot_empty, "arm_extension", arm_extension)
     
     # Assign material to arm extension
     if arm_extension.data.materials:
@@ -230,6 +246,7 @@ def create_robot():
     print_head.name = "PrintHead"
     print_head.scale = (0.3, 0.15, 0.1)
     print_head.parent = robot_empty
+    register_part(robot_empty, "print_head", print_head)
     
     # Assign material to print head
     if print_head.data.materials:
@@ -252,6 +269,7 @@ def create_robot():
         nozzle = bpy.context.object
         nozzle.name = name
         nozzle.parent = robot_empty
+        add_part(robot_empty, "nozzles", nozzle)
         
         # Assign material to nozzle
         if nozzle.data.materials:
@@ -262,7 +280,7 @@ def create_robot():
     return robot_empty
 
 
-def enhance_robot_model(robot_empty):
+def enhance_robot_model(robot_empty, frame_ranges=None):
     """Add detailed components to the basic robot model"""
     # Add hydraulic system for the printing arm
     create_hydraulic_system(robot_empty)
@@ -271,7 +289,7 @@ def enhance_robot_model(robot_empty):
     create_material_flow_system(robot_empty)
     
     # Add status lights and sensors
-    add_status_indicators(robot_empty)
+    add_status_indicators(robot_empty, frame_ranges or ANIMATION_FRAMES)
     
     # Add wear and tear to robot surfaces
     add_wear_to_all_components(robot_empty)
@@ -281,17 +299,9 @@ def enhance_robot_model(robot_empty):
 def create_hydraulic_system(robot_empty):
     """Create hydraulic pistons for the robot's arm system"""
     # Find the arm components
-    arm_base = None
-    arm_extension = None
-    print_head = None
-    
-    for child in robot_empty.children:
-        if "ArmBase" in child.name:
-            arm_base = child
-        elif "ArmExtension" in child.name:
-            arm_extension = child
-        elif "PrintHead" in child.name:
-            print_head = child
+    arm_base = get_part(robot_empty, "arm_base")
+    arm_extension = get_part(robot_empty, "arm_extension")
+    print_head = get_part(robot_empty, "print_head")
     
     if not arm_base or not arm_extension or not print_head:
         return
@@ -355,14 +365,8 @@ def create_hydraulic_system(robot_empty):
 def create_material_flow_system(robot_empty):
     """Create visible piping system from material containers to print head"""
     # Find the relevant components
-    containers = []
-    nozzles = []
-    
-    for child in robot_empty.children:
-        if "Container" in child.name:
-            containers.append(child)
-        elif "Nozzle" in child.name:
-            nozzles.append(child)
+    containers = get_parts(robot_empty, "containers")
+    nozzles = get_parts(robot_empty, "nozzles")
     
     if not containers or not nozzles:
         return
@@ -439,7 +443,7 @@ def create_material_flow_system(robot_empty):
         # Parent to robot
         tube_curve.parent = robot_empty
 
-def add_status_indicators(robot_empty):
+def add_status_indicators(robot_empty, frame_ranges):
     """Add LED status lights and display panel to the robot"""
     # Create emission material for LEDs
     led_materials = {
@@ -450,11 +454,7 @@ def add_status_indicators(robot_empty):
     }
     
     # Create LED positions on the robot body
-    body = None
-    for child in robot_empty.children:
-        if "Body" in child.name:
-            body = child
-            break
+    body = get_part(robot_empty, "body")
     
     if not body:
         return
@@ -481,6 +481,7 @@ def add_status_indicators(robot_empty):
         led.name = led_info["name"]
         led.rotation_euler = (math.radians(90), 0, 0)
         led.parent = robot_empty
+        register_part(robot_empty, led_info["name"], led)
         led.data.materials.append(led_materials[led_info["color"]])
         
     # Create a small display screen
@@ -534,7 +535,7 @@ def add_status_indicators(robot_empty):
     # Animate LED blinking
     for led_info in led_positions:
         led_name = led_info["name"]
-        led = bpy.data.objects.get(led_name)
+        led = get_part(robot_empty, led_name)
         
         if not led:
             continue
@@ -560,71 +561,58 @@ def add_status_indicators(robot_empty):
             
         # Animate based on LED type
         if "Status" in led_name:
-            # Regular blinking
-            for i in range(0, 150, 30):
-                # On
-                bpy.context.scene.frame_set(i)
-                emission.inputs["Strength"].default_value = 5.0
-                emission.inputs["Strength"].keyframe_insert(frame=i)
-                
-                # Off
-                bpy.context.scene.frame_set(i + 15)
-                emission.inputs["Strength"].default_value = 0.5
-                emission.inputs["Strength"].keyframe_insert(frame=i + 15)
+            # Regular blinking: one on/off cycle, repeated for the whole animation
+            strength = emission.inputs["Strength"]
+            for frame, value in ((0, 5.0), (15, 0.5), (30, 5.0)):
+                strength.default_value = value
+                strength.keyframe_insert("default_value", frame=frame)
+            fcurve = mat.node_tree.animation_data.action.fcurves.find(strength.path_from_id("default_value"))
+            add_cycles_modifier(fcurve)
                 
         elif "Process" in led_name:
-            # Slow pulsing
-            for i in range(0, 150, 60):
-                # Glow start
-                bpy.context.scene.frame_set(i)
-                emission.inputs["Strength"].default_value = 1.0
-                emission.inputs["Strength"].keyframe_insert(frame=i)
-                
-                # Peak
-                bpy.context.scene.frame_set(i + 30)
-                emission.inputs["Strength"].default_value = 5.0
-                emission.inputs["Strength"].keyframe_insert(frame=i + 30)
-                
-                # Glow end
-                bpy.context.scene.frame_set(i + 60)
-                emission.inputs["Strength"].default_value = 1.0
-                emission.inputs["Strength"].keyframe_insert(frame=i + 60)
+            # Slow pulsing: one pulse, repeated for the whole animation
+            strength = emission.inputs["Strength"]
+            for frame, value in ((0, 1.0), (30, 5.0), (60, 1.0)):
+                strength.default_value = value
+                strength.keyframe_insert("default_value", frame=frame)
+            fcurve = mat.node_tree.animation_data.action.fcurves.find(strength.path_from_id("default_value"))
+            add_cycles_modifier(fcurve)
         
         elif "Power" in led_name:
             # Steady with occasional pulse
             # Base steady state
-            bpy.context.scene.frame_set(1)
             emission.inputs["Strength"].default_value = 3.0
-            emission.inputs["Strength"].keyframe_insert(frame=1)
+            emission.inputs["Strength"].keyframe_insert("default_value", frame=1)
             
-            # Just a few pulses
-            pulse_frames = [40, 90, 140]
+            # Just a few pulses, at fixed points of the planning, border and completion phases
+            pulse_frames = [get_phase_frame(frame_ranges, "planning", 9),
+                            get_phase_frame(frame_ranges, "border", 0, anchor="end"),
+                            get_phase_frame(frame_ranges, "completion", 19)]
             for i in pulse_frames:
                 # Brighter
-                bpy.context.scene.frame_set(i)
                 emission.inputs["Strength"].default_value = 3.0
-                emission.inputs["Strength"].keyframe_insert(frame=i)
+                emission.inputs["Strength"].keyframe_insert("default_value", frame=i)
                 
                 # Peak
-                bpy.context.scene.frame_set(i + 5)
                 emission.inputs["Strength"].default_value = 6.0
-                emission.inputs["Strength"].keyframe_insert(frame=i + 5)
+                emission.inputs["Strength"].keyframe_insert("default_value", frame=i + 5)
                 
                 # Back to normal
-                bpy.context.scene.frame_set(i + 10)
                 emission.inputs["Strength"].default_value = 3.0
-                emission.inputs["Strength"].keyframe_insert(frame=i + 10)
+                emission.inputs["Strength"].keyframe_insert("default_value", frame=i + 10)
         
         elif "Connection" in led_name:
-            # Rapid data-like blinking pattern
-            for i in range(0, 150, 5):
+            # Rapid data-like blinking pattern over the whole animation
+            last_frame = max(end for _, end in frame_ranges.values())
+            # Seeded, so every build blinks alike and cached frames stay valid
+            rng = random.Random(0)
+            for i in range(0, last_frame, 5):
                 # Random pattern of bright and dim
-                bpy.context.scene.frame_set(i)
-                if random.random() > 0.3:  # 70% chance of being bright
+                if rng.random() > 0.3:  # 70% chance of being bright
                     emission.inputs["Strength"].default_value = 4.0
                 else:
                     emission.inputs["Strength"].default_value = 0.5
-                emission.inputs["Strength"].keyframe_insert(frame=i)
+                emission.inputs["Strength"].keyframe_insert("default_value", frame=i)
 
 def add_wear_to_all_components(robot_empty):
     """Add wear and tear to all robot components"""
@@ -721,4 +709,47 @@ def create_led_material(color, name):
     # Connect nodes
     links.new(emission.outputs["Emission"], output.inputs["Surface"])
     
-    return led_mat
\ No newline at end of file
+    return led_mat
+
+def duplicate_robot(robot_empty, collection):
+    """Copy of the robot for another scene whose parts share mesh data and materials with the original"""
+    mapping = {}
+    
+    def copy_tree(obj, parent):
+        copy = obj.copy()
+        copy.animation_data_clear()
+        copy.parent = parent
+        collection.objects.link(copy)
+        mapping[obj.as_pointer()] = copy
+        for child in obj.children:
+            copy_tree(child, copy)
+    
+    copy_tree(robot_empty, None)
+    
+    # Constraints between robot parts point at the copies
+    for copy in mapping.values():
+        for constraint in copy.constraints:
+            target = getattr(constraint, "target", None)
+            if target is not None and target.as_pointer() in mapping:
+                constraint.target = mapping[target.as_pointer()]
+    
+    robot_copy = mapping[robot_empty.as_pointer()]
+    copy_parts(robot_empty, robot_copy, mapping)
+    return robot_copy
+
+def create_robot_lods(robot_empty):
+    """Create decimated copies of the robot and register them as detail levels"""
+    # Full detail level: everything currently attached to the robot
+    detailed = [obj for obj in robot_empty.children_recursive if obj.type in {'MESH', 'CURVE'}]
+    
+    # Medium detail: the major parts, small parts dropped
+    lod1_ratio, lod2_ratio = LOD_SETTINGS["robot_decimate_ratios"]
+    robot_lod1 = create_decimated_proxy("RobotLOD1", robot_empty, detailed, lod1_ratio,
+                                        min_size=LOD_SETTINGS["proxy_min_size"])
+    
+    # Low detail: the same parts decimated much further
+    robot_lod2 = create_decimated_proxy("RobotLOD2", robot_empty, detailed, lod2_ratio,
+                                        min_size=LOD_SETTINGS["proxy_min_size"])
+    
+    return register_lod_group("Robot", robot_empty, [detailed, [robot_lod1], [robot_lod2]],
+                              LOD_SETTINGS["robot_thresholds"])
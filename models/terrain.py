@@ -2,8 +2,13 @@ import bpy
 import bmesh
 import math
 import random
+import time
+import numpy as np
 from mathutils import Vector
-from config import TERRAIN_SETTINGS, MATERIAL_COLORS
+from config import TERRAIN_SETTINGS, MATERIAL_COLORS, LOD_SETTINGS, POINT_CLOUD_SETTINGS
+from models.lod import register_lod_group
+from utils.mesh_utils import create_mesh_object
+from utils.point_cloud import load_point_cloud_heightfield
 
 def create_terrain():
     """Create a terrain with slight elevation and texture"""
@@ -30,7 +35,12 @@ def create_terrain():
     bpy.ops.object.modifier_apply(modifier="Subdivision")
     bpy.ops.object.modifier_apply(modifier="Displace")
     
-    # Create material
+    assign_terrain_material(terrain)
+    
+    return terrain
+
+def assign_terrain_material(terrain):
+    """Give the terrain its dirt/soil material"""
     terrain_mat = bpy.data.materials.new(name="TerrainMaterial")
     terrain_mat.use_nodes = True
     bsdf = terrain_mat.node_tree.nodes["Principled BSDF"]
@@ -45,6 +55,34 @@ def create_terrain():
     else:
         terrain.data.materials.append(terrain_mat)
     
+    return terrain_mat
+
+def create_terrain_from_point_cloud(path):
+    """Create the terrain from a scanned point cloud (PLY, XYZ or NPY) of the yard"""
+    heights, origin = load_point_cloud_heightfield(path)
+    rows, cols = heights.shape
+    cell_size = POINT_CLOUD_SETTINGS["cell_size"]
+    
+    start = time.perf_counter()
+    
+    # One vertex per cell center, centered on the scene origin
+    x = origin[0] + (np.arange(cols) + 0.5) * cell_size
+    y = origin[1] + (np.arange(rows) + 0.5) * cell_size
+    grid_x, grid_y = np.meshgrid(x, y)
+    vertices = np.stack((grid_x, grid_y, heights), axis=-1).reshape(-1, 3)
+    if POINT_CLOUD_SETTINGS["recenter"]:
+        vertices[:, 0] -= (x[0] + x[-1]) / 2.0
+        vertices[:, 1] -= (y[0] + y[-1]) / 2.0
+        vertices[:, 2] -= np.median(heights)
+    
+    # Quads between neighboring cells
+    index = np.arange(rows * cols).reshape(rows, cols)
+    faces = np.stack((index[:-1, :-1], index[:-1, 1:], index[1:, 1:], index[1:, :-1]), axis=-1).reshape(-1, 4)
+    
+    terrain = create_mesh_object("Terrain", vertices, faces)
+    assign_terrain_material(terrain)
+    print(f"  mesh build: {time.perf_counter() - start:.2f}s ({len(vertices)} vertices)")
+    
     return terrain
 
 def create_grass(terrain):
@@ -97,4 +135,21 @@ def create_grass(terrain):
     grass_blade.hide_render = True
     grass_blade.hide_viewport = True
     
-    return particle_system
\ No newline at end of file
+    return particle_system
+
+def create_terrain_lods(terrain):
+    """Create a decimated copy of the terrain and register both as detail levels"""
+    terrain_low = terrain.copy()
+    terrain_low.data = terrain.data.copy()
+    terrain_low.name = "TerrainLOD1"
+    bpy.context.collection.objects.link(terrain_low)
+    
+    # Particle grass stays on the full resolution terrain only
+    for modifier in [m for m in terrain_low.modifiers if m.type == 'PARTICLE_SYSTEM']:
+        terrain_low.modifiers.remove(modifier)
+    
+    decimate = terrain_low.modifiers.new(name="Decimate", type='DECIMATE')
+    decimate.ratio = LOD_SETTINGS["terrain_decimate_ratio"]
+    
+    return register_lod_group("Terrain", terrain, [[terrain], [terrain_low]],
+                              LOD_SETTINGS["terrain_thresholds"])
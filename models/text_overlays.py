@@ -1,32 +1,44 @@
 import bpy
 import math
+from config import ANIMATION_FRAMES
+from animation.timeline import get_phase_frame, scale_duration
+from models.build_plan import register_builder
 
-def create_process_labels():
-    """Create text overlays to indicate process stages"""
+# Labels float beside the garden; each one is only built if its own frames are requested
+register_builder("labels", bounds=((4, -6, 3), 4.0))
+
+def create_process_labels(frame_ranges=None, frame_range=None):
+    """Create text overlays to indicate process stages, only those shown within a frame range if given"""
+    frame_ranges = frame_ranges or ANIMATION_FRAMES
+    
     # Create collection for labels
     labels_collection = bpy.data.collections.new("ProcessLabels")
     bpy.context.scene.collection.children.link(labels_collection)
     
-    # Create labels for each phase
+    # Create labels for each phase, shown a few frames into it (base timing)
     process_phases = [
-        {"text": "1. SCANNING TERRAIN", "frame": 5},
-        {"text": "2. PLANNING GARDEN LAYOUT", "frame": 35},
-        {"text": "3. CREATING GARDEN BORDER", "frame": 50},
-        {"text": "4. FILLING WITH SOIL", "frame": 95},
-        {"text": "5. PLANTING SEEDS", "frame": 125},
-        {"text": "6. GARDEN COMPLETE", "frame": 140}
+        {"text": "1. SCANNING TERRAIN", "phase": "scan", "offset": 4},
+        {"text": "2. PLANNING GARDEN LAYOUT", "phase": "planning", "offset": 4},
+        {"text": "3. CREATING GARDEN BORDER", "phase": "border", "offset": 4},
+        {"text": "4. FILLING WITH SOIL", "phase": "filling", "offset": 4},
+        {"text": "5. PLANTING SEEDS", "phase": "completion", "offset": 4},
+        {"text": "6. GARDEN COMPLETE", "phase": "completion", "offset": 19}
     ]
     
     labels = []
     for phase in process_phases:
-        label = create_text_object(phase["text"], phase["frame"])
+        frame = get_phase_frame(frame_ranges, phase["phase"], phase["offset"])
+        duration = scale_duration(frame_ranges, phase["phase"], 30)
+        if frame_range and (frame > frame_range[1] or frame + duration <= frame_range[0]):
+            continue
+        label = create_text_object(phase["text"], frame, duration)
         labels_collection.objects.link(label)
         labels.append(label)
     
     return labels
 
-def create_text_object(text, frame):
-    """Create a 3D text object that appears at a specific frame"""
+def create_text_object(text, frame, duration=30):
+    """Create a 3D text object that appears at a specific frame for a number of frames"""
     # Create text object
     bpy.ops.object.text_add(location=(4, -6, 3))
     text_obj = bpy.context.object
@@ -80,20 +92,15 @@ def create_text_object(text, frame):
     text_obj.keyframe_insert(data_path="hide_render", frame=1)
     
     # Show at specified frame
-    bpy.context.scene.frame_set(frame)
     text_obj.hide_viewport = False
     text_obj.hide_render = False
     text_obj.keyframe_insert(data_path="hide_viewport", frame=frame)
     text_obj.keyframe_insert(data_path="hide_render", frame=frame)
     
-    # Hide after 30 frames
-    bpy.context.scene.frame_set(frame + 30)
+    # Hide again after the duration
     text_obj.hide_viewport = True
     text_obj.hide_render = True
-    text_obj.keyframe_insert(data_path="hide_viewport", frame=frame + 30)
-    text_obj.keyframe_insert(data_path="hide_render", frame=frame + 30)
-    
-    # Reset frame
-    bpy.context.scene.frame_set(1)
+    text_obj.keyframe_insert(data_path="hide_viewport", frame=frame + duration)
+    text_obj.keyframe_insert(data_path="hide_render", frame=frame + duration)
     
-    return text_obj
\ No newline at end of file
+    return text_obj
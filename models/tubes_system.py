@@ -1,6 +1,7 @@
 import bpy
 import math
 from mathutils import Vector
+from utils.scene_registry import register_part, add_part, get_part
 
 def create_tube_system():
     """Create the three tubes mounted on the fence with motors and plugs"""
@@ -20,6 +21,11 @@ def create_tube_system():
         tube = create_single_tube(tube_info["pos"], tube_info["name"], tube_info["color"])
         tube_collection.objects.link(tube)
         tubes.append(tube)
+        register_part(None, tube_info["name"], tube)
+        
+        # Everything hanging below the robot's clearance is an obstacle to drive around
+        for role in ("motor", "pipe", "plug", "valve"):
+            add_part(None, "obstacles", get_part(tube, role))
     
     return tubes
 
@@ -41,6 +47,7 @@ def create_single_tube(position, name, color):
     motor.name = f"{name}_Motor"
     motor.rotation_euler = (math.radians(90), 0, 0)  # Rotate to face outward
     motor.parent = tube_empty
+    register_part(tube_empty, "motor", motor)
     
     # Create motor material
     motor_mat = bpy.data.materials.new(name=f"{name}_MotorMaterial")
@@ -67,6 +74,7 @@ def create_single_tube(position, name, color):
     tube.name = f"{name}_Pipe"
     tube.rotation_euler = (math.radians(90), 0, 0)  # Align along y-axis
     tube.parent = tube_empty
+    register_part(tube_empty, "pipe", tube)
     
     # Create tube material with transparency
     tube_mat = bpy.data.materials.new(name=f"{name}_TubeMaterial")
@@ -92,6 +100,7 @@ def create_single_tube(position, name, color):
     plug.name = f"{name}_Plug"
     plug.rotation_euler = (math.radians(90), 0, 0)
     plug.parent = tube_empty
+    register_part(tube_empty, "plug", plug)
     
     # Create plug material
     plug_mat = bpy.data.materials.new(name=f"{name}_PlugMaterial")
@@ -112,6 +121,7 @@ def create_single_tube(position, name, color):
     valve.name = f"{name}_Valve"
     valve.rotation_euler = (0, math.radians(90), 0)
     valve.parent = tube_empty
+    register_part(tube_empty, "valve", valve)
     
     # Create valve material
     valve_mat = bpy.data.materials.new(name=f"{name}_ValveMaterial")
@@ -133,6 +143,7 @@ def create_single_tube(position, name, color):
     contents.name = f"{name}_Contents"
     contents.rotation_euler = (math.radians(90), 0, 0)
     contents.parent = tube_empty
+    register_part(tube_empty, "contents", contents)
     
     # Create contents material
     contents_mat = bpy.data.materials.new(name=f"{name}_ContentsMaterial")
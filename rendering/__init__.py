@@ -0,0 +1,47 @@
+# Rendering module
+# This module contains render pass I/O, render-once material variants, differential rendering, multi-scene variant packing, render telemetry, cost-based frame distribution, the shared frame queue and pinned local workers
+
+from rendering.exr_io import read_exr, get_exr_pass
+from rendering.material_variants import setup_variant_passes, get_border_coverage, recolor_border, render_border_variants
+from rendering.differential import capture_scene_snapshot, save_scene_snapshot, render_differential
+from rendering.scene_packing import create_shared_collection, create_variant_scene, render_packed_scenes
+from rendering.frame_cache import track_global_fields, track_object_fields, get_frame_key, render_with_frame_cache
+from rendering.telemetry import register_render_telemetry, merge_telemetry
+from rendering.cost_model import predict_frame_costs, learn_render_costs
+from rendering.frame_distribution import distribute_frames, get_frame_plan, render_frames
+from rendering.work_queue import open_queue, claim_frames, complete_frame, run_queue_worker
+from rendering.worker_placement import read_cpu_topology, plan_worker_cpus, pin_current_process, calibrate_worker_count
+
+__all__ = [
+    'read_exr',
+    'get_exr_pass',
+    'setup_variant_passes',
+    'get_border_coverage',
+    'recolor_border',
+    'render_border_variants',
+    'capture_scene_snapshot',
+    'save_scene_snapshot',
+    'render_differential',
+    'track_global_fields',
+    'track_object_fields',
+    'get_frame_key',
+    'render_with_frame_cache',
+    'create_shared_collection',
+    'create_variant_scene',
+    'render_packed_scenes',
+    'register_render_telemetry',
+    'merge_telemetry',
+    'predict_frame_costs',
+    'learn_render_costs',
+    'distribute_frames',
+    'get_frame_plan',
+    'render_frames',
+    'open_queue',
+    'claim_frames',
+    'complete_frame',
+    'run_queue_worker',
+    'read_cpu_topology',
+    'plan_worker_cpus',
+    'pin_current_process',
+    'calibrate_worker_count'
+]
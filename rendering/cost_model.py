@@ -0,0 +1,114 @@
+import bpy
+import os
+import json
+import numpy as np
+from config import COST_MODEL_SETTINGS
+
+# Per-frame inputs of the render time regression (a constant term is added for scene overhead)
+FEATURE_NAMES = ("pixel_samples", "polygons", "materials")
+
+def get_pixel_samples(scene):
+    """Camera rays of one frame in millions: output pixels times samples per pixel"""
+    render = scene.render
+    scale = render.resolution_percentage / 100.0
+    pixels = render.resolution_x * scale * render.resolution_y * scale
+    samples = scene.cycles.samples if render.engine == 'CYCLES' else scene.eevee.taa_render_samples
+    return pixels * samples / 1.0e6
+
+def get_frame_features(scene, frame):
+    """Pixel samples, polygons (millions, instances included) and distinct materials enabled at a frame"""
+    scene.frame_set(frame)
+    depsgraph = bpy.context.evaluated_depsgraph_get()
+    polygons = 0
+    materials = set()
+    for instance in depsgraph.object_instances:
+        obj = instance.object
+        if obj.type != 'MESH' or obj.hide_render:
+            continue
+        polygons += len(obj.data.polygons)
+        materials.update(slot.material.name for slot in obj.material_slots if slot.material)
+    return [get_pixel_samples(scene), polygons / 1.0e6, len(materials)]
+
+def collect_frame_features(frames, scene=None):
+    """Features (frames, len(FEATURE_NAMES)) of many frames, evaluated every feature_step frames and interpolated"""
+    scene = scene or bpy.context.scene
+    frames = np.asarray(frames)
+    step = COST_MODEL_SETTINGS["feature_step"]
+    sampled = np.unique(np.concatenate((frames[::step], frames[-1:])))
+    original = scene.frame_current
+    values = np.array([get_frame_features(scene, int(frame)) for frame in sampled], dtype=np.float64)
+    scene.frame_set(original)
+    return np.column_stack([np.interp(frames, sampled, values[:, i]) for i in range(len(FEATURE_NAMES))])
+
+def get_cost_model_path():
+    """Location of the locally stored regression and the render times it was fit to"""
+    return bpy.path.abspath(COST_MODEL_SETTINGS["model_file"])
+
+def load_cost_model():
+    """Stored render time records and weights, or an untrained model"""
+    path = get_cost_model_path()
+    if not os.path.exists(path):
+        return {"features": list(FEATURE_NAMES), "records": [], "weights": None}
+    with open(path) as f:
+        model = json.load(f)
+    # Records of another feature set cannot be fit together with new ones
+    if model.get("features") != list(FEATURE_NAMES):
+        return {"features": list(FEATURE_NAMES), "records": [], "weights": None}
+    return model
+
+def save_cost_model(model):
+    """Write the model next to the blend file, replacing the old one atomically"""
+    path = get_cost_model_path()
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "w") as f:
+        json.dump(model, f)
+    os.replace(temp_path, path)
+
+def fit_cost_model(model):
+    """Least squares fit of seconds per frame to the features of the most recent records"""
+    records = np.array(model["records"][-COST_MODEL_SETTINGS["max_records"]:], dtype=np.float64)
+    if len(records) < COST_MODEL_SETTINGS["min_records"]:
+        model["weights"] = None
+        return model
+    design = np.column_stack((np.ones(len(records)), records[:, :-1]))
+    # A small ridge keeps the fit stable when a feature hardly varies (one scene, one sample count)
+    ridge = COST_MODEL_SETTINGS["ridge"] * np.eye(design.shape[1])
+    ridge[0, 0] = 0.0
+    weights = np.linalg.solve(design.T @ design + ridge, design.T @ records[:, -1])
+    model["weights"] = weights.tolist()
+    return model
+
+def predict_frame_costs(features, model=None):
+    """Estimated seconds per frame; relative costs from a heuristic until enough frames were timed"""
+    model = model or load_cost_model()
+    features = np.asarray(features, dtype=np.float64)
+    if model["weights"] is None:
+        # Rays times a slowly growing scene complexity term, only good for ordering frames
+        return features[:, 0] * (1.0 + features[:, 1]) * (1.0 + 0.1 * features[:, 2])
+    weights = np.asarray(model["weights"])
+    costs = weights[0] + features @ weights[1:]
+    return np.maximum(costs, COST_MODEL_SETTINGS["min_frame_seconds"])
+
+def learn_render_costs(records, scene=None):
+    """Add frames timed by the render telemetry to the stored model and refit it"""
+    scene = scene or bpy.context.scene
+    records = [r for r in records if r["scene"] == scene.name]
+    if not records:
+        return None
+    features = collect_frame_features([r["frame"] for r in records], scene)
+    model = load_cost_model()
+    model["records"].extend(list(map(float, row)) + [float(r["wall_time"])] for row, r in zip(features, records))
+    model["records"] = model["records"][-COST_MODEL_SETTINGS["max_records"]:]
+    fit_cost_model(model)
+    save_cost_model(model)
+
+    if model["weights"] is not None:
+        predicted = predict_frame_costs(features, model)
+        actual = np.array([r["wall_time"] for r in records])
+        error = np.abs(predicted - actual).mean()
+        print(f"Render cost model: {len(model['records'])} frames recorded, mean error {error:.2f}s on this render")
+    else:
+        print(f"Render cost model: {len(model['records'])} frames recorded, "
+              f"needs {COST_MODEL_SETTINGS['min_records']} to fit")
+    return model
@@ -0,0 +1,240 @@
+import bpy
+import os
+import json
+import shutil
+import hashlib
+import numpy as np
+from mathutils import Vector
+from config import DIFF_RENDER_SETTINGS
+from materials.texture_baking import get_material_spec_hash
+from rendering.telemetry import set_output_file
+from utils.camera_utils import get_screen_rect
+
+def _hash_fcurves(h, id_data):
+    """Add the keyframes of an ID's action to a hash"""
+    anim = getattr(id_data, "animation_data", None)
+    if not anim or not anim.action:
+        return
+    for fcurve in sorted(anim.action.fcurves, key=lambda f: (f.data_path, f.array_index)):
+        points = np.empty(len(fcurve.keyframe_points) * 2, dtype=np.float32)
+        fcurve.keyframe_points.foreach_get("co", points)
+        h.update(f"{fcurve.data_path}[{fcurve.array_index}]".encode("utf-8"))
+        h.update(points.tobytes())
+
+def get_object_signature(obj):
+    """Hash of everything about an object that changes its pixels, apart from where it is"""
+    h = hashlib.sha1(obj.type.encode("utf-8"))
+
+    data = obj.data
+    if obj.type == 'MESH':
+        coords = np.empty(len(data.vertices) * 3, dtype=np.float32)
+        data.vertices.foreach_get("co", coords)
+        h.update(coords.tobytes())
+    elif obj.type == 'CURVE':
+        h.update(repr((data.bevel_depth, data.bevel_resolution, data.extrude,
+                       data.bevel_factor_start, data.bevel_factor_end)).encode("utf-8"))
+        for spline in data.splines:
+            points = spline.bezier_points if spline.type == 'BEZIER' else spline.points
+            coords = np.empty(len(points) * (3 if spline.type == 'BEZIER' else 4), dtype=np.float32)
+            points.foreach_get("co", coords)
+            h.update(coords.tobytes())
+    elif obj.type == 'LIGHT':
+        h.update(repr((data.type, data.energy, tuple(data.color))).encode("utf-8"))
+    elif data is not None:
+        h.update(data.name.encode("utf-8"))
+
+    for modifier in obj.modifiers:
+        h.update(f"{modifier.type}:{modifier.show_render}".encode("utf-8"))
+
+    for slot in obj.material_slots:
+        if slot.material:
+            h.update(get_material_spec_hash(slot.material).encode("utf-8"))
+
+    _hash_fcurves(h, obj)
+    if data is not None:
+        _hash_fcurves(h, data)
+
+    return h.hexdigest()
+
+def capture_scene_snapshot(camera=None, frame_range=None):
+    """Record each renderable object's signature and per-frame screen rectangle"""
+    scene = bpy.context.scene
+    if camera is None:
+        camera = scene.camera
+    if frame_range is None:
+        frame_range = (scene.frame_start, scene.frame_end)
+
+    objects = [obj for obj in scene.objects if obj.type in {'MESH', 'CURVE', 'SURFACE', 'META', 'FONT', 'LIGHT'}]
+    snapshot = {
+        "resolution": [scene.render.resolution_x * scene.render.resolution_percentage // 100,
+                       scene.render.resolution_y * scene.render.resolution_percentage // 100],
+        "signatures": {obj.name: get_object_signature(obj) for obj in objects},
+        "frames": {}
+    }
+
+    orig_frame = scene.frame_current
+    for frame in range(frame_range[0], frame_range[1] + 1):
+        scene.frame_set(frame)
+        depsgraph = bpy.context.evaluated_depsgraph_get()
+        rects = {}
+        for obj in objects:
+            if obj.hide_render:
+                continue
+            if obj.type == 'LIGHT':
+                # Lights affect the whole frame
+                rects[obj.name] = [0.0, 0.0, 1.0, 1.0]
+                continue
+            evaluated = obj.evaluated_get(depsgraph)
+            corners = [evaluated.matrix_world @ Vector(corner) for corner in evaluated.bound_box]
+            rect = get_screen_rect(camera, scene, corners)
+            if rect is not None:
+                # Lists, so rectangles compare equal after a JSON round trip
+                rects[obj.name] = list(rect)
+        snapshot["frames"][str(frame)] = rects
+    scene.frame_set(orig_frame)
+
+    return snapshot
+
+def save_scene_snapshot(snapshot, output_dir):
+    """Store a snapshot next to the frames it describes"""
+    path = os.path.join(bpy.path.abspath(output_dir), DIFF_RENDER_SETTINGS["snapshot_file"])
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(snapshot, f)
+    return path
+
+def load_scene_snapshot(base_dir):
+    """Load the snapshot stored with a base render"""
+    path = os.path.join(bpy.path.abspath(base_dir), DIFF_RENDER_SETTINGS["snapshot_file"])
+    with open(path) as f:
+        return json.load(f)
+
+def get_changed_objects(base, current):
+    """Names of objects that were added, removed or differ between two snapshots"""
+    names = set(base["signatures"]) | set(current["signatures"])
+    return sorted(n for n in names if base["signatures"].get(n) != current["signatures"].get(n))
+
+def _union_rect(rects):
+    """Smallest rectangle containing all given rectangles"""
+    rects = np.array(rects)
+    return (rects[:, 0].min(), rects[:, 1].min(), rects[:, 2].max(), rects[:, 3].max())
+
+def get_dirty_regions(base, current):
+    """Per frame, the screen rectangle whose pixels can differ from the base render (None if none)"""
+    changed = set(get_changed_objects(base, current))
+    regions = {}
+    for frame, current_rects in current["frames"].items():
+        base_rects = base["frames"].get(frame)
+        if base_rects is None:
+            regions[int(frame)] = (0.0, 0.0, 1.0, 1.0)
+            continue
+
+        # Changed objects count where they were and where they are now;
+        # unchanged objects only if they moved on screen
+        rects = []
+        for name in set(base_rects) | set(current_rects):
+            before = base_rects.get(name)
+            after = current_rects.get(name)
+            if name in changed or before != after:
+                rects.extend(r for r in (before, after) if r is not None)
+        regions[int(frame)] = _union_rect(rects) if rects else None
+
+    return regions
+
+def _load_pixels(path):
+    """Read an image file into an (H, W, 4) array, bottom row first"""
+    image = bpy.data.images.load(path)
+    width, height = image.size
+    pixels = np.empty(width * height * 4, dtype=np.float32)
+    image.pixels.foreach_get(pixels)
+    bpy.data.images.remove(image)
+    return pixels.reshape(height, width, 4)
+
+def _save_pixels(pixels, path):
+    """Write an (H, W, 4) array (bottom row first) as PNG without color conversion"""
+    height, width = pixels.shape[:2]
+    image = bpy.data.images.new("DiffFrame", width, height, alpha=True)
+    image.pixels.foreach_set(np.ascontiguousarray(pixels, dtype=np.float32).ravel())
+    image.filepath_raw = path
+    image.file_format = 'PNG'
+    image.save()
+    bpy.data.images.remove(image)
+
+def render_differential(base_dir, output_dir, camera=None):
+    """Render only the pixels that differ from a base render and composite them over its frames"""
+    scene = bpy.context.scene
+    render = scene.render
+    base_dir = bpy.path.abspath(base_dir)
+    output_dir = bpy.path.abspath(output_dir)
+    os.makedirs(output_dir, exist_ok=True)
+
+    base = load_scene_snapshot(base_dir)
+    current = capture_scene_snapshot(camera)
+    if base["resolution"] != current["resolution"]:
+        raise ValueError("Base render has a different resolution, render it again at "
+                         f"{current['resolution'][0]}x{current['resolution'][1]}")
+    save_scene_snapshot(current, output_dir)
+
+    width, height = current["resolution"]
+    padding = DIFF_RENDER_SETTINGS["region_padding"]
+    regions = get_dirty_regions(base, current)
+
+    orig_settings = (render.use_border, render.filepath,
+                     render.image_settings.file_format, render.image_settings.color_mode)
+    render.image_settings.file_format = 'PNG'
+    render.image_settings.color_mode = 'RGBA'
+    region_path = os.path.join(output_dir, "region.png")
+
+    stats = {"skipped": 0, "rendered": 0, "full": 0}
+    try:
+        for frame, rect in sorted(regions.items()):
+            frame_name = f"{frame:04d}.png"
+            base_frame = os.path.join(base_dir, frame_name)
+            out_frame = os.path.join(output_dir, frame_name)
+
+            if rect is None:
+                # Nothing visible changed - reuse the base frame as is
+                shutil.copyfile(base_frame, out_frame)
+                stats["skipped"] += 1
+                continue
+
+            scene.frame_set(frame)
+            set_output_file(out_frame)
+            if not os.path.exists(base_frame):
+                # Past the end of the base render - nothing to composite over
+                render.use_border = False
+                render.filepath = out_frame
+                bpy.ops.render.render(write_still=True)
+                stats["full"] += 1
+                continue
+
+            # Pad in pixels for anti-aliasing, soft shadows and contact reflections
+            x0 = max(int(rect[0] * width) - padding, 0)
+            y0 = max(int(rect[1] * height) - padding, 0)
+            x1 = min(int(np.ceil(rect[2] * width)) + padding, width)
+            y1 = min(int(np.ceil(rect[3] * height)) + padding, height)
+
+            render.use_border = True
+            render.use_crop_to_border = False
+            render.border_min_x = x0 / width
+            render.border_max_x = x1 / width
+            render.border_min_y = y0 / height
+            render.border_max_y = y1 / height
+            render.filepath = region_path
+            bpy.ops.render.render(write_still=True)
+
+            pixels = _load_pixels(base_frame)
+            pixels[y0:y1, x0:x1] = _load_pixels(region_path)[y0:y1, x0:x1]
+            _save_pixels(pixels, out_frame)
+            stats["rendered"] += 1
+    finally:
+        (render.use_border, render.filepath,
+         render.image_settings.file_format, render.image_settings.color_mode) = orig_settings
+        set_output_file(None)
+        if os.path.exists(region_path):
+            os.remove(region_path)
+
+    print(f"Differential render: {stats['rendered']} frames re-rendered in their dirty region, "
+          f"{stats['full']} frames beyond the base render rendered in full, "
+          f"{stats['skipped']} frames reused from {base_dir}")
+    return stats
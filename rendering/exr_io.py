@@ -0,0 +1,126 @@
+import struct
+import zlib
+import numpy as np
+
+EXR_MAGIC = 20000630
+
+# EXR pixel types: UINT, HALF, FLOAT
+PIXEL_DTYPES = {0: np.dtype('<u4'), 1: np.dtype('<f2'), 2: np.dtype('<f4')}
+
+# Compression id -> scanlines per block, for the codecs we can decode
+SUPPORTED_COMPRESSION = {0: 1, 2: 1, 3: 16}  # NONE, ZIPS, ZIP
+
+def _read_null_terminated(data, offset):
+    """Read a zero-terminated string from a bytes buffer"""
+    end = data.index(b'\0', offset)
+    return data[offset:end].decode('utf-8'), end + 1
+
+def _parse_channels(value):
+    """Parse a chlist attribute into (name, pixel_type) pairs"""
+    channels = []
+    offset = 0
+    while value[offset] != 0:
+        name, offset = _read_null_terminated(value, offset)
+        pixel_type, _p_linear, x_sampling, y_sampling = struct.unpack_from('<iB3xii', value, offset)
+        offset += 16
+        if x_sampling != 1 or y_sampling != 1:
+            raise ValueError(f"Subsampled EXR channel {name} is not supported")
+        channels.append((name, pixel_type))
+    return channels
+
+def read_exr_header(data):
+    """Parse the header of a single-part scanline EXR"""
+    magic, version = struct.unpack_from('<ii', data, 0)
+    if magic != EXR_MAGIC:
+        raise ValueError("Not an OpenEXR file")
+    if version & 0x200 or version & 0x1000:
+        raise ValueError("Tiled and multi-part EXR files are not supported")
+
+    header = {}
+    offset = 8
+    while data[offset] != 0:
+        name, offset = _read_null_terminated(data, offset)
+        _attr_type, offset = _read_null_terminated(data, offset)
+        size = struct.unpack_from('<i', data, offset)[0]
+        offset += 4
+        value = data[offset:offset + size]
+        offset += size
+
+        if name == "channels":
+            header["channels"] = _parse_channels(value)
+        elif name == "compression":
+            header["compression"] = value[0]
+        elif name == "dataWindow":
+            header["data_window"] = struct.unpack('<iiii', value)
+
+    header["offset_table"] = offset + 1
+    return header
+
+def _undo_zip_predictor(raw):
+    """Reverse the byte predictor and interleaving used by ZIP compression"""
+    buf = np.frombuffer(raw, dtype=np.uint8)
+    # Predictor: each byte was stored as a difference to the previous one (+128)
+    diffs = buf.astype(np.int64)
+    diffs[1:] -= 128
+    restored = (np.cumsum(diffs) & 0xFF).astype(np.uint8)
+
+    # The first half holds the even bytes, the second half the odd bytes
+    out = np.empty_like(restored)
+    half = (len(restored) + 1) // 2
+    out[0::2] = restored[:half]
+    out[1::2] = restored[half:]
+    return out.tobytes()
+
+def read_exr(path, channel_prefix=None):
+    """Read the channels of a scanline EXR (NONE/ZIPS/ZIP) into float32 arrays, top row first"""
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    header = read_exr_header(data)
+    compression = header.get("compression", 0)
+    if compression not in SUPPORTED_COMPRESSION:
+        raise ValueError(f"EXR compression {compression} is not supported, write with ZIP or NONE")
+
+    x_min, y_min, x_max, y_max = header["data_window"]
+    width = x_max - x_min + 1
+    height = y_max - y_min + 1
+    lines_per_block = SUPPORTED_COMPRESSION[compression]
+    block_count = (height + lines_per_block - 1) // lines_per_block
+
+    # Channels are stored sorted by name, one run of `width` pixels per channel per line
+    channels = sorted(header["channels"])
+    line_layout = []
+    line_size = 0
+    for name, pixel_type in channels:
+        dtype = PIXEL_DTYPES[pixel_type]
+        line_layout.append((name, dtype, line_size))
+        line_size += width * dtype.itemsize
+
+    wanted = [c for c in line_layout if channel_prefix is None or c[0].startswith(channel_prefix)]
+    result = {name: np.empty((height, width), dtype=np.float32) for name, _, _ in wanted}
+
+    offsets = np.frombuffer(data, dtype='<u8', count=block_count, offset=header["offset_table"])
+    for block_offset in offsets:
+        y, size = struct.unpack_from('<ii', data, int(block_offset))
+        block = data[int(block_offset) + 8:int(block_offset) + 8 + size]
+        lines = min(lines_per_block, y_max - y + 1)
+
+        # Blocks that would not shrink are stored uncompressed
+        if compression != 0 and size < lines * line_size:
+            block = _undo_zip_predictor(zlib.decompress(block))
+
+        block = np.frombuffer(block, dtype=np.uint8).reshape(lines, line_size)
+        row = y - y_min
+        for name, dtype, start in wanted:
+            values = block[:, start:start + width * dtype.itemsize].copy().view(dtype)
+            result[name][row:row + lines] = values.astype(np.float32)
+
+    return result
+
+def get_exr_pass(channels, layer, pass_name, components="RGB"):
+    """Stack the components of one render pass into an (H, W, N) array"""
+    names = [f"{layer}.{pass_name}.{c}" for c in components]
+    missing = [n for n in names if n not in channels]
+    if missing:
+        raise KeyError(f"Render pass channels missing from EXR: {', '.join(missing)}")
+    return np.stack([channels[n] for n in names], axis=-1)
@@ -0,0 +1,99 @@
+import bpy
+import os
+import json
+import shutil
+import hashlib
+import config
+from config import FRAME_CACHE_SETTINGS
+from rendering.telemetry import set_output_file
+
+# Config fields that affect every frame, and per object the fields it depends
+# on together with the frame ranges in which it is visible
+FRAME_DEPENDENCIES = {"global": {}, "objects": {}}
+
+def reset_frame_dependencies():
+    """Forget all recorded dependencies before a scene is rebuilt"""
+    FRAME_DEPENDENCIES["global"] = {}
+    FRAME_DEPENDENCIES["objects"] = {}
+
+def track_global_fields(fields):
+    """Record config fields (name -> value) that change the pixels of every frame"""
+    FRAME_DEPENDENCIES["global"].update(fields)
+
+def track_config_settings():
+    """Record every settings table in config as affecting all frames"""
+    track_global_fields({name: value for name, value in vars(config).items()
+                         if name.isupper() and name != "FRAME_CACHE_SETTINGS"})
+
+def get_file_signature(path):
+    """Identify an input file by path, size and modification time without reading it"""
+    path = bpy.path.abspath(path)
+    stat = os.stat(path)
+    return [os.path.abspath(path), stat.st_size, stat.st_mtime_ns]
+
+def track_object_fields(name, fields, frame_ranges):
+    """Record config fields an object depends on and the frame ranges it can be seen in"""
+    entry = FRAME_DEPENDENCIES["objects"].setdefault(name, {"fields": {}, "frame_ranges": []})
+    entry["fields"].update(fields)
+    entry["frame_ranges"].extend(tuple(r) for r in frame_ranges)
+
+def get_frame_dependencies(frame):
+    """All config fields that can affect one frame, with their values"""
+    fields = dict(FRAME_DEPENDENCIES["global"])
+    for entry in FRAME_DEPENDENCIES["objects"].values():
+        if any(start <= frame <= end for start, end in entry["frame_ranges"]):
+            fields.update(entry["fields"])
+    return fields
+
+def get_frame_key(frame):
+    """Cache key of a frame from only the fields it depends on"""
+    spec = {
+        "version": FRAME_CACHE_SETTINGS["version"],
+        "frame": frame,
+        "fields": get_frame_dependencies(frame)
+    }
+    spec_json = json.dumps(spec, sort_keys=True, default=str)
+    return hashlib.sha1(spec_json.encode("utf-8")).hexdigest()
+
+def get_frame_cache_dir():
+    """Resolve the shared frame cache directory and make sure it exists"""
+    cache_dir = bpy.path.abspath(FRAME_CACHE_SETTINGS["cache_dir"])
+    os.makedirs(cache_dir, exist_ok=True)
+    return cache_dir
+
+def render_with_frame_cache(output_dir):
+    """Render the animation, reusing cached frames whose dependencies match"""
+    scene = bpy.context.scene
+    render = scene.render
+    cache_dir = get_frame_cache_dir()
+    output_dir = bpy.path.abspath(output_dir)
+    os.makedirs(output_dir, exist_ok=True)
+
+    orig_filepath = render.filepath
+    extension = render.file_extension
+    stats = {"reused": 0, "rendered": 0}
+
+    try:
+        for frame in range(scene.frame_start, scene.frame_end + 1):
+            key = get_frame_key(frame)
+            output_frame = os.path.join(output_dir, f"{frame:04d}{extension}")
+            cached = os.path.join(cache_dir, key + extension)
+            if os.path.exists(cached):
+                stats["reused"] += 1
+            else:
+                # Only complete frames enter the cache: an interrupted render leaves a stray
+                # partial file, and variants rendering the same key never write to one file
+                partial = os.path.join(cache_dir, f"{key}.{os.getpid()}.partial{extension}")
+                scene.frame_set(frame)
+                render.filepath = partial
+                set_output_file(output_frame)
+                bpy.ops.render.render(write_still=True)
+                os.replace(partial, cached)
+                stats["rendered"] += 1
+            shutil.copyfile(cached, output_frame)
+    finally:
+        render.filepath = orig_filepath
+        set_output_file(None)
+
+    print(f"Frame cache: {stats['rendered']} frames rendered, {stats['reused']} reused from {cache_dir}")
+    return stats
@@ -0,0 +1,77 @@
+import bpy
+import os
+import json
+import heapq
+import numpy as np
+from rendering.cost_model import collect_frame_features, predict_frame_costs
+from rendering.telemetry import set_remaining_frames, set_output_file
+
+def order_frames_longest_first(frames, costs):
+    """Frames sorted by predicted cost, most expensive first"""
+    order = np.argsort(-np.asarray(costs), kind='stable')
+    return [int(frames[i]) for i in order]
+
+def distribute_frames(frames, costs, node_count):
+    """Hand out frames longest-first, each to the node with the least predicted work so far"""
+    loads = [(0.0, node) for node in range(node_count)]
+    assignments = [[] for _ in range(node_count)]
+    cost_by_frame = dict(zip(map(int, frames), map(float, costs)))
+    for frame in order_frames_longest_first(frames, costs):
+        load, node = heapq.heappop(loads)
+        assignments[node].append(frame)
+        heapq.heappush(loads, (load + cost_by_frame[frame], node))
+    return assignments, [sum(cost_by_frame[f] for f in frames) for frames in assignments]
+
+def get_frame_costs(scene=None):
+    """Predicted seconds (or relative cost, before the model is trained) of every frame of the scene"""
+    scene = scene or bpy.context.scene
+    frames = list(range(scene.frame_start, scene.frame_end + 1, scene.frame_step))
+    return frames, predict_frame_costs(collect_frame_features(frames, scene))
+
+def get_frame_plan(output_dir, node_count, scene=None):
+    """Frames of every node of a job, planned by the first node and read from the output directory by the rest"""
+    scene = scene or bpy.context.scene
+    path = os.path.join(bpy.path.abspath(output_dir), "frame_plan.json")
+    job = {"node_count": node_count, "frame_range": [scene.frame_start, scene.frame_end]}
+    if not os.path.exists(path):
+        frames, costs = get_frame_costs(scene)
+        assignments, loads = distribute_frames(frames, costs, node_count)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(dict(job, nodes=assignments, predicted_seconds=loads), f)
+        try:
+            # Linking fails if another node published its plan first; then the winner's plan is used
+            os.link(temp_path, path)
+            print(f"Frame plan: {len(frames)} frames on {node_count} nodes, "
+                  f"predicted load spread {max(loads) - min(loads):.1f}")
+            return assignments
+        except FileExistsError:
+            pass
+        finally:
+            os.remove(temp_path)
+
+    with open(path) as f:
+        plan = json.load(f)
+    if plan["node_count"] != node_count or plan["frame_range"] != job["frame_range"]:
+        raise ValueError(f"{path} belongs to another job ({plan['node_count']} nodes, frames {plan['frame_range']}); "
+                         "remove it or use another output directory")
+    return plan["nodes"]
+
+def render_frames(frames, output_dir, remaining=0):
+    """Render single frames of the animation to the output directory, in the given order, before remaining more"""
+    scene = bpy.context.scene
+    render = scene.render
+    orig_filepath = render.filepath
+    try:
+        for index, frame in enumerate(frames):
+            # A still render writes exactly its file path, so every frame gets its own
+            scene.frame_set(frame)
+            render.filepath = os.path.join(output_dir, f"{frame:04d}")
+            set_remaining_frames(len(frames) - index - 1 + remaining)
+            set_output_file(render.filepath + (render.file_extension if render.use_file_extension else ""))
+            bpy.ops.render.render(write_still=True)
+    finally:
+        render.filepath = orig_filepath
+        set_remaining_frames(None)
+        set_output_file(None)
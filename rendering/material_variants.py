@@ -0,0 +1,224 @@
+import bpy
+import os
+import struct
+import numpy as np
+from config import BORDER_MATERIALS, VARIANT_SETTINGS
+from models.garden_path import apply_border_material_properties
+from rendering.exr_io import read_exr, get_exr_pass
+
+def _murmur3_32(data, seed=0):
+    """MurmurHash3 (x86, 32 bit), the hash Cryptomatte uses for object names"""
+    c1, c2 = 0xcc9e2d51, 0x1b873593
+    h = seed
+    length = len(data)
+    rounded = length - length % 4
+
+    for i in range(0, rounded, 4):
+        k = int.from_bytes(data[i:i + 4], 'little')
+        k = (k * c1) & 0xFFFFFFFF
+        k = ((k << 15) | (k >> 17)) & 0xFFFFFFFF
+        k = (k * c2) & 0xFFFFFFFF
+        h ^= k
+        h = ((h << 13) | (h >> 19)) & 0xFFFFFFFF
+        h = (h * 5 + 0xe6546b64) & 0xFFFFFFFF
+
+    k = int.from_bytes(data[rounded:], 'little') if length % 4 else 0
+    if k:
+        k = (k * c1) & 0xFFFFFFFF
+        k = ((k << 15) | (k >> 17)) & 0xFFFFFFFF
+        k = (k * c2) & 0xFFFFFFFF
+        h ^= k
+
+    h ^= length
+    h ^= h >> 16
+    h = (h * 0x85ebca6b) & 0xFFFFFFFF
+    h ^= h >> 13
+    h = (h * 0xc2b2ae35) & 0xFFFFFFFF
+    h ^= h >> 16
+    return h
+
+def get_cryptomatte_id(name):
+    """Float id Cryptomatte stores for a name (hash with exponent kept finite)"""
+    h = _murmur3_32(name.encode('utf-8'))
+    exponent = (h >> 23) & 0xFF
+    if exponent == 0 or exponent == 255:
+        h ^= 1 << 23
+    return np.float32(struct.unpack('<f', struct.pack('<I', h))[0])
+
+def setup_variant_passes(border, scene=None):
+    """Enable the passes needed to recolor the border and write them as multilayer EXR"""
+    if scene is None:
+        scene = bpy.context.scene
+    view_layer = bpy.context.view_layer
+
+    view_layer.use_pass_combined = True
+    view_layer.use_pass_object_index = True
+    view_layer.use_pass_cryptomatte_object = True
+    view_layer.use_pass_diffuse_direct = True
+    view_layer.use_pass_diffuse_indirect = True
+    view_layer.use_pass_diffuse_color = True
+    view_layer.use_pass_glossy_direct = True
+    view_layer.use_pass_glossy_indirect = True
+    view_layer.use_pass_glossy_color = True
+
+    border.pass_index = VARIANT_SETTINGS["border_pass_index"]
+
+    # Full float, losslessly compressed so ids and coverage survive the round trip
+    image_settings = scene.render.image_settings
+    image_settings.file_format = 'OPEN_EXR_MULTILAYER'
+    image_settings.color_depth = '32'
+    image_settings.exr_codec = VARIANT_SETTINGS["exr_codec"]
+
+    return view_layer.name
+
+def get_border_coverage(channels, layer, border_name):
+    """Per-pixel border coverage from Cryptomatte, falling back to the object index pass"""
+    object_id = get_cryptomatte_id(border_name)
+    coverage = None
+    rank = 0
+    while f"{layer}.CryptoObject{rank:02d}.R" in channels:
+        prefix = f"{layer}.CryptoObject{rank:02d}"
+        # Each rank channel set holds two (id, coverage) pairs
+        for id_channel, coverage_channel in (("R", "G"), ("B", "A")):
+            match = channels[f"{prefix}.{id_channel}"] == object_id
+            weight = np.where(match, channels[f"{prefix}.{coverage_channel}"], 0.0)
+            coverage = weight if coverage is None else coverage + weight
+        rank += 1
+
+    if coverage is not None:
+        return np.clip(coverage, 0.0, 1.0)
+
+    index = get_exr_pass(channels, layer, "IndexOB", "X")[..., 0]
+    return (np.rint(index) == VARIANT_SETTINGS["border_pass_index"]).astype(np.float32)
+
+def is_color_only_variant(base_props, props):
+    """Whether a variant differs from the rendered material only in base color"""
+    return (abs(props["roughness"] - base_props["roughness"]) <= VARIANT_SETTINGS["roughness_tolerance"]
+            and abs(props["metallic"] - base_props["metallic"]) <= VARIANT_SETTINGS["metallic_tolerance"])
+
+def recolor_border(channels, layer, coverage, base_props, props):
+    """Swap the border's base color in the combined pass using its color and lighting passes"""
+    combined = get_exr_pass(channels, layer, "Combined", "RGBA").copy()
+    ratio = np.array(props["color"][:3], dtype=np.float32) / np.maximum(
+        np.array(base_props["color"][:3], dtype=np.float32), 1e-4)
+
+    # Diffuse contribution is color * lighting, so scale the color part
+    diffuse_color = get_exr_pass(channels, layer, "DiffCol")
+    diffuse_light = get_exr_pass(channels, layer, "DiffDir") + get_exr_pass(channels, layer, "DiffInd")
+    delta = diffuse_light * diffuse_color * (ratio - 1.0)
+
+    # Metallic surfaces tint their reflections with the base color as well
+    if props["metallic"] > 0.0:
+        glossy_color = get_exr_pass(channels, layer, "GlossCol")
+        glossy_light = get_exr_pass(channels, layer, "GlossDir") + get_exr_pass(channels, layer, "GlossInd")
+        delta += glossy_light * glossy_color * (ratio - 1.0) * props["metallic"]
+
+    combined[..., :3] += delta * coverage[..., None]
+    return combined
+
+def get_border_region(coverage, padding):
+    """Padded pixel rectangle (row0, row1, col0, col1) around the border, or None if not visible"""
+    rows = np.flatnonzero(coverage.any(axis=1))
+    cols = np.flatnonzero(coverage.any(axis=0))
+    if not len(rows):
+        return None
+
+    height, width = coverage.shape
+    return (max(rows[0] - padding, 0), min(rows[-1] + padding + 1, height),
+            max(cols[0] - padding, 0), min(cols[-1] + padding + 1, width))
+
+def render_border_region(scene, frame, region, shape, filepath):
+    """Render one frame restricted to a pixel rectangle and return its combined pass"""
+    height, width = shape
+    row0, row1, col0, col1 = region
+    render = scene.render
+
+    # Render borders are measured from the bottom-left corner, EXR rows from the top
+    render.use_border = True
+    render.use_crop_to_border = False
+    render.border_min_x = col0 / width
+    render.border_max_x = col1 / width
+    render.border_min_y = (height - row1) / height
+    render.border_max_y = (height - row0) / height
+
+    scene.frame_set(frame)
+    render.filepath = filepath
+    bpy.ops.render.render(write_still=True)
+    render.use_border = False
+
+    channels = read_exr(filepath, channel_prefix=bpy.context.view_layer.name + ".Combined")
+    return get_exr_pass(channels, bpy.context.view_layer.name, "Combined", "RGBA")
+
+def save_frame_image(pixels, filepath, scene):
+    """Write an RGBA float array (top row first) as PNG through the scene's color management"""
+    height, width = pixels.shape[:2]
+    image = bpy.data.images.new("VariantFrame", width, height, alpha=True, float_buffer=True)
+    image.pixels.foreach_set(np.ascontiguousarray(pixels[::-1], dtype=np.float32).ravel())
+
+    image_settings = scene.render.image_settings
+    orig_format = image_settings.file_format
+    orig_depth = image_settings.color_depth
+    image_settings.file_format = 'PNG'
+    image_settings.color_depth = '8'
+    image.save_render(filepath, scene=scene)
+    image_settings.file_format = orig_format
+    image_settings.color_depth = orig_depth
+
+    bpy.data.images.remove(image)
+
+def render_border_variants(garden_path, base_material, variant_materials, output_dir):
+    """Render the animation once and derive every border material variant from its passes"""
+    scene = bpy.context.scene
+    output_dir = bpy.path.abspath(output_dir)
+    passes_dir = os.path.join(output_dir, "passes")
+    base_props = BORDER_MATERIALS[base_material]
+    padding = VARIANT_SETTINGS["region_padding"]
+    recolored = [name for name in variant_materials
+                 if name != base_material and is_color_only_variant(base_props, BORDER_MATERIALS[name])]
+    print(f"Border variants of {base_material}: recoloring {', '.join(recolored) or 'none'}, "
+          f"re-rendering the border region for the others")
+
+    # One full render of the base material with all passes
+    apply_border_material_properties(garden_path, base_props)
+    layer = setup_variant_passes(garden_path, scene)
+    scene.render.filepath = os.path.join(passes_dir, "")
+    bpy.ops.render.render(animation=True)
+    pass_paths = {frame: scene.render.frame_path(frame=frame)
+                  for frame in range(scene.frame_start, scene.frame_end + 1)}
+
+    stats = {"recolored": 0, "region_rendered": 0, "unchanged": 0}
+    for frame, pass_path in pass_paths.items():
+        channels = read_exr(pass_path)
+        combined = get_exr_pass(channels, layer, "Combined", "RGBA")
+        coverage = get_border_coverage(channels, layer, garden_path.name)
+        region = get_border_region(coverage, padding)
+        save_frame_image(combined, os.path.join(output_dir, base_material, f"{frame:04d}.png"), scene)
+
+        for name in variant_materials:
+            if name == base_material:
+                continue
+            props = BORDER_MATERIALS[name]
+            if region is None:
+                # Border not on screen, the frame is identical for every variant
+                pixels = combined
+                stats["unchanged"] += 1
+            elif is_color_only_variant(base_props, props):
+                pixels = recolor_border(channels, layer, coverage, base_props, props)
+                stats["recolored"] += 1
+            else:
+                # Shading changes: re-render only the border's rectangle
+                apply_border_material_properties(garden_path, props)
+                region_path = os.path.join(passes_dir, f"{name}_{frame:04d}.exr")
+                region_pixels = render_border_region(scene, frame, region, coverage.shape, region_path)
+                apply_border_material_properties(garden_path, base_props)
+
+                row0, row1, col0, col1 = region
+                pixels = combined.copy()
+                pixels[row0:row1, col0:col1] = region_pixels[row0:row1, col0:col1]
+                stats["region_rendered"] += 1
+
+            save_frame_image(pixels, os.path.join(output_dir, name, f"{frame:04d}.png"), scene)
+
+    print(f"Border variants: {stats['recolored']} recolored, {stats['region_rendered']} region renders, "
+          f"{stats['unchanged']} frames without visible border")
+    return stats
@@ -0,0 +1,73 @@
+import bpy
+import os
+from rendering.telemetry import get_configured_samples
+
+def activate_scene(scene):
+    """Make a scene the context scene, so builders link new objects into it"""
+    window = bpy.context.window or bpy.context.window_manager.windows[0]
+    window.scene = scene
+    return scene
+
+def _get_all_children(obj):
+    """An object and everything parented under it"""
+    objects = [obj]
+    for child in obj.children:
+        objects.extend(_get_all_children(child))
+    return objects
+
+def create_shared_collection(name, objects, scene=None):
+    """Move objects (with their children) into a collection other scenes can link instead of copying"""
+    scene = scene or bpy.context.scene
+    collection = bpy.data.collections.new(name)
+    scene.collection.children.link(collection)
+    for obj in objects:
+        for part in _get_all_children(obj):
+            for owner in list(part.users_collection):
+                owner.objects.unlink(part)
+            collection.objects.link(part)
+    return collection
+
+def _get_copy_settings_type():
+    """scene.new type that copies the context scene's settings ('EMPTY' before it was renamed)"""
+    items = bpy.ops.scene.new.get_rna_type().properties["type"].enum_items
+    return 'SETTINGS_COPY' if 'SETTINGS_COPY' in items else 'EMPTY'
+
+def create_variant_scene(name, base_scene, shared_collections):
+    """New scene with all of the base scene's render settings that links the shared collections"""
+    # Copy Settings duplicates the render, Cycles and output setup but no objects
+    activate_scene(base_scene)
+    bpy.ops.scene.new(type=_get_copy_settings_type())
+    scene = bpy.context.scene
+    scene.name = name
+    for collection in shared_collections:
+        scene.collection.children.link(collection)
+
+    scene.world = base_scene.world
+    scene.camera = base_scene.camera
+    # The settings every packed render depends on, set again in case the copy missed any
+    scene.render.engine = base_scene.render.engine
+    scene.render.resolution_x = base_scene.render.resolution_x
+    scene.render.resolution_y = base_scene.render.resolution_y
+    scene.render.resolution_percentage = base_scene.render.resolution_percentage
+    scene.render.fps = base_scene.render.fps
+    scene.render.fps_base = base_scene.render.fps_base
+    if base_scene.render.engine == 'CYCLES':
+        scene.cycles.device = base_scene.cycles.device
+        scene.cycles.samples = base_scene.cycles.samples
+    assert get_render_signature(scene) == get_render_signature(base_scene), \
+        f"Scene {name} did not get the render settings of {base_scene.name}"
+    return scene
+
+def get_render_signature(scene):
+    """Engine, resolution and samples of a scene, which every packed scene must share"""
+    render = scene.render
+    return (render.engine, render.resolution_x, render.resolution_y, render.resolution_percentage,
+            render.fps, render.fps_base, get_configured_samples(scene))
+
+def render_packed_scenes(scenes, output_dir):
+    """Render every scene of the file in this process, each to its own subfolder"""
+    for scene in scenes:
+        activate_scene(scene)
+        scene.render.filepath = os.path.join(output_dir, scene.name, "")
+        print(f"Rendering scene {scene.name} (frames {scene.frame_start}-{scene.frame_end}) to {scene.render.filepath}...")
+        bpy.ops.render.render(animation=True, scene=scene.name)
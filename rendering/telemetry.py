@@ -0,0 +1,204 @@
+import bpy
+import os
+import re
+import json
+import glob
+import time
+import socket
+from config import TELEMETRY_SETTINGS
+
+# Stats strings look like "Fra:12 | Mem:310.25M (Peak 512.40M) | Time:00:03.21 | ... | Sample 96/128"
+PEAK_MEMORY_PATTERN = re.compile(r"Peak[:\s]+([\d.]+)([KMG])")
+SAMPLE_PATTERN = re.compile(r"Sample (\d+)/(\d+)")
+MEMORY_UNITS = {"K": 1.0 / 1024.0, "M": 1.0, "G": 1024.0}
+
+# State of the running render: telemetry file, per-frame start time and stats, recent frame times,
+# the frames this worker still has to render after the current one (None: up to the scene's last frame)
+# and the file the current frame ends up in (None: the animation's frame path)
+TELEMETRY_STATE = {"path": None, "prometheus_path": None, "worker": None, "frame": None, "remaining": None,
+                   "output": None, "started": None, "peak_memory": None, "samples": None, "times": [], "frames": 0}
+
+# Extra per-frame fields of the telemetry records: name -> function(scene, depsgraph) returning a JSON value
+TELEMETRY_FIELDS = {}
+
+def register_telemetry_field(name, function):
+    """Add a field to every frame record; only evaluated while telemetry is being written"""
+    TELEMETRY_FIELDS[name] = function
+
+def get_worker_id():
+    """Name of this render process, unique across the nodes of a job"""
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+def set_remaining_frames(count):
+    """Tell the ETA how many frames this worker renders after the current one; None for the rest of the scene"""
+    TELEMETRY_STATE["remaining"] = count
+
+def set_output_file(path):
+    """Tell the frame record which file the frame being rendered ends up in; None for animation renders"""
+    TELEMETRY_STATE["output"] = path
+
+def get_telemetry_path(output_dir, worker=None):
+    """Telemetry file of one worker, so workers writing to one directory never interleave lines"""
+    output_dir = bpy.path.abspath(output_dir)
+    os.makedirs(output_dir, exist_ok=True)
+    return os.path.join(output_dir, f"{TELEMETRY_SETTINGS['file_prefix']}_{worker or get_worker_id()}.jsonl")
+
+def parse_render_stats(stats):
+    """Peak memory (MB) and samples done of a render stats string; None where not reported"""
+    peak = PEAK_MEMORY_PATTERN.search(stats)
+    sample = SAMPLE_PATTERN.findall(stats)
+    return (float(peak.group(1)) * MEMORY_UNITS[peak.group(2)] if peak else None,
+            int(sample[-1][0]) if sample else None)
+
+def get_configured_samples(scene):
+    """Sample count the render engine is set to"""
+    if scene.render.engine == 'CYCLES':
+        return scene.cycles.samples
+    if scene.render.engine in ('BLENDER_EEVEE', 'BLENDER_EEVEE_NEXT'):
+        return scene.eevee.taa_render_samples
+    return None
+
+def get_rolling_eta(scene, frame):
+    """Seconds left for this worker's frames after this one, from the mean of the recent frame times"""
+    times = TELEMETRY_STATE["times"][-TELEMETRY_SETTINGS["eta_window"]:]
+    remaining = TELEMETRY_STATE["remaining"]
+    if remaining is None:
+        # An animation render goes on to the last frame of the scene
+        remaining = max(0, scene.frame_end - frame) // max(1, scene.frame_step)
+    return remaining * sum(times) / len(times) if times else None
+
+def format_duration(seconds):
+    """Seconds as H:MM:SS"""
+    seconds = int(round(seconds))
+    return f"{seconds // 3600}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+def telemetry_render_pre(scene, depsgraph=None):
+    """Start timing a frame"""
+    TELEMETRY_STATE["frame"] = scene.frame_current
+    TELEMETRY_STATE["started"] = time.perf_counter()
+    TELEMETRY_STATE["peak_memory"] = None
+    TELEMETRY_STATE["samples"] = None
+
+def telemetry_render_stats(stats, depsgraph=None):
+    """Keep the highest peak memory and the latest sample count reported while a frame renders"""
+    peak, samples = parse_render_stats(stats)
+    if peak is not None:
+        TELEMETRY_STATE["peak_memory"] = max(TELEMETRY_STATE["peak_memory"] or 0.0, peak)
+    if samples is not None:
+        TELEMETRY_STATE["samples"] = samples
+
+def telemetry_render_post(scene, depsgraph=None):
+    """Write the finished frame as one JSON line, print the ETA and update the Prometheus textfile"""
+    if TELEMETRY_STATE["started"] is None:
+        return
+    frame = TELEMETRY_STATE["frame"]
+    wall_time = time.perf_counter() - TELEMETRY_STATE["started"]
+    TELEMETRY_STATE["started"] = None
+    TELEMETRY_STATE["times"].append(wall_time)
+    TELEMETRY_STATE["frames"] += 1
+
+    # Adaptive sampling can stop early; the last reported sample is what the frame got
+    samples = TELEMETRY_STATE["samples"] or get_configured_samples(scene)
+    eta = get_rolling_eta(scene, frame)
+    peak = TELEMETRY_STATE["peak_memory"]
+    record = {
+        "worker": TELEMETRY_STATE["worker"],
+        "scene": scene.name,
+        "frame": frame,
+        "wall_time": round(wall_time, 3),
+        "peak_memory_mb": None if peak is None else round(peak, 2),
+        "samples": samples,
+        "output": TELEMETRY_STATE["output"] or scene.render.frame_path(frame=frame),
+        "finished": time.time(),
+        "eta": None if eta is None else round(eta, 1)
+    }
+    for name, function in TELEMETRY_FIELDS.items():
+        record[name] = function(scene, depsgraph)
+    with open(TELEMETRY_STATE["path"], "a") as f:
+        f.write(json.dumps(record) + "\n")
+
+    eta_text = format_duration(eta) if eta is not None else "unknown"
+    memory_text = f"{peak:.0f}MB" if peak is not None else "unknown"
+    print(f"Frame {frame}: {wall_time:.2f}s, peak memory {memory_text}, {samples} samples, ETA {eta_text}")
+    if TELEMETRY_STATE["prometheus_path"]:
+        write_prometheus_textfile(TELEMETRY_STATE["prometheus_path"], record, TELEMETRY_STATE["frames"])
+
+def write_prometheus_textfile(path, record, frames_done):
+    """Export the latest frame as node-exporter textfile metrics, replaced atomically"""
+    labels = f'worker="{record["worker"]}",scene="{record["scene"]}"'
+    metrics = [
+        ("landscaping_render_frames_total", "counter", "Frames rendered by this worker", frames_done),
+        ("landscaping_render_last_frame", "gauge", "Number of the last rendered frame", record["frame"]),
+        ("landscaping_render_frame_seconds", "gauge", "Wall time of the last rendered frame", record["wall_time"]),
+        ("landscaping_render_peak_memory_bytes", "gauge", "Peak render memory of the last frame",
+         record["peak_memory_mb"] * 1024 * 1024 if record["peak_memory_mb"] is not None else "NaN"),
+        ("landscaping_render_eta_seconds", "gauge", "Estimated time left for this worker's frames",
+         record["eta"] if record["eta"] is not None else "NaN")
+    ]
+    lines = []
+    for name, kind, help_text, value in metrics:
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}", f"{name}{{{labels}}} {value}"]
+
+    # node-exporter may read the file at any time, so never let it see a partial write
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "w") as f:
+        f.write("\n".join(lines) + "\n")
+    os.replace(temp_path, path)
+
+def get_worker_prometheus_path(path, worker=None):
+    """Prometheus textfile of one worker, for workers of a job that would share one path"""
+    root, extension = os.path.splitext(path)
+    return f"{root}_{worker or get_worker_id()}{extension}"
+
+def register_render_telemetry(output_dir, prometheus_path=None, shared=False):
+    """Log every rendered frame of this process to its own JSON Lines file in the output directory"""
+    prometheus_path = prometheus_path or TELEMETRY_SETTINGS["prometheus_file"]
+    if prometheus_path and shared:
+        # Several workers of the job may run on this machine; each exports its own file
+        prometheus_path = get_worker_prometheus_path(prometheus_path)
+    TELEMETRY_STATE.update(path=get_telemetry_path(output_dir), worker=get_worker_id(), times=[], frames=0,
+                           remaining=None, output=None, prometheus_path=prometheus_path)
+    handlers = bpy.app.handlers
+    for handler_list, handler in ((handlers.render_pre, telemetry_render_pre),
+                                  (handlers.render_stats, telemetry_render_stats),
+                                  (handlers.render_post, telemetry_render_post)):
+        if handler not in handler_list:
+            handler_list.append(handler)
+    print(f"Render telemetry: {TELEMETRY_STATE['path']}")
+    return TELEMETRY_STATE["path"]
+
+def read_telemetry(paths):
+    """Frame records of several telemetry files; a frame rendered again keeps its latest record"""
+    records = {}
+    for path in paths:
+        with open(path) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                key = (record["scene"], record["frame"])
+                if key not in records or record["finished"] > records[key]["finished"]:
+                    records[key] = record
+    return sorted(records.values(), key=lambda r: (r["scene"], r["frame"]))
+
+def merge_telemetry(output_dir, merged_name=None):
+    """Merge the telemetry files of all workers of a job into one report, and print a summary"""
+    output_dir = bpy.path.abspath(output_dir)
+    merged_name = merged_name or f"{TELEMETRY_SETTINGS['file_prefix']}.jsonl"
+    pattern = os.path.join(output_dir, f"{TELEMETRY_SETTINGS['file_prefix']}_*.jsonl")
+    paths = sorted(glob.glob(pattern))
+    records = read_telemetry(paths)
+    with open(os.path.join(output_dir, merged_name), "w") as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+
+    if records:
+        times = [r["wall_time"] for r in records]
+        workers = {r["worker"] for r in records}
+        span = max(r["finished"] for r in records) - min(r["finished"] - r["wall_time"] for r in records)
+        slowest = max(records, key=lambda r: r["wall_time"])
+        print(f"Merged {len(records)} frames from {len(paths)} files ({len(workers)} workers): "
+              f"{sum(times):.1f}s render time in {format_duration(span)} wall clock, "
+              f"mean {sum(times) / len(times):.2f}s, slowest frame {slowest['frame']} ({slowest['wall_time']:.2f}s), "
+              f"peak memory {max((r['peak_memory_mb'] or 0.0) for r in records):.0f}MB")
+    return records
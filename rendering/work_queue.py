@@ -0,0 +1,319 @@
+"""
+Work-stealing frame queue shared by render workers.
+
+Workers claim small batches of frames from a queue on a shared filesystem (a
+directory of lock files) or on one machine (a SQLite file), so nodes that
+finish early keep taking work instead of idling. Batches shrink as the job
+runs out of frames, and frames claimed by a worker whose heartbeat stopped are
+handed out again. Rendering a frame twice is harmless, so a rare race between
+two workers reclaiming the same stale frame only costs time, never a frame.
+
+Only the standard library is used, so the queue can be exercised without
+Blender: python rendering/work_queue.py --simulate /tmp/queue --workers 4
+"""
+
+import os
+import json
+import math
+import time
+import random
+import sqlite3
+import argparse
+import multiprocessing
+from contextlib import closing
+
+def get_batch_size(remaining, workers, job):
+    """Frames per claim: a share of what is left per live worker, so batches shrink towards the end of the job"""
+    size = math.ceil(remaining / (max(1, workers) * job["batch_divisor"]))
+    return max(job["min_batch"], min(job["max_batch"], size))
+
+def _write_new_file(path, data):
+    """Publish a JSON file only if it does not exist yet; readers never see it half written"""
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "w") as f:
+        json.dump(data, f)
+    try:
+        os.link(temp_path, path)
+        return True
+    except FileExistsError:
+        return False
+    finally:
+        os.remove(temp_path)
+
+def _touch(path):
+    """Create a file or refresh its modification time, which serves as a heartbeat"""
+    with open(path, "a"):
+        pass
+    os.utime(path)
+
+# Lock-file directory: job.json with the frames in priority order, claims/<frame>
+# holding the claiming worker (its mtime is the heartbeat), done/<frame> and
+# workers/<worker> touched on every heartbeat
+
+def _directory_create(path, frames, job):
+    """Set up the queue folders and publish the job, or read the job another worker published"""
+    for name in ("claims", "done", "workers"):
+        os.makedirs(os.path.join(path, name), exist_ok=True)
+    _write_new_file(os.path.join(path, "job.json"), dict(job, frames=list(frames)))
+    with open(os.path.join(path, "job.json")) as f:
+        return json.load(f)
+
+def _directory_live_workers(queue, now):
+    """Workers whose heartbeat is recent"""
+    folder = os.path.join(queue["path"], "workers")
+    timeout = queue["job"]["heartbeat_timeout"]
+    live = 0
+    for name in os.listdir(folder):
+        try:
+            live += now - os.stat(os.path.join(folder, name)).st_mtime < timeout
+        except FileNotFoundError:
+            pass
+    return live
+
+def _directory_try_claim(queue, worker, frame, now):
+    """Claim one frame, taking over a claim whose worker stopped sending heartbeats"""
+    claim = os.path.join(queue["path"], "claims", str(frame))
+    try:
+        fd = os.open(claim, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        try:
+            if now - os.stat(claim).st_mtime < queue["job"]["heartbeat_timeout"]:
+                return False
+            # Move the stale claim aside; only one worker's rename succeeds
+            stale = f"{claim}.stale.{worker}"
+            os.rename(claim, stale)
+            os.remove(stale)
+        except FileNotFoundError:
+            return False
+        return _directory_try_claim(queue, worker, frame, now)
+    with os.fdopen(fd, "w") as f:
+        f.write(worker)
+    return True
+
+def _directory_claim(queue, worker):
+    """Claim the next available frames in priority order, including frames of dead workers"""
+    path = queue["path"]
+    now = time.time()
+    _touch(os.path.join(path, "workers", worker))
+    done = set(os.listdir(os.path.join(path, "done")))
+    pending = [frame for frame in queue["job"]["frames"] if str(frame) not in done]
+    if not pending:
+        return None
+
+    claims = os.path.join(path, "claims")
+    timeout = queue["job"]["heartbeat_timeout"]
+    available = []
+    for frame in pending:
+        try:
+            if now - os.stat(os.path.join(claims, str(frame))).st_mtime >= timeout:
+                available.append(frame)
+        except FileNotFoundError:
+            available.append(frame)
+
+    size = get_batch_size(len(available), _directory_live_workers(queue, now), queue["job"])
+    batch = []
+    for frame in available:
+        if len(batch) == size:
+            break
+        if _directory_try_claim(queue, worker, frame, now):
+            batch.append(frame)
+    return batch
+
+def _directory_heartbeat(queue, worker, frames):
+    """Refresh the worker file and the claims still being rendered"""
+    path = queue["path"]
+    _touch(os.path.join(path, "workers", worker))
+    for frame in frames:
+        try:
+            os.utime(os.path.join(path, "claims", str(frame)))
+        except FileNotFoundError:
+            pass
+
+def _directory_complete(queue, worker, frame):
+    """Mark a frame done and release its claim"""
+    _touch(os.path.join(queue["path"], "done", str(frame)))
+    try:
+        os.remove(os.path.join(queue["path"], "claims", str(frame)))
+    except FileNotFoundError:
+        pass
+
+def _directory_status(queue):
+    """Count done and claimed frames from the folder listings"""
+    done = len(os.listdir(os.path.join(queue["path"], "done")))
+    claimed = len([name for name in os.listdir(os.path.join(queue["path"], "claims")) if name.isdigit()])
+    return {"frames": len(queue["job"]["frames"]), "done": done, "claimed": claimed}
+
+# SQLite file: one row per frame with its priority, state, worker and heartbeat,
+# every claim in one write transaction. For workers on one machine; SQLite
+# locking is not reliable on network filesystems
+
+def _sqlite_connect(path):
+    """Connection in autocommit mode, so transactions are started explicitly"""
+    connection = sqlite3.connect(path, timeout=60.0, isolation_level=None)
+    connection.execute("PRAGMA journal_mode=WAL")
+    return connection
+
+def _sqlite_create(path, frames, job):
+    """Create the tables and rows of the job, or read the job another worker created"""
+    with closing(_sqlite_connect(path)) as connection:
+        connection.execute("BEGIN IMMEDIATE")
+        connection.execute("CREATE TABLE IF NOT EXISTS job (settings TEXT)")
+        connection.execute("CREATE TABLE IF NOT EXISTS frames (frame INTEGER PRIMARY KEY, position INTEGER, "
+                           "state TEXT, worker TEXT, heartbeat REAL)")
+        connection.execute("CREATE TABLE IF NOT EXISTS workers (worker TEXT PRIMARY KEY, heartbeat REAL)")
+        row = connection.execute("SELECT settings FROM job").fetchone()
+        if row is None:
+            connection.execute("INSERT INTO job VALUES (?)", (json.dumps(dict(job, frames=list(frames))),))
+            connection.executemany("INSERT INTO frames VALUES (?, ?, 'pending', NULL, NULL)",
+                                   [(frame, position) for position, frame in enumerate(frames)])
+            connection.execute("COMMIT")
+            return dict(job, frames=list(frames))
+        connection.execute("COMMIT")
+        return json.loads(row[0])
+
+def _sqlite_claim(queue, worker):
+    """Reset stale claims and claim the next pending frames in one transaction"""
+    job = queue["job"]
+    now = time.time()
+    with closing(_sqlite_connect(queue["path"])) as connection:
+        connection.execute("BEGIN IMMEDIATE")
+        connection.execute("INSERT OR REPLACE INTO workers VALUES (?, ?)", (worker, now))
+        connection.execute("UPDATE frames SET state = 'pending', worker = NULL "
+                           "WHERE state = 'claimed' AND heartbeat < ?", (now - job["heartbeat_timeout"],))
+        remaining, available = connection.execute(
+            "SELECT COUNT(*), SUM(state = 'pending') FROM frames WHERE state != 'done'").fetchone()
+        if not remaining:
+            connection.execute("COMMIT")
+            return None
+        workers = connection.execute("SELECT COUNT(*) FROM workers WHERE heartbeat >= ?",
+                                     (now - job["heartbeat_timeout"],)).fetchone()[0]
+        size = get_batch_size(available, workers, job)
+        batch = [row[0] for row in connection.execute(
+            "SELECT frame FROM frames WHERE state = 'pending' ORDER BY position LIMIT ?", (size,))]
+        connection.executemany("UPDATE frames SET state = 'claimed', worker = ?, heartbeat = ? WHERE frame = ?",
+                               [(worker, now, frame) for frame in batch])
+        connection.execute("COMMIT")
+    return batch
+
+def _sqlite_heartbeat(queue, worker, frames):
+    """Refresh the heartbeat of the worker and of every frame it holds"""
+    now = time.time()
+    with closing(_sqlite_connect(queue["path"])) as connection:
+        connection.execute("BEGIN IMMEDIATE")
+        connection.execute("INSERT OR REPLACE INTO workers VALUES (?, ?)", (worker, now))
+        connection.execute("UPDATE frames SET heartbeat = ? WHERE worker = ? AND state = 'claimed'", (now, worker))
+        connection.execute("COMMIT")
+
+def _sqlite_complete(queue, worker, frame):
+    """Mark a frame done"""
+    with closing(_sqlite_connect(queue["path"])) as connection:
+        connection.execute("UPDATE frames SET state = 'done', worker = ? WHERE frame = ?", (worker, frame))
+
+def _sqlite_status(queue):
+    """Count frames per state"""
+    with closing(_sqlite_connect(queue["path"])) as connection:
+        counts = dict(connection.execute("SELECT state, COUNT(*) FROM frames GROUP BY state").fetchall())
+    return {"frames": len(queue["job"]["frames"]), "done": counts.get("done", 0), "claimed": counts.get("claimed", 0)}
+
+# Queue backends by name, picked from the queue path (a .sqlite/.db file or a directory)
+QUEUE_BACKENDS = {
+    "directory": {"create": _directory_create, "claim": _directory_claim, "heartbeat": _directory_heartbeat,
+                  "complete": _directory_complete, "status": _directory_status},
+    "sqlite": {"create": _sqlite_create, "claim": _sqlite_claim, "heartbeat": _sqlite_heartbeat,
+               "complete": _sqlite_complete, "status": _sqlite_status}
+}
+
+def get_queue_backend(path):
+    """SQLite for .sqlite/.db files, a lock-file directory otherwise"""
+    return "sqlite" if path.endswith((".sqlite", ".db")) else "directory"
+
+def open_queue(path, frames, settings):
+    """Create the queue of a job with frames in the order to hand them out, or join it if it exists"""
+    backend = get_queue_backend(path)
+    job = {key: settings[key] for key in ("min_batch", "max_batch", "batch_divisor", "heartbeat_timeout")}
+    # The first worker's frames and settings define the job for every worker
+    job = QUEUE_BACKENDS[backend]["create"](path, frames, job)
+    return {"path": path, "backend": backend, "job": job}
+
+def claim_frames(queue, worker):
+    """Next batch of frames for a worker: a list (empty while the rest is claimed by others), or None when all are done"""
+    return QUEUE_BACKENDS[queue["backend"]]["claim"](queue, worker)
+
+def send_heartbeat(queue, worker, frames):
+    """Tell the other workers this one is alive and still rendering its claimed frames"""
+    QUEUE_BACKENDS[queue["backend"]]["heartbeat"](queue, worker, frames)
+
+def complete_frame(queue, worker, frame):
+    """Mark a frame rendered, so it is never handed out again"""
+    QUEUE_BACKENDS[queue["backend"]]["complete"](queue, worker, frame)
+
+def get_queue_status(queue):
+    """Frames in the job, done and currently claimed"""
+    return QUEUE_BACKENDS[queue["backend"]]["status"](queue)
+
+def run_queue_worker(queue, worker, render_frame, poll_interval):
+    """Claim, render and complete batches until the job is done; returns the frames this worker rendered"""
+    rendered = []
+    while True:
+        batch = claim_frames(queue, worker)
+        if batch is None:
+            return rendered
+        if not batch:
+            # Everything left is claimed; wait in case a worker dies and its frames come back
+            time.sleep(poll_interval)
+            continue
+        for index, frame in enumerate(batch):
+            # The rest of the batch is what this worker is sure to render next
+            render_frame(frame, len(batch) - index - 1)
+            complete_frame(queue, worker, frame)
+            rendered.append(frame)
+            send_heartbeat(queue, worker, batch[index + 1:])
+
+def _simulate_worker(path, frames, settings, worker, frame_seconds, crash_after, results):
+    """One simulated render process, optionally dying with frames still claimed"""
+    queue = open_queue(path, frames, settings)
+    rendered = []
+
+    def render_frame(frame, remaining):
+        if crash_after is not None and len(rendered) >= crash_after:
+            os._exit(1)
+        time.sleep(frame_seconds * random.uniform(0.5, 1.5))
+        rendered.append(frame)
+
+    run_queue_worker(queue, worker, render_frame, settings["poll_interval"])
+    results.put((worker, rendered))
+
+def simulate_workers(path, frame_count, worker_count, settings, frame_seconds=0.02):
+    """Render a fake job with local processes, the first of which dies mid-batch; checks every frame got done"""
+    frames = list(range(1, frame_count + 1))
+    results = multiprocessing.Queue()
+    processes = [multiprocessing.Process(target=_simulate_worker,
+                                         args=(path, frames, settings, f"worker{i}", frame_seconds,
+                                               2 if i == 0 else None, results))
+                 for i in range(worker_count)]
+    started = time.time()
+    for process in processes:
+        process.start()
+    finished = [results.get() for _ in range(worker_count - 1)]
+    for process in processes:
+        process.join()
+
+    # The dead worker's reclaimed frames must have been rendered by the others
+    rendered = [frame for _, worker_frames in finished for frame in worker_frames]
+    status = get_queue_status(open_queue(path, frames, settings))
+    for worker, worker_frames in sorted(finished):
+        print(f"{worker}: {len(worker_frames)} frames")
+    print(f"{status['done']} of {len(frames)} frames done in {time.time() - started:.1f}s, "
+          f"{len(rendered) - len(set(rendered))} rendered twice by the surviving workers")
+    return status["done"] == len(frames)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Exercise the frame queue with local processes')
+    parser.add_argument('--simulate', type=str, required=True, help='Queue directory, or a .sqlite file')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--frames', type=int, default=150)
+    parser.add_argument('--heartbeat-timeout', type=float, default=1.0)
+    args = parser.parse_args()
+    settings = {"min_batch": 1, "max_batch": 8, "batch_divisor": 2,
+                "heartbeat_timeout": args.heartbeat_timeout, "poll_interval": 0.1}
+    raise SystemExit(0 if simulate_workers(args.simulate, args.frames, args.workers, settings) else 1)
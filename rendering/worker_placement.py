@@ -0,0 +1,178 @@
+import bpy
+import os
+import sys
+import glob
+import json
+import time
+import subprocess
+import numpy as np
+from config import WORKER_PLACEMENT_SETTINGS
+
+CPU_SYSFS = "/sys/devices/system/cpu"
+NODE_SYSFS = "/sys/devices/system/node"
+
+def parse_cpu_list(text):
+    """CPU numbers of a sysfs list such as 0-3,8-11"""
+    cpus = []
+    for part in text.strip().split(","):
+        if not part:
+            continue
+        first, _, last = part.partition("-")
+        cpus.extend(range(int(first), int(last or first) + 1))
+    return cpus
+
+def format_cpu_list(cpus):
+    """CPUs as a comma separated list for the command line"""
+    return ",".join(str(cpu) for cpu in cpus)
+
+def _read_sysfs(path, default=None):
+    """Contents of a sysfs file, or the default where the kernel does not provide it"""
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return default
+
+def read_cpu_topology():
+    """Physical cores (with their SMT siblings) and NUMA nodes of the CPUs this process may run on"""
+    available = sorted(os.sched_getaffinity(0))
+    node_of = {}
+    for path in glob.glob(os.path.join(NODE_SYSFS, "node[0-9]*", "cpulist")):
+        node = int(os.path.basename(os.path.dirname(path))[4:])
+        for cpu in parse_cpu_list(_read_sysfs(path, "")):
+            node_of[cpu] = node
+
+    # SMT siblings share a core id within a package
+    cores = {}
+    for cpu in available:
+        topology = os.path.join(CPU_SYSFS, f"cpu{cpu}", "topology")
+        package = int(_read_sysfs(os.path.join(topology, "physical_package_id"), 0))
+        core = int(_read_sysfs(os.path.join(topology, "core_id"), cpu))
+        cores.setdefault((node_of.get(cpu, 0), package, core), []).append(cpu)
+
+    core_list = [sorted(cpus) for _, cpus in sorted(cores.items())]
+    nodes = sorted({node for node, _, _ in cores})
+    return {"cpus": available, "cores": core_list, "nodes": nodes,
+            "smt": max(len(cpus) for cpus in core_list)}
+
+def describe_topology(topology):
+    """One-line summary of a topology"""
+    return (f"{len(topology['cpus'])} CPUs, {len(topology['cores'])} cores "
+            f"({topology['smt']} threads per core), {len(topology['nodes'])} NUMA nodes")
+
+def plan_worker_cpus(topology, worker_count):
+    """CPUs of each worker: whole cores, split in node order so a worker stays within one NUMA node where possible"""
+    worker_count = max(1, min(worker_count, len(topology["cores"])))
+    chunks = np.array_split(np.arange(len(topology["cores"])), worker_count)
+    return [sorted(cpu for index in chunk for cpu in topology["cores"][index]) for chunk in chunks]
+
+def get_candidate_worker_counts(topology):
+    """Worker counts worth calibrating: powers of two and the NUMA node count, leaving each worker enough cores"""
+    most = max(1, len(topology["cores"]) // WORKER_PLACEMENT_SETTINGS["min_cores_per_worker"])
+    candidates = {len(topology["nodes"])}
+    count = 1
+    while count <= most:
+        candidates.add(count)
+        count *= 2
+    return sorted(count for count in candidates if count <= most)
+
+def pin_current_process(cpus):
+    """Run this process (and the render threads it starts) only on the given CPUs"""
+    os.sched_setaffinity(0, cpus)
+
+def apply_worker_threads(scene, cpus):
+    """Render with exactly one thread per pinned CPU instead of one per CPU of the machine"""
+    scene.render.threads_mode = 'FIXED'
+    scene.render.threads = len(cpus)
+
+def get_worker_command(service_args, extra_args):
+    """Command line of a child Blender running this script with the given arguments after '--'"""
+    argv = sys.argv
+    blender_args = argv[1:argv.index("--")] if "--" in argv else argv[1:]
+    return [bpy.app.binary_path] + blender_args + ["--"] + list(service_args) + list(extra_args)
+
+def start_workers(service_args, cpu_plans, extra_args=()):
+    """Start one pinned Blender worker per CPU set"""
+    processes = []
+    for index, cpus in enumerate(cpu_plans):
+        command = get_worker_command(service_args, ["--cpus", format_cpu_list(cpus)] + list(extra_args))
+        print(f"Worker {index}: CPUs {format_cpu_list(cpus)}")
+        processes.append(subprocess.Popen(command))
+    return processes
+
+def wait_for_files(pattern, count, processes, timeout):
+    """Wait until count files match a pattern; fails if a worker exits before writing its file"""
+    deadline = time.time() + timeout
+    while len(glob.glob(pattern)) < count:
+        if any(process.poll() not in (None, 0) for process in processes):
+            raise RuntimeError("A calibration worker failed, see its output above")
+        if time.time() > deadline:
+            raise RuntimeError(f"Timed out waiting for calibration workers ({pattern})")
+        time.sleep(0.5)
+
+def run_calibration_render(calibration_dir):
+    """Worker side of a calibration: signal ready, wait for the others, render one short frame and report its time"""
+    scene = bpy.context.scene
+    settings = WORKER_PLACEMENT_SETTINGS
+    scene.cycles.samples = settings["calibration_samples"]
+    scene.render.resolution_percentage = settings["calibration_resolution_percentage"]
+    frame = settings["calibration_frame"] or (scene.frame_start + scene.frame_end) // 2
+    scene.frame_set(frame)
+
+    # All workers render at the same time, so the measurement includes their contention
+    pid = os.getpid()
+    open(os.path.join(calibration_dir, f"ready_{pid}"), "w").close()
+    while not os.path.exists(os.path.join(calibration_dir, "go")):
+        time.sleep(0.1)
+    started = time.perf_counter()
+    bpy.ops.render.render()
+    seconds = time.perf_counter() - started
+    with open(os.path.join(calibration_dir, f"result_{pid}.json"), "w") as f:
+        json.dump({"seconds": seconds, "threads": scene.render.threads}, f)
+
+def measure_worker_count(service_args, topology, worker_count, calibration_root):
+    """Frames per second of worker_count pinned workers rendering the calibration frame side by side"""
+    calibration_dir = os.path.join(calibration_root, f"workers_{worker_count}")
+    os.makedirs(calibration_dir, exist_ok=True)
+    for path in glob.glob(os.path.join(calibration_dir, "*")):
+        os.remove(path)
+
+    processes = start_workers(service_args, plan_worker_cpus(topology, worker_count),
+                              ["--calibrate-dir", calibration_dir])
+    timeout = WORKER_PLACEMENT_SETTINGS["calibration_timeout"]
+    wait_for_files(os.path.join(calibration_dir, "ready_*"), worker_count, processes, timeout)
+    open(os.path.join(calibration_dir, "go"), "w").close()
+    wait_for_files(os.path.join(calibration_dir, "result_*.json"), worker_count, processes, timeout)
+    for process in processes:
+        process.wait()
+
+    seconds = []
+    for path in glob.glob(os.path.join(calibration_dir, "result_*.json")):
+        with open(path) as f:
+            seconds.append(json.load(f)["seconds"])
+    throughput = worker_count / max(seconds)
+    print(f"Calibration: {worker_count} workers, slowest frame {max(seconds):.2f}s, {throughput:.3f} frames/s")
+    return throughput
+
+def calibrate_worker_count(service_args, topology, calibration_key):
+    """Worker count with the best measured throughput for this scene and machine, measured once and then cached"""
+    path = bpy.path.abspath(WORKER_PLACEMENT_SETTINGS["calibration_file"])
+    cache = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            cache = json.load(f)
+    key = json.dumps(dict(calibration_key, cpus=topology["cpus"]), sort_keys=True)
+    if key in cache:
+        print(f"Using calibrated worker count {cache[key]['workers']} from {path}")
+        return cache[key]["workers"]
+
+    calibration_root = os.path.join(os.path.dirname(path) or ".", "worker_calibration")
+    throughputs = {count: measure_worker_count(service_args, topology, count, calibration_root)
+                   for count in get_candidate_worker_counts(topology)}
+    best = max(throughputs, key=throughputs.get)
+    cache[key] = {"workers": best, "throughput": throughputs}
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(cache, f, indent=2)
+    print(f"Calibration picked {best} workers")
+    return best
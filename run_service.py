@@ -23,17 +23,39 @@ if project_dir not in sys.path:
     sys.path.append(project_dir)
 
 # Import project modules - these will be available after directory setup
-from config import GARDEN_PATH_SETTINGS, MATERIAL_COLORS, ANIMATION_FRAMES, setup_render_settings
+from config import COST_MODEL_SETTINGS, WORK_QUEUE_SETTINGS, GARDEN_PATH_SETTINGS, MATERIAL_COLORS, ANIMATION_FRAMES, BORDER_MATERIALS, BORDER_MESH_SETTINGS, SOIL_FILL_SETTINGS, BAKE_SETTINGS, SCAN_CLOUD_SETTINGS, GRASS_SETTINGS, LOD_SETTINGS, TERRAIN_FOLLOW_SETTINGS, VALIDATION_SETTINGS, KEYFRAME_REDUCTION_SETTINGS, setup_render_settings
 from utils.blender_utils import clear_scene, setup_environment
-from models.terrain import create_terrain, create_grass
-from models.robot import create_robot
-from models.garden_path import create_garden_path, create_soil_fill
-from models.effects import create_scan_effect
+from utils.keyframe_reduction import reduce_keyframes
+from models.terrain import create_terrain, create_terrain_from_point_cloud, create_grass, create_terrain_lods
+from models.grass_instancing import create_grass_instancing, get_grass_instance_reporter
+from models.robot import create_robot, create_robot_lods, duplicate_robot
+from models.lod import select_lod_levels
+from models.garden_path import create_garden_path, create_border_mesh, create_soil_fill, create_soil_fill_mesh, apply_border_material_properties
+from models.effects import create_scan_effect, create_scan_point_cloud
+from models.build_plan import plan_builds
+from materials.texture_baking import bake_static_materials
+from rendering.material_variants import render_border_variants
+from rendering.differential import capture_scene_snapshot, save_scene_snapshot, render_differential
+from rendering.scene_packing import activate_scene, create_shared_collection, create_variant_scene, render_packed_scenes
+from rendering.telemetry import register_render_telemetry, register_telemetry_field, merge_telemetry, read_telemetry, get_worker_id
+from rendering.cost_model import learn_render_costs
+from rendering.frame_distribution import get_frame_plan, get_frame_costs, order_frames_longest_first, render_frames
+from rendering.work_queue import open_queue, run_queue_worker
+from rendering.worker_placement import (read_cpu_topology, describe_topology, plan_worker_cpus, parse_cpu_list,
+                                        pin_current_process, apply_worker_threads, start_workers,
+                                        calibrate_worker_count, run_calibration_render)
+from rendering.frame_cache import reset_frame_dependencies, track_config_settings, get_file_signature, track_global_fields, track_object_fields, render_with_frame_cache
 from animation.scan_phase import animate_scan_phase
 from animation.planning_phase import animate_planning_phase
 from animation.border_phase import animate_border_phase
 from animation.filling_phase import animate_filling_phase
 from animation.completion_phase import animate_completion_phase
+from animation.robot_motion import apply_terrain_following
+from animation.timeline import compile_timeline, store_timeline, retime_scene
+from animation.validation import validate_animation, print_validation_report, has_errors
+
+# Arguments a packed variant may override; everything else is shared by all scenes
+PACKED_VARIANT_FIELDS = ("shape", "size", "border_material", "duration")
 
 def parse_args():
     """Parse command line arguments passed after '--'"""
@@ -53,9 +75,13 @@ def parse_args():
     parser.add_argument('--size', type=float, default=1.0,
                         help='Scale factor for garden size (default=1.0)')
     
+    # Site
+    parser.add_argument('--terrain-scan', type=str, default=None,
+                        help='Point cloud scan of the yard (.ply, .xyz or .npy) to build the terrain from')
+    
     # Materials
     parser.add_argument('--border-material', type=str, default='concrete',
-                        choices=['concrete', 'clay', 'stone', 'wood'],
+                        choices=list(BORDER_MATERIALS),
                         help='Material for garden borders')
     
     # Output options
@@ -66,10 +92,49 @@ def parse_args():
     parser.add_argument('--resolution', type=str, default='1080p',
                         choices=['720p', '1080p', '1440p', '4k'],
                         help='Output resolution')
+    parser.add_argument('--bake', action='store_true',
+                        help='Bake procedural materials of static objects into cached image textures')
+    parser.add_argument('--variants', type=str, nargs='+', default=None,
+                        choices=list(BORDER_MATERIALS),
+                        help='Render once and derive these border material variants from render passes')
+    parser.add_argument('--frame-cache', action='store_true',
+                        help='Reuse rendered frames from the shared frame cache when their inputs match')
+    parser.add_argument('--diff-base', type=str, default=None,
+                        help='Output directory of an earlier render; only re-render the pixels that changed since')
+    parser.add_argument('--telemetry', action='store_true',
+                        help='Write per-frame render time, peak memory, samples and output path as JSON Lines '
+                             'to the output directory and print a rolling ETA')
+    parser.add_argument('--prometheus-file', type=str, default=None,
+                        help='With --telemetry, also keep this node-exporter textfile (.prom) up to date')
+    parser.add_argument('--merge-telemetry', type=str, default=None, metavar='DIR',
+                        help='Only merge the telemetry files all workers wrote to DIR into one report')
+    parser.add_argument('--nodes', type=int, default=None,
+                        help='Split the frames over this many render nodes by predicted cost, longest frames first')
+    parser.add_argument('--node', type=int, default=0,
+                        help='With --nodes, index (from 0) of the node this process renders for')
+    parser.add_argument('--queue', type=str, default=None,
+                        help='Claim frame batches from this shared queue (a directory, or a .sqlite file for one machine) '
+                             'until the job is done; start any number of workers with the same queue')
+    parser.add_argument('--local-workers', type=str, default=None, metavar='COUNT',
+                        help='Render with this many Blender workers on this machine, each pinned to its own cores; '
+                             '"auto" measures the best count with a short calibration render')
+    parser.add_argument('--cpus', type=str, default=None,
+                        help='Pin this process to these CPUs (e.g. 0-3,8-11) and render with one thread per CPU')
+    parser.add_argument('--calibrate-dir', type=str, default=None,
+                        help=argparse.SUPPRESS)
+    parser.add_argument('--validate', action='store_true',
+                        help='Check the animation for speed limits, jumps, carried plugs, collisions and phase overlaps even if disabled in config; do not render if it fails')
     
     # Animation options
     parser.add_argument('--duration', type=float, default=1.0,
                         help='Duration scale factor (default=1.0, faster<1.0<slower)')
+    parser.add_argument('--pack', type=str, nargs='+', default=None, metavar='SPEC',
+                        help='Build these variants as scenes of one file sharing terrain, lights and camera, '
+                             'e.g. "shape=circular,border-material=stone" "duration=1.5"; renders them all in this process')
+    parser.add_argument('--frames', type=int, nargs=2, default=None, metavar=('START', 'END'),
+                        help='Render only these frames (a farm chunk) and skip building what cannot be seen in them')
+    parser.add_argument('--retime', action='store_true',
+                        help='Only rescale the keyframes of the scene in the opened .blend to --duration, without rebuilding it')
     
     # Parse known args
     argv = sys.argv
@@ -127,33 +192,8 @@ def get_garden_shape(shape_type, size):
 
 def get_material_properties(material_name):
     """Get properties for specified material"""
-    if material_name == 'concrete':
-        return {
-            "color": (0.7, 0.7, 0.7, 1.0),
-            "roughness": 0.9,
-            "metallic": 0.0
-        }
-    elif material_name == 'clay':
-        return {
-            "color": (0.65, 0.45, 0.31, 1.0),
-            "roughness": 0.8,
-            "metallic": 0.0
-        }
-    elif material_name == 'stone':
-        return {
-            "color": (0.5, 0.5, 0.5, 1.0),
-            "roughness": 0.7,
-            "metallic": 0.1
-        }
-    elif material_name == 'wood':
-        return {
-            "color": (0.55, 0.35, 0.15, 1.0),
-            "roughness": 0.6,
-            "metallic": 0.0
-        }
-    else:
-        # Default to concrete
-        return get_material_properties('concrete')
+    # Default to concrete
+    return BORDER_MATERIALS.get(material_name, BORDER_MATERIALS["concrete"])
 
 def get_resolution_settings(resolution):
     """Get resolution width and height"""
@@ -169,15 +209,25 @@ def get_resolution_settings(resolution):
         # Default to 1080p
         return 1920, 1080
 
-def setup_service_animation(args):
-    """Set up the animation based on service parameters"""
-    print(f"Setting up {args.service} service with {args.shape} shape...")
-    
-    # Clear existing scene and set up environment
-    clear_scene()
-    setup_environment()
+def get_output_path(output_dir):
+    """Output directory as a Blender path ending in a separator"""
+    output_path = output_dir
+    if not os.path.isabs(output_path):
+        # Make relative paths relative to blend file
+        if output_path.startswith('//'):
+            # Already a Blender relative path
+            pass
+        else:
+            # Convert to Blender relative path
+            output_path = '//' + output_path
     
-    # Update render settings based on arguments
+    # Make sure path ends with separator
+    if not output_path.endswith('/'):
+        output_path += '/'
+    return output_path
+
+def apply_render_args(args):
+    """Set the render engine and resolution of the current scene from the arguments"""
     bpy.context.scene.render.engine = 'CYCLES'
     bpy.context.scene.cycles.device = 'GPU'
     bpy.context.scene.cycles.samples = 128
@@ -186,106 +236,350 @@ def setup_service_animation(args):
     bpy.context.scene.render.resolution_x = res_x
     bpy.context.scene.render.resolution_y = res_y
     
-    # Set output path if rendering
-    if args.render:
-        output_path = args.output_dir
-        if not os.path.isabs(output_path):
-            # Make relative paths relative to blend file
-            if output_path.startswith('//'):
-                # Already a Blender relative path
-                pass
-            else:
-                # Convert to Blender relative path
-                output_path = '//' + output_path
-        
-        # Make sure path ends with separator
-        if not output_path.endswith('/'):
-            output_path += '/'
-            
-        bpy.context.scene.render.filepath = output_path
-    
-    # Calculate frame ranges based on duration scale
-    duration_scale = args.duration
-    frame_ranges = {}
-    for phase, (start, end) in ANIMATION_FRAMES.items():
-        phase_duration = end - start + 1
-        new_duration = max(1, int(phase_duration * duration_scale))
-        if phase == "scan":
-            frame_ranges[phase] = (1, new_duration)
-        else:
-            prev_end = frame_ranges[list(ANIMATION_FRAMES.keys())[list(ANIMATION_FRAMES.keys()).index(phase) - 1]][1]
-            frame_ranges[phase] = (prev_end + 1, prev_end + new_duration)
-    
-    # Create models
-    print("Creating terrain...")
-    terrain = create_terrain()
-    create_grass(terrain)
-    
-    print("Creating robot...")
-    robot = create_robot()
-    
+    # Pinned workers must not start a thread per CPU of the whole machine
+    if args.cpus:
+        apply_worker_threads(bpy.context.scene, parse_cpu_list(args.cpus))
+
+def apply_telemetry_args(args, output_dir):
+    """Log every frame this process renders, if telemetry was requested (always for node renders); returns the log path"""
+    if args.telemetry or args.prometheus_file or args.nodes or args.queue:
+        # Nodes and queue workers of one job can run side by side on a machine
+        return register_render_telemetry(output_dir, args.prometheus_file, shared=bool(args.nodes or args.queue))
+    return None
+
+def render_from_queue(queue_path, output_path):
+    """Render frames claimed from the shared queue, longest predicted first, until none are left"""
+    queue_path = bpy.path.abspath(queue_path)
+    frames, costs = get_frame_costs()
+    queue = open_queue(queue_path, order_frames_longest_first(frames, costs), WORK_QUEUE_SETTINGS)
+    worker = get_worker_id()
+    print(f"Rendering frames from queue {queue_path} as {worker} to {output_path}...")
+    rendered = run_queue_worker(queue, worker, lambda frame, remaining: render_frames([frame], output_path, remaining),
+                                WORK_QUEUE_SETTINGS["poll_interval"])
+    print(f"Queue done: this worker rendered {len(rendered)} frames")
+
+def learn_from_telemetry(telemetry_path):
+    """Teach the render cost model the frame times of a finished render"""
+    if telemetry_path and COST_MODEL_SETTINGS["learn_from_telemetry"]:
+        learn_render_costs(read_telemetry([telemetry_path]))
+
+def build_service_variant(args, frame_ranges, terrain, robot, builds=None):
+    """Build and animate the garden, effects and robot motion of one variant; returns the printed border"""
+    builds = plan_builds(frame_ranges) if builds is None else builds
     print("Creating garden path...")
     # Update garden path settings with shape from arguments
     shape_control_points = get_garden_shape(args.shape, args.size)
     garden_path = create_garden_path(shape_control_points)
+    border = create_border_mesh(garden_path) if BORDER_MESH_SETTINGS["enabled"] and "border" in builds else None
+    printed_border = border if border else garden_path
     
     # Get material properties for border
     border_material_props = get_material_properties(args.border_material)
     
     # Update border material
-    for mat in bpy.data.materials:
-        if "Concrete" in mat.name or "ConcretePath" in mat.name:
-            if mat.use_nodes:
-                bsdf = mat.node_tree.nodes.get("Principled BSDF")
-                if bsdf:
-                    bsdf.inputs["Base Color"].default_value = border_material_props["color"]
-                    bsdf.inputs["Roughness"].default_value = border_material_props["roughness"]
-                    bsdf.inputs["Metallic"].default_value = border_material_props["metallic"]
+    apply_border_material_properties(printed_border, border_material_props)
     
-    soil_fill = create_soil_fill(garden_path)
+    soil_fill = None
+    if "soil_fill" in builds:
+        soil_fill = create_soil_fill_mesh(garden_path) if SOIL_FILL_SETTINGS["enabled"] else create_soil_fill(garden_path)
     
     print("Creating visual effects...")
-    scan_effect = create_scan_effect()
+    scan_effect = create_scan_effect() if "scan_effect" in builds else None
+    scan_cloud = create_scan_point_cloud(terrain) if SCAN_CLOUD_SETTINGS["enabled"] and "scan_cloud" in builds else None
     
     # Set up animation phases
     print("Setting up animation phases...")
     
     # Phase 1: Scanning
-    animate_scan_phase(robot, scan_effect, frame_ranges["scan"])
+    animate_scan_phase(robot, scan_effect, frame_ranges["scan"], scan_cloud)
     
     # Phase 2: Planning
     animate_planning_phase(robot, frame_ranges["planning"])
     
     # Phase 3: Border construction
-    animate_border_phase(robot, garden_path, frame_ranges["border"])
+    animate_border_phase(robot, garden_path, frame_ranges["border"], border)
     
     # Phase 4: Soil filling
-    animate_filling_phase(robot, soil_fill, frame_ranges["filling"])
+    animate_filling_phase(robot, soil_fill, frame_ranges["filling"], garden_path)
     
     # Phase 5: Completion and moving
     animate_completion_phase(robot, frame_ranges["completion"])
     
-    # Set end frame
-    bpy.context.scene.frame_end = frame_ranges["completion"][1]
+    # Rest the robot on the terrain along its whole trajectory
+    if TERRAIN_FOLLOW_SETTINGS["enabled"]:
+        apply_terrain_following(robot, terrain, (frame_ranges["scan"][0], frame_ranges["completion"][1]))
+    
+    return printed_border
+
+def setup_service_animation(args):
+    """Set up the animation based on service parameters"""
+    print(f"Setting up {args.service} service with {args.shape} shape...")
+    
+    # Clear existing scene and set up environment
+    clear_scene()
+    setup_environment()
+    
+    # Update render settings based on arguments
+    apply_render_args(args)
+    
+    # Set output path if rendering
+    if args.render:
+        output_path = get_output_path(args.output_dir)
+        bpy.context.scene.render.filepath = output_path
+    
+    # Calculate frame ranges based on duration scale
+    frame_ranges = compile_timeline(args.duration)
+    frame_range = tuple(args.frames) if args.frames else None
+    
+    # Record which arguments affect which frames, so variants can share frames
+    reset_frame_dependencies()
+    track_global_fields({
+        "service": args.service,
+        "resolution": args.resolution,
+        "duration": args.duration,
+        "bake": args.bake or BAKE_SETTINGS["enabled"],
+        "terrain_scan": get_file_signature(args.terrain_scan) if args.terrain_scan else None
+    })
+    track_config_settings()
+    shape_fields = {"shape": args.shape, "size": args.size}
+    end_frame = frame_ranges["completion"][1]
+    # The border and soil stay hidden until they are printed, the robot follows
+    # the path from the border phase on
+    for border_name in ("GardenPath", "GardenBorder"):
+        track_object_fields(border_name, dict(shape_fields, border_material=args.border_material),
+                            [(frame_ranges["border"][0], end_frame)])
+    track_object_fields("SoilFill", shape_fields, [(frame_ranges["filling"][0], end_frame)])
+    track_object_fields("Robot", shape_fields, [(frame_ranges["border"][0], end_frame)])
+    
+    # Create models
+    print("Creating terrain...")
+    if args.terrain_scan:
+        terrain = create_terrain_from_point_cloud(bpy.path.abspath(args.terrain_scan))
+    else:
+        terrain = create_terrain()
+    if GRASS_SETTINGS["use_geometry_nodes"]:
+        grass = create_grass_instancing(terrain)
+        # Frames written to the render telemetry include their culled grass instance count
+        register_telemetry_field("grass_instances", get_grass_instance_reporter(grass))
+    else:
+        create_grass(terrain)
+    
+    print("Creating robot...")
+    robot = create_robot()
+    
+    # A farm chunk only builds what can be seen in its frames
+    builds = plan_builds(frame_ranges, frame_range, bpy.context.scene.camera)
+    printed_border = build_service_variant(args, frame_ranges, terrain, robot, builds)
+    
+    # Switch robot and terrain to cheaper detail levels in wide shots
+    if LOD_SETTINGS["enabled"]:
+        print("Selecting detail levels...")
+        create_terrain_lods(terrain)
+        create_robot_lods(robot)
+        select_lod_levels((frame_ranges["scan"][0], frame_ranges["completion"][1]))
+    
+    # Bake procedural materials (only re-baked when the material spec changes)
+    if args.bake or BAKE_SETTINGS["enabled"]:
+        print("Baking static materials...")
+        bake_static_materials()
+    
+    # Shrink the actions now that every phase is keyed
+    if KEYFRAME_REDUCTION_SETTINGS["enabled"]:
+        reduce_keyframes()
+    
+    # Set the rendered frames: the whole animation or the requested chunk
+    bpy.context.scene.frame_start, bpy.context.scene.frame_end = frame_range or (1, frame_ranges["completion"][1])
+    store_timeline(frame_ranges)
     
     # Return to first frame
-    bpy.context.scene.frame_set(1)
+    bpy.context.scene.frame_set(bpy.context.scene.frame_start)
     
     print(f"Service animation setup complete!")
     print(f"Total animation length: {frame_ranges['completion'][1]} frames")
     
+    # Check the keyframes before spending time on a render
+    if args.validate or VALIDATION_SETTINGS["enabled"]:
+        issues = validate_animation(frame_ranges, robot)
+        print_validation_report(issues)
+        if args.render and has_errors(issues):
+            print("Animation check failed, not rendering")
+            return
+    
+    # Calibration workers render one short frame side by side and exit
+    if args.calibrate_dir:
+        run_calibration_render(args.calibrate_dir)
+        return
+    
     # Start render if requested
-    if args.render:
+    telemetry_path = apply_telemetry_args(args, output_path) if args.render else None
+    if args.render and args.variants:
+        print(f"Rendering border variants {', '.join(args.variants)} to {args.output_dir}...")
+        render_border_variants(printed_border, args.border_material, args.variants, output_path)
+    elif args.render and args.diff_base:
+        print(f"Rendering changes against {args.diff_base} to {output_path}...")
+        render_differential(args.diff_base, output_path)
+    elif args.render and args.frame_cache:
+        print(f"Rendering to {output_path} through the frame cache...")
+        render_with_frame_cache(output_path)
+        save_scene_snapshot(capture_scene_snapshot(), output_path)
+    elif args.render and args.queue:
+        render_from_queue(args.queue, output_path)
+        learn_from_telemetry(telemetry_path)
+    elif args.render and args.nodes:
+        frames = get_frame_plan(output_path, args.nodes)[args.node]
+        print(f"Rendering {len(frames)} frames as node {args.node} of {args.nodes} to {output_path}...")
+        render_frames(frames, output_path)
+        learn_from_telemetry(telemetry_path)
+    elif args.render:
         print(f"Starting render to {bpy.context.scene.render.filepath}...")
         bpy.ops.render.render(animation=True)
+        # Record what was rendered so later variants can render differentially
+        save_scene_snapshot(capture_scene_snapshot(), output_path)
+        learn_from_telemetry(telemetry_path)
+
+def get_variant_args(args, spec):
+    """Arguments of one packed variant: the command line with a spec like "shape=circular,duration=1.5" applied"""
+    values = dict(vars(args))
+    for pair in spec.split(','):
+        key, value = pair.split('=', 1)
+        key = key.strip().replace('-', '_')
+        if key not in PACKED_VARIANT_FIELDS:
+            raise ValueError(f"Packed variants can only change {', '.join(PACKED_VARIANT_FIELDS)}, not {key}")
+        values[key] = type(values[key])(value.strip())
+    return argparse.Namespace(**values)
+
+def setup_packed_variants(args):
+    """Build every variant as its own scene in one file, sharing the terrain, lights and camera"""
+    variants = [get_variant_args(args, spec) for spec in args.pack]
+    print(f"Packing {len(variants)} {args.service} variants into one file...")
+    
+    clear_scene()
+    setup_environment()
+    apply_render_args(args)
+    base_scene = bpy.context.scene
+    
+    # Shared by every scene: the sun, camera, terrain and grass
+    print("Creating terrain...")
+    if args.terrain_scan:
+        terrain = create_terrain_from_point_cloud(bpy.path.abspath(args.terrain_scan))
+    else:
+        terrain = create_terrain()
+    if GRASS_SETTINGS["use_geometry_nodes"]:
+        create_grass_instancing(terrain)
+    else:
+        create_grass(terrain)
+    stage = create_shared_collection("SharedStage", [obj for obj in base_scene.objects if obj.parent is None])
+    
+    # The robot is animated per scene, so each scene gets a copy sharing its meshes and materials
+    print("Creating robot...")
+    robot = create_robot()
+    
+    scenes = []
+    for index, variant in enumerate(variants):
+        name = f"{variant.shape}_{variant.border_material}_{variant.size:g}x_{variant.duration:g}t"
+        print(f"Building variant {name}...")
+        if index == 0:
+            scene = base_scene
+            variant_robot = robot
+        else:
+            scene = activate_scene(create_variant_scene(name, base_scene, [stage]))
+            variant_robot = duplicate_robot(robot, scene.collection)
+        scene.name = name
+        
+        frame_ranges = compile_timeline(variant.duration)
+        build_service_variant(variant, frame_ranges, terrain, variant_robot)
+        scene.frame_start = 1
+        scene.frame_end = frame_ranges["completion"][1]
+        store_timeline(frame_ranges, scene)
+        scenes.append(scene)
+    
+    # Each scene bakes its own copies; shared objects and meshes are baked once
+    if args.bake or BAKE_SETTINGS["enabled"]:
+        for scene in scenes:
+            print(f"Baking static materials of {scene.name}...")
+            activate_scene(scene)
+            bake_static_materials()
+    activate_scene(base_scene)
+    
+    if KEYFRAME_REDUCTION_SETTINGS["enabled"]:
+        reduce_keyframes()
+    
+    print(f"Packed {len(scenes)} scenes: {', '.join(scene.name for scene in scenes)}")
+    if args.render:
+        apply_telemetry_args(args, get_output_path(args.output_dir))
+        render_packed_scenes(scenes, get_output_path(args.output_dir))
+
+def retime_service_animation(args):
+    """Change the duration of the scene in the opened .blend and render it, without rebuilding"""
+    frame_ranges = retime_scene(compile_timeline(args.duration))
+    print(f"Total animation length: {frame_ranges['completion'][1]} frames")
+    
+    if args.render:
+        output_path = get_output_path(args.output_dir)
+        bpy.context.scene.render.filepath = output_path
+        apply_telemetry_args(args, output_path)
+        print(f"Starting render to {output_path}...")
+        bpy.ops.render.render(animation=True)
+        save_scene_snapshot(capture_scene_snapshot(), output_path)
+
+def get_service_args():
+    """Arguments after '--' without --local-workers, to pass on to the workers"""
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    if "--local-workers" in argv:
+        index = argv.index("--local-workers")
+        argv = argv[:index] + argv[index + 2:]
+    return argv
+
+def run_local_workers(args):
+    """Render the job with pinned Blender workers on this machine, sharing a frame queue"""
+    if not args.render:
+        print("--local-workers only applies to renders, add --render")
+        return
+    topology = read_cpu_topology()
+    print(f"CPU topology: {describe_topology(topology)}")
+    service_args = get_service_args()
+    
+    if args.local_workers == "auto":
+        calibration_key = {name: getattr(args, name) for name in
+                           ("service", "shape", "size", "resolution", "duration", "terrain_scan")}
+        worker_count = calibrate_worker_count(service_args, topology, calibration_key)
+    else:
+        worker_count = int(args.local_workers)
+    
+    # Workers share a queue; a default queue left over from an earlier job is started afresh
+    queue_args = []
+    if not args.queue:
+        queue_path = os.path.join(bpy.path.abspath(get_output_path(args.output_dir)), "render_queue.sqlite")
+        for path in (queue_path, queue_path + "-wal", queue_path + "-shm"):
+            if os.path.exists(path):
+                os.remove(path)
+        queue_args = ["--queue", queue_path]
+    
+    cpu_plans = plan_worker_cpus(topology, worker_count)
+    print(f"Starting {len(cpu_plans)} pinned workers...")
+    processes = start_workers(service_args, cpu_plans, queue_args)
+    failed = sum(process.wait() != 0 for process in processes)
+    print(f"Local workers finished, {failed} failed")
 
 def main():
     """Main function"""
     # Parse arguments
     args = parse_args()
-    
-    # Set up and run the service animation
-    setup_service_animation(args)
+    if args.cpus:
+        pin_current_process(parse_cpu_list(args.cpus))
+    
+    # Merge worker telemetry, start pinned local workers, retime an already built scene,
+    # pack variants into one file, or set up and run the service animation
+    if args.merge_telemetry:
+        merge_telemetry(args.merge_telemetry)
+    elif args.local_workers:
+        run_local_workers(args)
+    elif args.retime:
+        retime_service_animation(args)
+    elif args.pack:
+        setup_packed_variants(args)
+    else:
+        setup_service_animation(args)
     
     print("Done!")
 
@@ -3,7 +3,15 @@
 
 from utils.blender_utils import clear_scene, setup_environment
 from utils.curve_utils import get_point_on_curve, get_direction_on_curve
-from utils.keyframe_utils import set_keyframe, clear_keyframes
+from utils.keyframe_utils import (set_keyframe, clear_keyframes, get_previous_keyframe, set_keyframes, evaluate_fcurve,
+                                  evaluate_channels, evaluate_matrix_world)
+from utils.keyframe_reduction import reduce_keyframes, add_cycles_modifier
+from utils.mesh_utils import box_geometry, create_mesh_object, triangulate_polygon
+from utils.node_utils import add_math_node, add_value_node, get_enabled_socket
+from utils.scene_registry import register_part, add_part, get_part, get_parts
+from utils.path_planning import plan_path
+from utils.coverage_planning import plan_coverage_path
+from utils.terrain_sampling import get_terrain_height_grid, sample_heights
 
 __all__ = [
     'clear_scene',
@@ -11,5 +19,26 @@ __all__ = [
     'get_point_on_curve',
     'get_direction_on_curve',
     'set_keyframe',
-    'clear_keyframes'
+    'clear_keyframes',
+    'get_previous_keyframe',
+    'set_keyframes',
+    'evaluate_fcurve',
+    'evaluate_channels',
+    'evaluate_matrix_world',
+    'reduce_keyframes',
+    'add_cycles_modifier',
+    'box_geometry',
+    'create_mesh_object',
+    'triangulate_polygon',
+    'add_math_node',
+    'add_value_node',
+    'get_enabled_socket',
+    'register_part',
+    'add_part',
+    'get_part',
+    'get_parts',
+    'plan_path',
+    'plan_coverage_path',
+    'get_terrain_height_grid',
+    'sample_heights'
 ]
\ No newline at end of file
@@ -1,10 +1,12 @@
 import bpy
 import math
+from utils.scene_registry import reset_registry
 
 def clear_scene():
     """Clear all objects from the scene"""
     bpy.ops.object.select_all(action='SELECT')
     bpy.ops.object.delete()
+    reset_registry()
     
     # Clear all materials
     for material in bpy.data.materials:
@@ -0,0 +1,57 @@
+import math
+import numpy as np
+
+def get_camera_frustum_tangents(camera, scene):
+    """Return tan of the half field of view horizontally and vertically"""
+    render = scene.render
+    aspect = (render.resolution_x * render.pixel_aspect_x) / (render.resolution_y * render.pixel_aspect_y)
+    half_tan = math.tan(camera.data.angle / 2)
+
+    sensor_fit = camera.data.sensor_fit
+    if sensor_fit == 'HORIZONTAL' or (sensor_fit == 'AUTO' and aspect >= 1.0):
+        return half_tan, half_tan / aspect
+    return half_tan * aspect, half_tan
+
+def get_screen_fraction(camera, scene, center, radius, matrix=None):
+    """Projected diameter of a bounding sphere as a fraction of the frame height, optionally for a camera world matrix at another frame"""
+    local = (matrix or camera.matrix_world).inverted() @ center
+    depth = -local.z
+    if depth <= radius:
+        # Sphere touches or surrounds the camera plane - treat as full screen
+        return 1.0 if depth > -radius else 0.0
+
+    _, tan_y = get_camera_frustum_tangents(camera, scene)
+    return radius / (depth * tan_y)
+
+def get_screen_rect(camera, scene, corners):
+    """Screen rectangle (x0, y0, x1, y1) in 0..1 from the bottom left covered by world-space points"""
+    inverse = camera.matrix_world.inverted()
+    local = np.array([tuple(inverse @ corner) for corner in corners])
+    depth = -local[:, 2]
+    if (depth <= 0.0).all():
+        return None
+    if (depth <= 1e-4).any():
+        # Points around the camera plane project to infinity - assume the whole frame
+        return (0.0, 0.0, 1.0, 1.0)
+
+    tan_x, tan_y = get_camera_frustum_tangents(camera, scene)
+    x = (local[:, 0] / (depth * tan_x) + 1.0) / 2.0
+    y = (local[:, 1] / (depth * tan_y) + 1.0) / 2.0
+    x0, x1 = max(x.min(), 0.0), min(x.max(), 1.0)
+    y0, y1 = max(y.min(), 0.0), min(y.max(), 1.0)
+    if x0 >= x1 or y0 >= y1:
+        return None
+    return (float(x0), float(y0), float(x1), float(y1))
+
+def is_sphere_in_view(camera, scene, center, radius, matrix=None):
+    """Whether a bounding sphere reaches into the camera frustum, optionally for a camera world matrix at another frame"""
+    local = (matrix or camera.matrix_world).inverted() @ center
+    depth = -local.z
+    if depth < -radius:
+        return False
+
+    # Distance of the center past each side plane of the frustum
+    tan_x, tan_y = get_camera_frustum_tangents(camera, scene)
+    outside_x = (abs(local.x) - depth * tan_x) / math.sqrt(1.0 + tan_x * tan_x)
+    outside_y = (abs(local.y) - depth * tan_y) / math.sqrt(1.0 + tan_y * tan_y)
+    return outside_x <= radius and outside_y <= radius
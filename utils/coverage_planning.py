@@ -0,0 +1,90 @@
+import numpy as np
+
+def get_sweep_angle(outline, candidates=36):
+    """Pass direction (radians) across which the outline is narrowest, giving the fewest passes"""
+    angles = np.linspace(0.0, np.pi, candidates, endpoint=False)
+    normals = np.column_stack((-np.sin(angles), np.cos(angles)))
+    projected = normals @ outline[:, :2].T
+    return angles[np.argmin(projected.max(axis=1) - projected.min(axis=1))]
+
+def _rotate(points, angle):
+    """Rotate XY points around the origin"""
+    cos_a, sin_a = np.cos(angle), np.sin(angle)
+    return np.column_stack((points[:, 0] * cos_a - points[:, 1] * sin_a,
+                            points[:, 0] * sin_a + points[:, 1] * cos_a))
+
+def get_sweep_intervals(outline, spacing):
+    """Line index, rank on its line, start and end X of every inside interval of horizontal sweep lines"""
+    start = outline
+    end = np.roll(outline, -1, axis=0)
+    low = outline[:, 1].min()
+    height = outline[:, 1].max() - low
+
+    # Lines centered in the outline, never more than half a pass from its edge
+    count = max(int(np.ceil(height / spacing)), 1)
+    lines = low + (height - (count - 1) * spacing) / 2 + spacing * np.arange(count)
+
+    # Each edge crosses the lines in [min y, max y), found by binary search
+    edge_low = np.minimum(start[:, 1], end[:, 1])
+    edge_high = np.maximum(start[:, 1], end[:, 1])
+    first = np.searchsorted(lines, edge_low, side='left')
+    crossings = np.searchsorted(lines, edge_high, side='left') - first
+
+    edge = np.repeat(np.arange(len(outline)), crossings)
+    offsets = np.arange(len(edge)) - np.repeat(np.cumsum(crossings) - crossings, crossings)
+    line = first[edge] + offsets
+    t = (lines[line] - start[edge, 1]) / (end[edge, 1] - start[edge, 1])
+    x = start[edge, 0] + t * (end[edge, 0] - start[edge, 0])
+
+    # Sorted along each line, crossings pair up into inside intervals
+    order = np.lexsort((x, line))
+    line = line[order][0::2]
+    x = x[order].reshape(-1, 2)
+    _, line_start, inverse = np.unique(line, return_index=True, return_inverse=True)
+    rank = np.arange(len(line)) - line_start[inverse]
+
+    return line, rank, x[:, 0], x[:, 1], lines
+
+def plan_coverage_path(outline, tool_width, overlap=0.0, angle=None):
+    """Boustrophedon toolpath (2P, 2) covering a closed outline; pass k runs from point 2k to 2k + 1"""
+    outline = np.asarray(outline, dtype=np.float64)[:, :2]
+    if angle is None:
+        angle = get_sweep_angle(outline)
+    spacing = tool_width * (1.0 - overlap)
+
+    # Sweep horizontal lines in a frame where passes run along X
+    local = _rotate(outline, -angle)
+    line, rank, x_start, x_end, lines = get_sweep_intervals(local, spacing)
+
+    # Keep the whole tool inside the outline; drop slivers narrower than it
+    x_start = x_start + tool_width / 2
+    x_end = x_end - tool_width / 2
+    keep = x_end >= x_start
+    line, rank, x_start, x_end = line[keep], rank[keep], x_start[keep], x_end[keep]
+    if not len(line):
+        return np.empty((0, 2))
+
+    # Region by region (interval rank), line by line, alternating direction;
+    # beds whose lines cross the outline more than twice get several regions
+    order = np.lexsort((line, rank))
+    line, rank, x_start, x_end = line[order], rank[order], x_start[order], x_end[order]
+    _, rank_start, inverse = np.unique(rank, return_index=True, return_inverse=True)
+    flip = (np.arange(len(line)) - rank_start[inverse]) % 2 == 1
+    x_start, x_end = np.where(flip, x_end, x_start), np.where(flip, x_start, x_end)
+
+    y = lines[line]
+    points = np.stack((np.column_stack((x_start, y)), np.column_stack((x_end, y))), axis=1).reshape(-1, 2)
+    return _rotate(points, angle)
+
+def spread_passes(toolpath, count):
+    """Toolpath of a number of passes spread evenly over a toolpath, first and last kept, alternating in direction"""
+    passes = toolpath.reshape(-1, 2, 2)
+    index = np.unique(np.round(np.linspace(0, len(passes) - 1, count)).astype(np.int64))
+    passes = passes[index]
+
+    # Every other pass runs against the first, so the robot turns instead of driving back
+    direction = passes[:, 1] - passes[:, 0]
+    along = direction @ direction[0] > 0
+    flip = along != (np.arange(len(passes)) % 2 == 0)
+    passes = np.where(flip[:, None, None], passes[:, ::-1], passes)
+    return passes.reshape(-1, 2)
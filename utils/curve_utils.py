@@ -1,5 +1,6 @@
 import bpy
 import math
+import numpy as np
 from mathutils import Vector
 
 def get_point_on_curve(curve_obj, t):
@@ -76,4 +77,40 @@ def get_direction_on_curve(curve_obj, t):
     # Calculate direction (simplified, not using handles)
     direction = (p1.co - p0.co).normalized()
     
-    return direction
\ No newline at end of file
+    return direction
+
+def sample_curve_by_arc_length(curve_obj, spacing, steps_per_segment=64):
+    """Sample the first Bezier spline at equal arc-length spacing, in world space"""
+    spline = curve_obj.data.splines[0]
+    points = spline.bezier_points
+    count = len(points)
+    cyclic = spline.use_cyclic_u
+    
+    co = np.empty(count * 3, dtype=np.float64)
+    left = np.empty(count * 3, dtype=np.float64)
+    right = np.empty(count * 3, dtype=np.float64)
+    points.foreach_get("co", co)
+    points.foreach_get("handle_left", left)
+    points.foreach_get("handle_right", right)
+    co, left, right = co.reshape(-1, 3), left.reshape(-1, 3), right.reshape(-1, 3)
+    
+    # Evaluate every cubic segment densely at once
+    start = np.arange(count if cyclic else count - 1)
+    end = (start + 1) % count
+    u = np.linspace(0.0, 1.0, steps_per_segment, endpoint=False)[None, :, None]
+    v = 1.0 - u
+    dense = (v ** 3 * co[start, None] + 3.0 * v ** 2 * u * right[start, None]
+             + 3.0 * v * u ** 2 * left[end, None] + u ** 3 * co[end, None]).reshape(-1, 3)
+    dense = np.vstack((dense, co[end[-1]]))
+    
+    matrix = np.array(curve_obj.matrix_world)
+    dense = dense @ matrix[:3, :3].T + matrix[:3, 3]
+    
+    # Resample at equal spacing along the cumulative length
+    lengths = np.concatenate(([0.0], np.cumsum(np.linalg.norm(np.diff(dense, axis=0), axis=1))))
+    total = lengths[-1]
+    sample_count = max(int(round(total / spacing)), 8)
+    arc = np.linspace(0.0, total, sample_count, endpoint=not cyclic)
+    samples = np.column_stack([np.interp(arc, lengths, dense[:, axis]) for axis in range(3)])
+    
+    return samples, arc, total, cyclic
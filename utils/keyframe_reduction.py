@@ -0,0 +1,169 @@
+import bpy
+import numpy as np
+from config import KEYFRAME_REDUCTION_SETTINGS
+
+def read_keyframes(fcurve):
+    """Times, values, handles (N, 2) and per-key interpolation and handle types of an F-curve"""
+    points = fcurve.keyframe_points
+    count = len(points)
+    arrays = {}
+    for name in ("co", "handle_left", "handle_right"):
+        values = np.empty(count * 2, dtype=np.float64)
+        points.foreach_get(name, values)
+        arrays[name] = values.reshape(-1, 2)
+    arrays["interpolation"] = [point.interpolation for point in points]
+    arrays["handle_types"] = [(point.handle_left_type, point.handle_right_type) for point in points]
+    return arrays
+
+def remove_keyframes(fcurve, indices):
+    """Delete keyframes by index and recompute the automatic handles of the rest"""
+    points = fcurve.keyframe_points
+    for index in sorted(indices, reverse=True):
+        points.remove(points[index], fast=True)
+    fcurve.update()
+
+def simplify_polyline(x, y, tolerance):
+    """Ramer-Douglas-Peucker on a function graph: points to keep so no dropped point is further than the tolerance vertically"""
+    keep = np.zeros(len(x), dtype=bool)
+    keep[[0, -1]] = True
+    stack = [(0, len(x) - 1)]
+    while stack:
+        a, b = stack.pop()
+        if b - a < 2:
+            continue
+        line = y[a] + (y[b] - y[a]) * (x[a + 1:b] - x[a]) / (x[b] - x[a])
+        error = np.abs(y[a + 1:b] - line)
+        worst = int(np.argmax(error))
+        if error[worst] > tolerance:
+            middle = a + 1 + worst
+            keep[middle] = True
+            stack.extend(((a, middle), (middle, b)))
+    return keep
+
+def _is_flat(keys, i, tolerance):
+    """Whether the segment from key i to key i + 1 stays at one value"""
+    co = keys["co"]
+    if abs(co[i + 1, 1] - co[i, 1]) > tolerance:
+        return False
+    if keys["interpolation"][i] != 'BEZIER':
+        return True
+    return (abs(keys["handle_right"][i, 1] - co[i, 1]) <= tolerance and
+            abs(keys["handle_left"][i + 1, 1] - co[i + 1, 1]) <= tolerance)
+
+def find_cycle(keys, tolerance, min_cycles):
+    """Keys per period of a curve made of whole repeats of one pattern, or None"""
+    co = keys["co"]
+    count = len(co)
+    left = keys["handle_left"] - co
+    right = keys["handle_right"] - co
+    for period in range(1, (count - 1) // min_cycles + 1):
+        if (count - 1) % period:
+            continue
+        span = co[period, 0] - co[0, 0]
+        if (np.abs(co[period:, 0] - co[:-period, 0] - span).max() > tolerance or
+                np.abs(co[period:, 1] - co[:-period, 1]).max() > tolerance or
+                np.abs(left[period:] - left[:-period]).max() > tolerance or
+                np.abs(right[period:] - right[:-period]).max() > tolerance or
+                keys["interpolation"][period:] != keys["interpolation"][:-period]):
+            continue
+        # The kept period's first and last keys get flat end handles, so every
+        # repeat boundary must already be flat for the curve to stay the same
+        boundaries = range(0, count, period)
+        flat_out = all(keys["interpolation"][i] != 'BEZIER' or abs(right[i, 1]) <= tolerance
+                       for i in boundaries[:-1])
+        flat_in = all(keys["interpolation"][i - 1] != 'BEZIER' or abs(left[i, 1]) <= tolerance
+                      for i in boundaries[1:])
+        if flat_out and flat_in:
+            return period
+    return None
+
+def add_cycles_modifier(fcurve, frame_range=None):
+    """Repeat an F-curve's keys, optionally only within a frame range (outside it the keys hold)"""
+    modifier = fcurve.modifiers.new('CYCLES')
+    if frame_range:
+        modifier.use_restricted_range = True
+        modifier.frame_start, modifier.frame_end = frame_range
+    return modifier
+
+def find_redundant_holds(keys, tolerance, constant_extrapolation):
+    """Keys inside runs of one held value, whose removal leaves the curve unchanged"""
+    count = len(keys["co"])
+    redundant = []
+    start = 0
+    while start < count:
+        end = start
+        while end + 1 < count and _is_flat(keys, end, tolerance):
+            end += 1
+        # Automatic (unclamped) handles at the run ends would tilt once their neighbor changes
+        if end > start and 'AUTO' not in keys["handle_types"][start] + keys["handle_types"][end]:
+            redundant.extend(range(start + 1, end))
+            if constant_extrapolation and end == count - 1:
+                redundant.append(end)
+            elif constant_extrapolation and start == 0:
+                redundant.append(start)
+        start = end + 1
+    return redundant
+
+def find_redundant_linear_keys(keys, tolerance):
+    """Keys inside runs of linear segments that lie within the tolerance of a simplified line"""
+    co = keys["co"]
+    interpolation = keys["interpolation"]
+    count = len(co)
+    redundant = []
+    start = 0
+    while start < count - 1:
+        if interpolation[start] != 'LINEAR':
+            start += 1
+            continue
+        end = start
+        while end + 1 < count - 1 and interpolation[end + 1] == 'LINEAR':
+            end += 1
+        end += 1
+        keep = simplify_polyline(co[start:end + 1, 0], co[start:end + 1, 1], tolerance)
+        # A run end next to a Bezier segment keeps its neighbor, which sets its automatic handle
+        if start > 0 and interpolation[start - 1] == 'BEZIER':
+            keep[1] = True
+        if end < count - 1 and interpolation[end] == 'BEZIER':
+            keep[-2] = True
+        redundant.extend(start + np.flatnonzero(~keep))
+        start = end
+    return redundant
+
+def reduce_fcurve(fcurve, tolerance, min_cycles):
+    """Shrink one F-curve in place; returns the number of keyframes removed"""
+    if fcurve.modifiers or len(fcurve.keyframe_points) < 3:
+        return 0
+    before = len(fcurve.keyframe_points)
+
+    # Repeated patterns keep one period and a Cycles modifier over the original span
+    keys = read_keyframes(fcurve)
+    varies = np.ptp(keys["co"][:, 1]) > tolerance
+    period = find_cycle(keys, tolerance, min_cycles) if varies else None
+    if period:
+        remove_keyframes(fcurve, range(period + 1, before))
+        add_cycles_modifier(fcurve, (keys["co"][0, 0], keys["co"][-1, 0]))
+        return before - len(fcurve.keyframe_points)
+
+    remove_keyframes(fcurve, find_redundant_holds(keys, tolerance, fcurve.extrapolation == 'CONSTANT'))
+    keys = read_keyframes(fcurve)
+    remove_keyframes(fcurve, find_redundant_linear_keys(keys, tolerance))
+    return before - len(fcurve.keyframe_points)
+
+def reduce_keyframes(actions=None, tolerance=None):
+    """Replace repeats with Cycles modifiers, simplify linear runs and drop held keys in every action"""
+    if tolerance is None:
+        tolerance = KEYFRAME_REDUCTION_SETTINGS["tolerance"]
+    actions = bpy.data.actions if actions is None else actions
+
+    total = 0
+    removed = 0
+    cycles = 0
+    for action in actions:
+        for fcurve in action.fcurves:
+            total += len(fcurve.keyframe_points)
+            had_modifiers = len(fcurve.modifiers)
+            removed += reduce_fcurve(fcurve, tolerance, KEYFRAME_REDUCTION_SETTINGS["min_cycles"])
+            cycles += len(fcurve.modifiers) - had_modifiers
+
+    print(f"Keyframe reduction: removed {removed} of {total} keyframes, {cycles} curves turned into cycles")
+    return {"total": total, "removed": removed, "cycles": cycles}
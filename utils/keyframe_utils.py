@@ -1,4 +1,6 @@
 import bpy
+import numpy as np
+from mathutils import Matrix, Euler, Vector
 
 def set_keyframe(obj, data_path, frame, interpolation='BEZIER'):
     """Set a keyframe for an object property with specified interpolation"""
@@ -25,4 +27,73 @@ def clear_keyframes(obj, data_path=None):
                 fcurves.remove(fc)
         else:
             # Otherwise clear all keyframes
-            obj.animation_data.action.fcurves.clear()
\ No newline at end of file
+            obj.animation_data.action.fcurves.clear()
+
+def get_previous_keyframe(obj, data_path, frame):
+    """Frame of the last keyframe on a property before the given frame, or None"""
+    if not (obj.animation_data and obj.animation_data.action):
+        return None
+    frames = [kf.co.x for fc in obj.animation_data.action.fcurves if fc.data_path == data_path
+              for kf in fc.keyframe_points if kf.co.x < frame]
+    return max(frames) if frames else None
+
+def set_keyframes(obj, data_path, frames, values, interpolation='LINEAR', first_index=0):
+    """Write many keyframes of a property at once, replacing existing keys inside the frame span"""
+    # Column i of values goes to array index first_index + i, so single
+    # channels (e.g. only location Z) can be written without touching the rest;
+    # interpolation is one mode for all keys or one per frame
+    frames = np.asarray(frames, dtype=np.float32)
+    values = np.asarray(values, dtype=np.float32).reshape(len(frames), -1)
+    
+    anim = obj.animation_data or obj.animation_data_create()
+    if anim.action is None:
+        anim.action = bpy.data.actions.new(f"{obj.name}Action")
+    fcurves = anim.action.fcurves
+    
+    for column in range(values.shape[1]):
+        index = first_index + column
+        co = np.column_stack((frames, values[:, column]))
+        modes = [interpolation] * len(frames) if isinstance(interpolation, str) else list(interpolation)
+        group = "Object Transforms"
+        
+        # Keep keys outside the written span, rebuild the curve in one go
+        fcurve = fcurves.find(data_path, index=index)
+        if fcurve is not None:
+            old = np.empty(len(fcurve.keyframe_points) * 2, dtype=np.float32)
+            fcurve.keyframe_points.foreach_get("co", old)
+            old = old.reshape(-1, 2)
+            outside = (old[:, 0] < frames.min()) | (old[:, 0] > frames.max())
+            old_modes = [kf.interpolation for kf in fcurve.keyframe_points]
+            co = np.concatenate((old[outside], co))
+            modes = [mode for mode, keep in zip(old_modes, outside) if keep] + modes
+            if fcurve.group:
+                group = fcurve.group.name
+            fcurves.remove(fcurve)
+        
+        order = np.argsort(co[:, 0], kind='stable')
+        fcurve = fcurves.new(data_path, index=index, action_group=group)
+        fcurve.keyframe_points.add(len(co))
+        fcurve.keyframe_points.foreach_set("co", co[order].ravel())
+        for point, i in zip(fcurve.keyframe_points, order):
+            point.interpolation = modes[i]
+        fcurve.update()
+
+def evaluate_fcurve(obj, data_path, index, frames, default=0.0):
+    """Values of one animated channel at the given frames"""
+    anim = obj.animation_data
+    fcurve = anim.action.fcurves.find(data_path, index=index) if anim and anim.action else None
+    if fcurve is None:
+        return np.full(len(frames), default)
+    return np.array([fcurve.evaluate(frame) for frame in frames])
+
+def evaluate_channels(obj, data_path, frame, size=3):
+    """Values of a whole vector property at one frame, its current value where not animated"""
+    current = getattr(obj, data_path)
+    return np.array([evaluate_fcurve(obj, data_path, i, [frame], current[i])[0] for i in range(size)])
+
+def evaluate_matrix_world(obj, frame):
+    """World matrix of an unparented object at a frame, straight from its F-curves"""
+    location = evaluate_channels(obj, "location", frame)
+    rotation = evaluate_channels(obj, "rotation_euler", frame)
+    scale = evaluate_channels(obj, "scale", frame)
+    return Matrix.LocRotScale(Vector(location), Euler(rotation, obj.rotation_mode), Vector(scale))
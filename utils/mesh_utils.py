@@ -0,0 +1,200 @@
+import bpy
+import numpy as np
+
+# Unit cube corners and outward-facing quads, shared by all batched boxes
+CUBE_CORNERS = np.array([
+    (-0.5, -0.5, -0.5), (0.5, -0.5, -0.5), (0.5, 0.5, -0.5), (-0.5, 0.5, -0.5),
+    (-0.5, -0.5, 0.5), (0.5, -0.5, 0.5), (0.5, 0.5, 0.5), (-0.5, 0.5, 0.5)
+], dtype=np.float32)
+
+CUBE_FACES = np.array([
+    (0, 3, 2, 1),  # Bottom
+    (4, 5, 6, 7),  # Top
+    (0, 1, 5, 4),  # Front
+    (1, 2, 6, 5),  # Right
+    (2, 3, 7, 6),  # Back
+    (3, 0, 4, 7)   # Left
+], dtype=np.int32)
+
+def box_geometry(centers, sizes, yaw=None):
+    """Build vertex and face arrays for many boxes at once"""
+    centers = np.asarray(centers, dtype=np.float32).reshape(-1, 3)
+    sizes = np.broadcast_to(np.asarray(sizes, dtype=np.float32), centers.shape)
+    count = len(centers)
+
+    corners = CUBE_CORNERS[None, :, :] * sizes[:, None, :]
+
+    # Optional rotation of every box around its own Z axis
+    if yaw is not None:
+        yaw = np.broadcast_to(np.asarray(yaw, dtype=np.float32), (count,))
+        cos_yaw = np.cos(yaw)[:, None]
+        sin_yaw = np.sin(yaw)[:, None]
+        x = corners[:, :, 0] * cos_yaw - corners[:, :, 1] * sin_yaw
+        y = corners[:, :, 0] * sin_yaw + corners[:, :, 1] * cos_yaw
+        corners = np.stack((x, y, corners[:, :, 2]), axis=-1)
+
+    vertices = (corners + centers[:, None, :]).reshape(-1, 3)
+    faces = (CUBE_FACES[None, :, :] + 8 * np.arange(count, dtype=np.int32)[:, None, None]).reshape(-1, 4)
+    return vertices, faces
+
+def create_mesh_object(name, vertices, faces, material=None, collection=None, face_sizes=None):
+    """Create a mesh object directly from NumPy vertex and face arrays"""
+    vertices = np.asarray(vertices, dtype=np.float32).reshape(-1, 3)
+    faces = np.asarray(faces, dtype=np.int32)
+
+    # Faces are either an (F, N) array of equally sized polygons, or a flat
+    # array of loop vertex indices together with the size of each face
+    if face_sizes is None:
+        loop_totals = np.full(len(faces), faces.shape[1], dtype=np.int32)
+        loop_indices = faces.ravel()
+    else:
+        loop_totals = np.asarray(face_sizes, dtype=np.int32)
+        loop_indices = faces.ravel()
+    loop_starts = np.zeros(len(loop_totals), dtype=np.int32)
+    loop_starts[1:] = np.cumsum(loop_totals)[:-1]
+
+    mesh = bpy.data.meshes.new(name)
+    mesh.vertices.add(len(vertices))
+    mesh.vertices.foreach_set("co", vertices.ravel())
+    mesh.loops.add(len(loop_indices))
+    mesh.loops.foreach_set("vertex_index", loop_indices)
+    mesh.polygons.add(len(loop_totals))
+    mesh.polygons.foreach_set("loop_start", loop_starts)
+    mesh.polygons.foreach_set("loop_total", loop_totals)
+    mesh.update(calc_edges=True)
+    mesh.validate()
+
+    if material:
+        mesh.materials.append(material)
+
+    obj = bpy.data.objects.new(name, mesh)
+    if collection is None:
+        collection = bpy.context.scene.collection
+    collection.objects.link(obj)
+
+    return obj
+
+def _cross_2d(a, b):
+    """Z component of the cross product of 2D vectors"""
+    return a[..., 0] * b[..., 1] - a[..., 1] * b[..., 0]
+
+def _any_point_in_triangles(points, corners, valid, order, sorted_x):
+    """For each triangle (rows of vertex indices, CCW), whether a valid vertex lies inside or on it"""
+    a, b, c = points[corners[:, 0]], points[corners[:, 1]], points[corners[:, 2]]
+
+    # Only vertices within a triangle's X range need testing
+    low = np.searchsorted(sorted_x, np.minimum(np.minimum(a[:, 0], b[:, 0]), c[:, 0]), 'left')
+    high = np.searchsorted(sorted_x, np.maximum(np.maximum(a[:, 0], b[:, 0]), c[:, 0]), 'right')
+    counts = high - low
+    triangle = np.repeat(np.arange(len(corners)), counts)
+    vertex = order[np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts - low, counts)]
+
+    keep = valid[vertex] & np.all(vertex[:, None] != corners[triangle], axis=1)
+    triangle = triangle[keep]
+    p = points[vertex[keep]]
+    a, b, c = a[triangle], b[triangle], c[triangle]
+    inside = ((_cross_2d(b - a, p - a) >= -1e-12)
+              & (_cross_2d(c - b, p - b) >= -1e-12)
+              & (_cross_2d(a - c, p - c) >= -1e-12))
+    return np.bincount(triangle[inside], minlength=len(corners)) > 0
+
+def _find_ears(points):
+    """Flag the vertices of a counter-clockwise polygon whose triangle is an ear"""
+    count = len(points)
+    prev = np.roll(np.arange(count), 1)
+    nxt = np.roll(np.arange(count), -1)
+    convex = _cross_2d(points - points[prev], points[nxt] - points) > 1e-12
+    ears = convex.copy()
+
+    # Only reflex vertices can lie inside a convex corner's triangle
+    if convex.all():
+        return ears
+    order = np.argsort(points[:, 0], kind='stable')
+    candidates = np.flatnonzero(convex)
+    corners = np.column_stack((prev[candidates], candidates, nxt[candidates]))
+    ears[candidates] = ~_any_point_in_triangles(points, corners, ~convex, order, points[order, 0])
+    return ears
+
+def _clip_ears_sequential(points, index):
+    """Classic ear clipping on a linked list; only the neighbors of a clipped ear are retested"""
+    count = len(index)
+    pts = points[index]
+    prev = np.roll(np.arange(count), 1)
+    nxt = np.roll(np.arange(count), -1)
+    alive = np.ones(count, dtype=bool)
+    order = np.argsort(pts[:, 0], kind='stable')
+    sorted_x = pts[order, 0]
+
+    def turn(i):
+        return _cross_2d(pts[i] - pts[prev[i]], pts[nxt[i]] - pts[i])
+
+    reflex = _cross_2d(pts - pts[prev], pts[nxt] - pts) <= 1e-12
+    ears = _find_ears(pts)
+
+    def is_ear(i):
+        if reflex[i]:
+            return False
+        corners = np.array([[prev[i], i, nxt[i]]])
+        return not _any_point_in_triangles(pts, corners, reflex & alive, order, sorted_x)[0]
+
+    triangles = []
+    remaining = count
+    stack = list(np.flatnonzero(ears))
+    while remaining > 3:
+        if stack:
+            i = stack.pop()
+            if not alive[i] or not ears[i]:
+                continue
+        else:
+            # No ear left means degenerate input (collinear or touching edges): clip the sharpest corner
+            candidates = np.flatnonzero(alive)
+            i = candidates[np.argmax(turn(candidates))]
+
+        a, c = prev[i], nxt[i]
+        triangles.append((index[a], index[i], index[c]))
+        nxt[a] = c
+        prev[c] = a
+        alive[i] = False
+        remaining -= 1
+        for j in (a, c):
+            reflex[j] = turn(j) <= 1e-12
+            ears[j] = is_ear(j)
+            if ears[j]:
+                stack.append(j)
+
+    first = np.flatnonzero(alive)[0]
+    triangles.append((index[prev[first]], index[first], index[nxt[first]]))
+    return np.array(triangles, dtype=np.int64).reshape(-1, 3)
+
+def triangulate_polygon(points):
+    """Triangulate a simple 2D polygon by ear clipping, many independent ears per pass"""
+    points = np.asarray(points, dtype=np.float64)[:, :2]
+    index = np.arange(len(points))
+
+    # Work counter-clockwise, but return indices into the original order
+    if _cross_2d(points, np.roll(points, -1, axis=0)).sum() < 0.0:
+        index = index[::-1]
+
+    triangles = []
+    while len(index) > 3:
+        ears = _find_ears(points[index])
+
+        # Every other vertex only, so clipped ears never share a corner
+        clip = ears & (np.arange(len(index)) % 2 == 0)
+        if len(index) % 2:
+            clip[-1] &= not clip[0]
+        # Always leave a last triangle
+        clip[np.flatnonzero(clip)[len(index) - 3:]] = False
+
+        # Once only a few ears open up per pass (concave stretches), finish one ear at a time
+        if clip.sum() < 8:
+            triangles.append(_clip_ears_sequential(points, index))
+            index = index[:0]
+            break
+
+        triangles.append(np.stack((np.roll(index, 1)[clip], index[clip], np.roll(index, -1)[clip]), axis=-1))
+        index = index[~clip]
+
+    if len(index):
+        triangles.append(index[None, :])
+    return np.concatenate(triangles).astype(np.int32)
@@ -0,0 +1,94 @@
+import bpy
+
+def add_math_node(nodes, links, operation, a, b=None):
+    """Add a Math node; inputs can be sockets or constants"""
+    node = nodes.new(type='ShaderNodeMath')
+    node.operation = operation
+    for socket, value in zip(node.inputs, (a, b)):
+        if value is None:
+            continue
+        if isinstance(value, bpy.types.NodeSocket):
+            links.new(value, socket)
+        else:
+            socket.default_value = value
+    return node.outputs[0]
+
+def add_value_node(nodes, name, value):
+    """Add a named Value node so settings can be changed after creation"""
+    node = nodes.new(type='ShaderNodeValue')
+    node.name = name
+    node.label = name
+    node.outputs[0].default_value = value
+    return node.outputs[0]
+
+def get_enabled_socket(sockets, name=None):
+    """Pick the socket that matches the node's current data type"""
+    for socket in sockets:
+        if socket.enabled and (name is None or socket.name == name):
+            return socket
+    return None
+
+def add_transparent_mix(material, name):
+    """Insert a named mix towards a transparent shader in front of the material output; Fac 1 is fully transparent"""
+    nodes = material.node_tree.nodes
+    links = material.node_tree.links
+    output = next((n for n in nodes if n.type == 'OUTPUT_MATERIAL' and n.is_active_output), None)
+    if output is None or not output.inputs["Surface"].is_linked:
+        return None
+    surface = output.inputs["Surface"].links[0].from_socket
+
+    transparent = nodes.new(type='ShaderNodeBsdfTransparent')
+    mix = nodes.new(type='ShaderNodeMixShader')
+    mix.name = name
+    mix.label = name
+    links.new(surface, mix.inputs[1])
+    links.new(transparent.outputs["BSDF"], mix.inputs[2])
+    links.new(mix.outputs["Shader"], output.inputs["Surface"])
+    return mix
+
+def add_frame_reveal(material, attribute_name):
+    """Make a material transparent wherever a frame attribute is still ahead of the current frame"""
+    mix = add_transparent_mix(material, "FrameReveal")
+    if mix is None:
+        return None
+    nodes = material.node_tree.nodes
+    links = material.node_tree.links
+
+    # The current frame comes from a driver, so the mesh itself never changes
+    frame = nodes.new(type='ShaderNodeValue')
+    frame.name = "CurrentFrame"
+    frame.label = "CurrentFrame"
+    driver = frame.outputs[0].driver_add("default_value").driver
+    driver.type = 'SCRIPTED'
+    driver.expression = "frame"
+
+    attribute = nodes.new(type='ShaderNodeAttribute')
+    attribute.attribute_type = 'GEOMETRY'
+    attribute.attribute_name = attribute_name
+    links.new(add_math_node(nodes, links, 'GREATER_THAN', attribute.outputs["Fac"], frame.outputs[0]), mix.inputs["Fac"])
+
+    # Eevee needs a non-opaque blend mode for the cut-out
+    if material.blend_method == 'OPAQUE':
+        material.blend_method = 'CLIP'
+        material.shadow_method = 'CLIP'
+    return mix
+
+def add_object_fade(material, property_name):
+    """Fade a material out by a per-object custom property (0 opaque, 1 gone), so objects sharing it fade independently"""
+    nodes = material.node_tree.nodes
+    if "ObjectFade" in nodes:
+        return nodes["ObjectFade"]
+    mix = add_transparent_mix(material, "ObjectFade")
+    if mix is None:
+        return None
+
+    # Objects without the property read 0 and stay opaque
+    attribute = nodes.new(type='ShaderNodeAttribute')
+    attribute.attribute_type = 'OBJECT'
+    attribute.attribute_name = property_name
+    material.node_tree.links.new(attribute.outputs["Fac"], mix.inputs["Fac"])
+
+    # Dithered transparency in Eevee, so partly faded objects need no sorting
+    material.blend_method = 'HASHED'
+    material.shadow_method = 'HASHED'
+    return mix
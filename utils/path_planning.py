@@ -0,0 +1,252 @@
+import bpy
+import math
+import heapq
+import numpy as np
+from config import PLANNER_SETTINGS, TERRAIN_SETTINGS, ROBOT_DIMENSIONS
+from utils.scene_registry import get_parts
+
+# Occupancy grids keyed by the obstacles they were built from, so every move
+# of a job reuses the same rasterization and distance transform
+_GRID_CACHE = {}
+
+# 8-connected grid moves (row step, column step, cost in cells)
+NEIGHBOR_STEPS = [
+    (-1, 0, 1.0), (1, 0, 1.0), (0, -1, 1.0), (0, 1, 1.0),
+    (-1, -1, math.sqrt(2)), (-1, 1, math.sqrt(2)), (1, -1, math.sqrt(2)), (1, 1, math.sqrt(2))
+]
+
+def get_robot_footprint_radius():
+    """Radius of the circle around the robot's chassis and tracks, plus the safety margin"""
+    chassis = ROBOT_DIMENSIONS["chassis"]
+    tracks = ROBOT_DIMENSIONS["tracks"]
+    half_width = max(chassis["width"] / 2, tracks["offset"] + tracks["width"] / 2)
+    half_length = max(chassis["length"], tracks["length"]) / 2
+    return math.hypot(half_width, half_length) + PLANNER_SETTINGS["safety_margin"]
+
+def get_obstacle_objects(scene=None):
+    """Rendered mesh objects the builders registered as obstacles for the robot"""
+    return [obj for obj in get_parts(scene, "obstacles") if obj.type == 'MESH' and not obj.hide_render]
+
+def get_obstacle_signature(objects):
+    """Cheap key that changes when an obstacle is added, moved or remeshed"""
+    return tuple((obj.name, len(obj.data.vertices), tuple(round(v, 5) for row in obj.matrix_world for v in row))
+                 for obj in sorted(objects, key=lambda o: o.name))
+
+def get_obstacle_triangles(objects, clearance_height):
+    """World-space XY triangles (T, 3, 2) of all obstacle faces reaching below the clearance height"""
+    depsgraph = bpy.context.evaluated_depsgraph_get()
+    triangles = [np.empty((0, 3, 2))]
+    for obj in objects:
+        evaluated = obj.evaluated_get(depsgraph)
+        mesh = evaluated.to_mesh()
+        mesh.calc_loop_triangles()
+
+        coords = np.empty(len(mesh.vertices) * 3, dtype=np.float64)
+        mesh.vertices.foreach_get("co", coords)
+        indices = np.empty(len(mesh.loop_triangles) * 3, dtype=np.int32)
+        mesh.loop_triangles.foreach_get("vertices", indices)
+        evaluated.to_mesh_clear()
+
+        matrix = np.array(obj.matrix_world)
+        world = coords.reshape(-1, 3) @ matrix[:3, :3].T + matrix[:3, 3]
+        corners = world[indices.reshape(-1, 3)]
+        low = corners[:, :, 2].min(axis=1) < clearance_height
+        triangles.append(corners[low, :, :2])
+    return np.concatenate(triangles)
+
+def rasterize_triangles(triangles, origin, cell_size, shape):
+    """Mark every grid cell a set of XY triangles touches, including edge-on (zero area) walls"""
+    occupied = np.zeros(shape, dtype=bool)
+    if not len(triangles):
+        return occupied
+
+    # Sample each triangle at half-cell spacing; triangles with the same
+    # sample count share one barycentric pattern and are rasterized together
+    edges = np.linalg.norm(triangles - np.roll(triangles, 1, axis=1), axis=-1).max(axis=1)
+    steps = np.maximum(np.ceil(edges / (cell_size * 0.5)), 1).astype(np.int64)
+    for n in np.unique(steps):
+        i, j = np.meshgrid(np.arange(n + 1), np.arange(n + 1))
+        keep = i + j <= n
+        weights = np.stack((i[keep], j[keep], n - i[keep] - j[keep]), axis=-1) / n
+        points = np.einsum('sk,tkd->tsd', weights, triangles[steps == n]).reshape(-1, 2)
+
+        cells = np.floor((points - origin) / cell_size).astype(np.int64)
+        inside = (cells[:, 0] >= 0) & (cells[:, 0] < shape[1]) & (cells[:, 1] >= 0) & (cells[:, 1] < shape[0])
+        occupied[cells[inside, 1], cells[inside, 0]] = True
+    return occupied
+
+def distance_transform(occupied, cell_size, chunk_cells=4000000):
+    """Exact Euclidean distance (meters) from every cell to the nearest occupied cell"""
+    rows, cols = occupied.shape
+    if not occupied.any():
+        return np.full(occupied.shape, np.inf)
+
+    # Pass 1: distance to the nearest occupied cell in the same column
+    index = np.arange(rows, dtype=np.float64)[:, None]
+    above = np.maximum.accumulate(np.where(occupied, index, -np.inf), axis=0)
+    below = np.minimum.accumulate(np.where(occupied, index, np.inf)[::-1], axis=0)[::-1]
+    column = np.minimum(index - above, below - index)
+
+    # Pass 2: combine columns along each row, a block of rows at a time
+    x = np.arange(cols, dtype=np.float64)
+    offsets = (x[:, None] - x[None, :]) ** 2
+    squared = np.empty(occupied.shape)
+    block = max(chunk_cells // (cols * cols), 1)
+    for start in range(0, rows, block):
+        g = column[start:start + block] ** 2
+        squared[start:start + block] = (offsets[None, :, :] + g[:, None, :]).min(axis=-1)
+
+    return np.sqrt(squared) * cell_size
+
+def get_occupancy_grid(scene=None):
+    """Occupancy grid and distance transform of the current obstacles, cached across queries"""
+    objects = get_obstacle_objects(scene)
+    key = (get_obstacle_signature(objects), PLANNER_SETTINGS["cell_size"], PLANNER_SETTINGS["clearance_height"])
+    if key in _GRID_CACHE:
+        return _GRID_CACHE[key]
+
+    cell_size = PLANNER_SETTINGS["cell_size"]
+    padding = PLANNER_SETTINGS["bounds_padding"]
+    triangles = get_obstacle_triangles(objects, PLANNER_SETTINGS["clearance_height"])
+
+    # Cover the terrain and every obstacle
+    half = TERRAIN_SETTINGS["size"] / 2
+    low = np.array([-half, -half])
+    high = np.array([half, half])
+    if len(triangles):
+        low = np.minimum(low, triangles.reshape(-1, 2).min(axis=0))
+        high = np.maximum(high, triangles.reshape(-1, 2).max(axis=0))
+    origin = low - padding
+    cols, rows = np.ceil((high + padding - origin) / cell_size).astype(np.int64)
+
+    occupied = rasterize_triangles(triangles, origin, cell_size, (rows, cols))
+    grid = {
+        "origin": origin,
+        "cell_size": cell_size,
+        "occupied": occupied,
+        "distance": distance_transform(occupied, cell_size),
+        "blocked": {}
+    }
+    _GRID_CACHE.clear()
+    _GRID_CACHE[key] = grid
+    return grid
+
+def get_blocked_cells(grid, radius):
+    """Cells the robot center cannot enter: obstacles inflated by the footprint radius"""
+    key = round(radius, 6)
+    if key not in grid["blocked"]:
+        grid["blocked"][key] = grid["distance"] < radius
+    return grid["blocked"][key]
+
+def _to_cell(grid, point):
+    """Grid (row, column) of a world XY point, clamped to the grid"""
+    rows, cols = grid["occupied"].shape
+    col, row = np.floor((np.asarray(point[:2], dtype=np.float64) - grid["origin"]) / grid["cell_size"]).astype(np.int64)
+    return min(max(row, 0), rows - 1), min(max(col, 0), cols - 1)
+
+def _to_point(grid, cell):
+    """World XY of a cell center"""
+    row, col = cell
+    return grid["origin"] + (np.array([col, row]) + 0.5) * grid["cell_size"]
+
+def _nearest_free_cell(blocked, cell):
+    """Closest unblocked cell, for start or goal positions inside an inflated obstacle"""
+    if not blocked[cell]:
+        return cell
+    free = np.argwhere(~blocked)
+    if not len(free):
+        return None
+    nearest = free[np.argmin(((free - np.array(cell)) ** 2).sum(axis=1))]
+    return int(nearest[0]), int(nearest[1])
+
+def _astar(blocked, start, goal):
+    """Shortest 8-connected cell path from start to goal avoiding blocked cells, or None"""
+    # Work on flat indices of a grid padded with a blocked border, so the
+    # inner loop needs no bounds checks and no tuple hashing
+    padded = np.pad(blocked, 1, constant_values=True)
+    rows, cols = padded.shape
+    start_index = (start[0] + 1) * cols + start[1] + 1
+    goal_index = (goal[0] + 1) * cols + goal[1] + 1
+
+    # Octile distance to the goal for every cell, exact on an empty grid
+    r, c = np.divmod(np.arange(rows * cols), cols)
+    dr = np.abs(r - (goal[0] + 1))
+    dc = np.abs(c - (goal[1] + 1))
+    heuristic = (np.maximum(dr, dc) + (math.sqrt(2) - 1) * np.minimum(dr, dc)).tolist()
+
+    free = (~padded.ravel()).tolist()
+    steps = [(dr * cols + dc, step) for dr, dc, step in NEIGHBOR_STEPS]
+    cost = [math.inf] * (rows * cols)
+    came_from = {start_index: -1}
+    cost[start_index] = 0.0
+    frontier = [(heuristic[start_index], 0.0, start_index)]
+
+    while frontier:
+        _, g, index = heapq.heappop(frontier)
+        if g > cost[index]:
+            continue
+        if index == goal_index:
+            path = []
+            while index != -1:
+                path.append((index // cols - 1, index % cols - 1))
+                index = came_from[index]
+            return path[::-1]
+
+        for offset, step in steps:
+            neighbor = index + offset
+            new_cost = g + step
+            if free[neighbor] and new_cost < cost[neighbor]:
+                cost[neighbor] = new_cost
+                came_from[neighbor] = index
+                heapq.heappush(frontier, (new_cost + heuristic[neighbor], new_cost, neighbor))
+
+    return None
+
+def has_line_of_sight(grid, blocked, p0, p1):
+    """Whether the straight segment between two XY points stays clear of blocked cells"""
+    p0 = np.asarray(p0, dtype=np.float64)
+    p1 = np.asarray(p1, dtype=np.float64)
+    count = int(np.ceil(np.linalg.norm(p1 - p0) / (grid["cell_size"] * 0.5))) + 1
+    points = p0 + np.linspace(0.0, 1.0, count)[:, None] * (p1 - p0)
+
+    rows, cols = blocked.shape
+    cells = np.floor((points - grid["origin"]) / grid["cell_size"]).astype(np.int64)
+    inside = (cells[:, 0] >= 0) & (cells[:, 0] < cols) & (cells[:, 1] >= 0) & (cells[:, 1] < rows)
+    return not blocked[cells[inside, 1], cells[inside, 0]].any()
+
+def smooth_path(grid, blocked, points):
+    """Drop waypoints that can be skipped with a clear straight line (any-angle string pulling)"""
+    smoothed = [points[0]]
+    anchor = 0
+    while anchor < len(points) - 1:
+        # Extend the straight line from the anchor as far as it stays clear
+        target = anchor + 1
+        while target + 1 < len(points) and has_line_of_sight(grid, blocked, points[anchor], points[target + 1]):
+            target += 1
+        smoothed.append(points[target])
+        anchor = target
+    return smoothed
+
+def plan_path(start, goal, radius=None, scene=None):
+    """Collision-free XY waypoints (N, 2) from start to goal, straight if no path exists"""
+    if radius is None:
+        radius = get_robot_footprint_radius()
+    start = np.asarray(start[:2], dtype=np.float64)
+    goal = np.asarray(goal[:2], dtype=np.float64)
+
+    grid = get_occupancy_grid(scene)
+    blocked = get_blocked_cells(grid, radius)
+    if has_line_of_sight(grid, blocked, start, goal):
+        return np.array([start, goal])
+
+    # Start and goal may sit inside an inflated obstacle (e.g. against the
+    # fence), so search between the nearest free cells and join them up
+    start_cell = _nearest_free_cell(blocked, _to_cell(grid, start))
+    goal_cell = _nearest_free_cell(blocked, _to_cell(grid, goal))
+    cells = _astar(blocked, start_cell, goal_cell) if start_cell and goal_cell else None
+    if cells is None:
+        print(f"No collision-free path from {tuple(start.round(2))} to {tuple(goal.round(2))}, moving straight")
+        return np.array([start, goal])
+
+    points = [start] + [_to_point(grid, cell) for cell in cells[1:-1]] + [goal]
+    return np.array(smooth_path(grid, blocked, points))
@@ -0,0 +1,217 @@
+import os
+import time
+import itertools
+import numpy as np
+from config import POINT_CLOUD_SETTINGS
+
+# PLY property types and their NumPy equivalents
+PLY_TYPES = {
+    "char": "i1", "int8": "i1", "uchar": "u1", "uint8": "u1",
+    "short": "i2", "int16": "i2", "ushort": "u2", "uint16": "u2",
+    "int": "i4", "int32": "i4", "uint": "u4", "uint32": "u4",
+    "float": "f4", "float32": "f4", "double": "f8", "float64": "f8"
+}
+
+def _read_ply_header(path):
+    """Parse a PLY header into (format, vertex count, vertex properties, header size in bytes)"""
+    with open(path, 'rb') as f:
+        if f.readline().strip() != b"ply":
+            raise ValueError(f"{path} is not a PLY file")
+
+        fmt = None
+        count = None
+        properties = []
+        element = None
+        while True:
+            line = f.readline()
+            if not line:
+                raise ValueError(f"{path} has no end_header line")
+            words = line.decode('ascii').split()
+            if not words or words[0] in ("comment", "obj_info"):
+                continue
+            if words[0] == "end_header":
+                return fmt, count, properties, f.tell()
+            if words[0] == "format":
+                fmt = words[1]
+            elif words[0] == "element":
+                element = words[1]
+                if element == "vertex":
+                    count = int(words[2])
+                elif count is None:
+                    raise ValueError("PLY files must store their vertices first")
+            elif words[0] == "property" and element == "vertex":
+                if words[1] == "list":
+                    raise ValueError("PLY vertex list properties are not supported")
+                properties.append((words[2], PLY_TYPES[words[1]]))
+
+def _text_chunks(path, chunk_size, skip_rows=0, max_rows=None):
+    """Yield XYZ columns of a whitespace-separated text file chunk by chunk"""
+    with open(path) as f:
+        lines = itertools.islice(f, skip_rows, None if max_rows is None else skip_rows + max_rows)
+        while True:
+            chunk = list(itertools.islice(lines, chunk_size))
+            if not chunk:
+                return
+            yield np.loadtxt(chunk, usecols=(0, 1, 2), ndmin=2, comments=("#", "//"))
+
+def _count_header_lines(path):
+    """Number of text lines in a PLY header, for ASCII PLY files"""
+    with open(path, 'rb') as f:
+        for i, line in enumerate(f):
+            if line.strip() == b"end_header":
+                return i + 1
+    return 0
+
+def iter_point_chunks(path, chunk_size=None):
+    """Yield (M, 3) float64 XYZ chunks; binary files are memory-mapped, not loaded"""
+    if chunk_size is None:
+        chunk_size = POINT_CLOUD_SETTINGS["chunk_size"]
+    extension = os.path.splitext(path)[1].lower()
+
+    if extension == ".npy":
+        points = np.load(path, mmap_mode='r')
+        if points.dtype.names:
+            columns = ("x", "y", "z")
+        elif points.ndim != 2 or points.shape[1] < 3:
+            raise ValueError(f"{path} must hold an (N, 3) array or x/y/z fields")
+    elif extension == ".ply":
+        fmt, count, properties, header_size = _read_ply_header(path)
+        if fmt == "ascii":
+            yield from _text_chunks(path, chunk_size, max_rows=count, skip_rows=_count_header_lines(path))
+            return
+        byte_order = "<" if fmt == "binary_little_endian" else ">"
+        dtype = np.dtype([(name, byte_order + kind) for name, kind in properties])
+        points = np.memmap(path, dtype=dtype, mode='r', offset=header_size, shape=(count,))
+        columns = ("x", "y", "z")
+    elif extension in (".xyz", ".txt", ".pts"):
+        yield from _text_chunks(path, chunk_size)
+        return
+    else:
+        raise ValueError(f"Unsupported point cloud format: {extension}")
+
+    # Slicing the memory map only pages in the chunk being processed
+    for start in range(0, len(points), chunk_size):
+        chunk = points[start:start + chunk_size]
+        if points.dtype.names:
+            yield np.stack([chunk[c].astype(np.float64) for c in columns], axis=-1)
+        else:
+            yield np.asarray(chunk[:, :3], dtype=np.float64)
+
+def _merge_voxels(keys, sums, counts):
+    """Combine entries with equal voxel keys, summing positions and counts"""
+    order = np.argsort(keys, kind='stable')
+    keys = keys[order]
+    unique, starts = np.unique(keys, return_index=True)
+    return unique, np.add.reduceat(sums[order], starts, axis=0), np.add.reduceat(counts[order], starts)
+
+def voxel_downsample(path, voxel_size=None, chunk_size=None):
+    """Reduce a point cloud to one averaged point per occupied voxel, one chunk at a time"""
+    if voxel_size is None:
+        voxel_size = POINT_CLOUD_SETTINGS["voxel_size"]
+
+    # Pass 1: bounds, so voxel keys fit one integer
+    low = np.full(3, np.inf)
+    high = np.full(3, -np.inf)
+    point_count = 0
+    for chunk in iter_point_chunks(path, chunk_size):
+        low = np.minimum(low, chunk.min(axis=0))
+        high = np.maximum(high, chunk.max(axis=0))
+        point_count += len(chunk)
+    if point_count == 0:
+        raise ValueError(f"{path} contains no points")
+    dims = np.floor((high - low) / voxel_size).astype(np.int64) + 1
+
+    # Pass 2: memory grows with occupied voxels, not with the point count
+    keys = np.empty(0, dtype=np.int64)
+    sums = np.empty((0, 3))
+    counts = np.empty(0, dtype=np.int64)
+    for chunk in iter_point_chunks(path, chunk_size):
+        index = np.floor((chunk - low) / voxel_size).astype(np.int64)
+        index = np.minimum(index, dims - 1)
+        chunk_keys = (index[:, 0] * dims[1] + index[:, 1]) * dims[2] + index[:, 2]
+
+        unique, inverse = np.unique(chunk_keys, return_inverse=True)
+        chunk_sums = np.stack([np.bincount(inverse, weights=chunk[:, axis], minlength=len(unique))
+                               for axis in range(3)], axis=-1)
+        chunk_counts = np.bincount(inverse, minlength=len(unique))
+
+        keys, sums, counts = _merge_voxels(np.concatenate((keys, unique)),
+                                           np.concatenate((sums, chunk_sums)),
+                                           np.concatenate((counts, chunk_counts)))
+
+    return sums / counts[:, None], point_count
+
+def grid_heightfield(points, cell_size=None, mode=None):
+    """Rasterize points into a regular height grid; returns heights (rows = Y), origin and empty mask"""
+    if cell_size is None:
+        cell_size = POINT_CLOUD_SETTINGS["cell_size"]
+    if mode is None:
+        mode = POINT_CLOUD_SETTINGS["height_mode"]
+
+    origin = points[:, :2].min(axis=0)
+    cells = np.floor((points[:, :2] - origin) / cell_size).astype(np.int64)
+    cols, rows = cells.max(axis=0) + 1
+    flat = cells[:, 1] * cols + cells[:, 0]
+
+    if mode == "min":
+        # Lowest return per cell keeps the ground under grass and plants
+        heights = np.full(rows * cols, np.inf)
+        np.minimum.at(heights, flat, points[:, 2])
+        empty = np.isinf(heights)
+    elif mode == "max":
+        heights = np.full(rows * cols, -np.inf)
+        np.maximum.at(heights, flat, points[:, 2])
+        empty = np.isinf(heights)
+    else:
+        counts = np.bincount(flat, minlength=rows * cols)
+        heights = np.bincount(flat, weights=points[:, 2], minlength=rows * cols) / np.maximum(counts, 1)
+        empty = counts == 0
+
+    heights[empty] = np.nan
+    return heights.reshape(rows, cols), origin, empty.reshape(rows, cols)
+
+def fill_heightfield_holes(heights, iterations=None):
+    """Fill empty cells from the average of their filled neighbors, growing inwards"""
+    if iterations is None:
+        iterations = POINT_CLOUD_SETTINGS["fill_iterations"]
+    heights = heights.copy()
+
+    for _ in range(iterations):
+        empty = np.isnan(heights)
+        if not empty.any():
+            break
+        padded = np.pad(heights, 1, constant_values=np.nan)
+        neighbors = np.stack([padded[1 + dy:padded.shape[0] - 1 + dy, 1 + dx:padded.shape[1] - 1 + dx]
+                              for dy, dx in ((-1, 0), (1, 0), (0, -1), (0, 1))])
+        valid = ~np.isnan(neighbors)
+        count = valid.sum(axis=0)
+        total = np.where(valid, neighbors, 0.0).sum(axis=0)
+        fill = empty & (count > 0)
+        heights[fill] = total[fill] / count[fill]
+
+    # Holes larger than the iteration count get the median height
+    heights[np.isnan(heights)] = np.nanmedian(heights)
+    return heights
+
+def load_point_cloud_heightfield(path):
+    """Load a PLY/XYZ/NPY scan into a hole-free heightfield, reporting time per stage"""
+    timings = {}
+
+    start = time.perf_counter()
+    points, point_count = voxel_downsample(path)
+    timings["load + voxel downsample"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    heights, origin, empty = grid_heightfield(points)
+    timings["gridding"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    heights = fill_heightfield_holes(heights)
+    timings["hole filling"] = time.perf_counter() - start
+
+    print(f"Point cloud {os.path.basename(path)}: {point_count} points, {len(points)} voxels, "
+          f"{heights.shape[1]}x{heights.shape[0]} cells ({empty.sum()} filled)")
+    for stage, seconds in timings.items():
+        print(f"  {stage}: {seconds:.2f}s")
+
+    return heights, origin
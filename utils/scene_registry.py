@@ -0,0 +1,43 @@
+import bpy
+
+# Parts created by each builder, per owner and role. Owners are keyed by their
+# pointer rather than their name, so renamed objects (e.g. "Robot.001" in a
+# scene with two robots) can neither be missed nor confused with each other
+SCENE_REGISTRY = {}
+
+def reset_registry():
+    """Forget all handles before a scene is rebuilt"""
+    SCENE_REGISTRY.clear()
+
+def _get_entry(owner):
+    """Role table of an owner, the current scene if none is given"""
+    if owner is None:
+        owner = bpy.context.scene
+    return SCENE_REGISTRY.setdefault(owner.as_pointer(), {})
+
+def register_part(owner, role, obj):
+    """Record the single object playing a role for an owner (a robot, a tube, a scene)"""
+    _get_entry(owner)[role] = obj
+    return obj
+
+def add_part(owner, role, obj):
+    """Record one of several objects sharing a role, e.g. the robot's nozzles"""
+    _get_entry(owner).setdefault(role, []).append(obj)
+    return obj
+
+def get_part(owner, role, default=None):
+    """Object registered for a role of an owner"""
+    return _get_entry(owner).get(role, default)
+
+def get_parts(owner, role):
+    """All objects added for a role of an owner, in creation order"""
+    return list(_get_entry(owner).get(role, []))
+
+def copy_parts(source, target, mapping):
+    """Register the parts of one owner for another, swapping objects through a pointer -> object mapping"""
+    entry = _get_entry(target)
+    for role, value in _get_entry(source).items():
+        if isinstance(value, list):
+            entry[role] = [mapping.get(obj.as_pointer(), obj) for obj in value]
+        else:
+            entry[role] = mapping.get(value.as_pointer(), value)
@@ -0,0 +1,99 @@
+import bpy
+import numpy as np
+from utils.point_cloud import fill_heightfield_holes
+
+# Height grids keyed by the terrain they were sampled from
+_HEIGHT_CACHE = {}
+
+def get_mesh_triangles(obj):
+    """World-space triangles (T, 3, 3) of an object's evaluated mesh"""
+    depsgraph = bpy.context.evaluated_depsgraph_get()
+    evaluated = obj.evaluated_get(depsgraph)
+    mesh = evaluated.to_mesh()
+    mesh.calc_loop_triangles()
+
+    coords = np.empty(len(mesh.vertices) * 3, dtype=np.float64)
+    mesh.vertices.foreach_get("co", coords)
+    indices = np.empty(len(mesh.loop_triangles) * 3, dtype=np.int32)
+    mesh.loop_triangles.foreach_get("vertices", indices)
+    evaluated.to_mesh_clear()
+
+    matrix = np.array(obj.matrix_world)
+    world = coords.reshape(-1, 3) @ matrix[:3, :3].T + matrix[:3, 3]
+    return world[indices.reshape(-1, 3)]
+
+def rasterize_heights(triangles, origin, cell_size, shape):
+    """Surface height at every cell center covered by a triangle, NaN elsewhere"""
+    rows, cols = shape
+    heights = np.full(shape, np.nan)
+
+    # Range of cell centers inside each triangle's bounding box
+    low = np.ceil((triangles[:, :, :2].min(axis=1) - origin) / cell_size - 0.5).astype(np.int64)
+    high = np.floor((triangles[:, :, :2].max(axis=1) - origin) / cell_size - 0.5).astype(np.int64)
+    spans = high - low + 1
+
+    # Triangles with equally sized boxes are interpolated together
+    valid = (spans > 0).all(axis=1)
+    keys = spans[:, 0] * (spans[:, 1].max() + 1) + spans[:, 1]
+    for key in np.unique(keys[valid]):
+        group = valid & (keys == key)
+        span_x, span_y = spans[group][0]
+        offset_x, offset_y = np.meshgrid(np.arange(span_x), np.arange(span_y))
+        cells = low[group][:, None, :] + np.column_stack((offset_x.ravel(), offset_y.ravel()))[None]
+        centers = origin + (cells + 0.5) * cell_size
+
+        # Barycentric weights of every cell center in its triangle
+        a, b, c = (triangles[group][:, i, None, :] for i in range(3))
+        v0 = b[..., :2] - a[..., :2]
+        v1 = c[..., :2] - a[..., :2]
+        v2 = centers - a[..., :2]
+        denom = v0[..., 0] * v1[..., 1] - v1[..., 0] * v0[..., 1]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            w1 = (v2[..., 0] * v1[..., 1] - v1[..., 0] * v2[..., 1]) / denom
+            w2 = (v0[..., 0] * v2[..., 1] - v2[..., 0] * v0[..., 1]) / denom
+        w0 = 1.0 - w1 - w2
+        inside = (w0 >= -1e-9) & (w1 >= -1e-9) & (w2 >= -1e-9) & (denom != 0.0)
+        inside &= (cells[..., 0] >= 0) & (cells[..., 0] < cols) & (cells[..., 1] >= 0) & (cells[..., 1] < rows)
+
+        z = w0 * a[..., 2] + w1 * b[..., 2] + w2 * c[..., 2]
+        heights[cells[..., 1][inside], cells[..., 0][inside]] = z[inside]
+
+    return heights
+
+def get_terrain_height_grid(terrain, cell_size):
+    """Regular height grid sampled once from the terrain mesh, cached until the terrain changes"""
+    key = (terrain.name, len(terrain.data.vertices), tuple(round(v, 5) for row in terrain.matrix_world for v in row),
+           cell_size)
+    if key in _HEIGHT_CACHE:
+        return _HEIGHT_CACHE[key]
+
+    triangles = get_mesh_triangles(terrain)
+    origin = triangles[:, :, :2].reshape(-1, 2).min(axis=0)
+    extent = triangles[:, :, :2].reshape(-1, 2).max(axis=0) - origin
+    cols, rows = np.maximum(np.ceil(extent / cell_size).astype(np.int64), 1)
+
+    heights = rasterize_heights(triangles, origin, cell_size, (rows, cols))
+    grid = {"origin": origin, "cell_size": cell_size, "heights": fill_heightfield_holes(heights)}
+    _HEIGHT_CACHE.clear()
+    _HEIGHT_CACHE[key] = grid
+    return grid
+
+def sample_heights(grid, points):
+    """Bilinearly interpolated terrain height under XY points of any shape (..., 2)"""
+    heights = grid["heights"]
+    rows, cols = heights.shape
+    position = (np.asarray(points, dtype=np.float64) - grid["origin"]) / grid["cell_size"] - 0.5
+
+    # Clamp to the grid, so points past the edge get the edge height
+    x = np.clip(position[..., 0], 0.0, cols - 1)
+    y = np.clip(position[..., 1], 0.0, rows - 1)
+    x0 = np.minimum(np.floor(x).astype(np.int64), max(cols - 2, 0))
+    y0 = np.minimum(np.floor(y).astype(np.int64), max(rows - 2, 0))
+    x1 = np.minimum(x0 + 1, cols - 1)
+    y1 = np.minimum(y0 + 1, rows - 1)
+    tx = x - x0
+    ty = y - y0
+
+    bottom = heights[y0, x0] * (1 - tx) + heights[y0, x1] * tx
+    top = heights[y1, x0] * (1 - tx) + heights[y1, x1] * tx
+    return bottom * (1 - ty) + top * ty